@@ -0,0 +1,99 @@
+"""
+anomaly_scoring_benchmark.py — sklearn vs CompiledForest Scoring Latency
+========================================================================
+Times the per-packet anomaly check of edge_device(): one 2-feature point
+scored against a trained IsolationForest (contamination=0.1,
+random_state=42, Section 6.1). Compares
+
+  sklearn   : IsolationForest.predict(x.reshape(1, -1))
+  compiled  : CompiledForest.predict_one(x)   (flat-array traversal)
+
+and, for reference, the batch throughput of both at 1000 points per call.
+It also checks that the two paths agree on every point.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.abspath(os.path.join(current_dir, '..'))
+multiregion_dir = os.path.join(parent_dir, 'multiregion')
+for p in (parent_dir, multiregion_dir):
+    if p not in sys.path:
+        sys.path.append(p)
+
+from compiled_forest import CompiledForest
+
+SEED        = 42
+N_TRAIN     = 1000
+N_QUERIES   = 2000
+BATCH_SIZE  = 1000
+REPEATS     = 5
+
+
+def make_data(rng, n, anomaly_rate=0.1):
+    normal = np.column_stack([rng.uniform(20, 30, n), rng.uniform(40, 60, n)])
+    mask = rng.random(n) < anomaly_rate
+    normal[mask] = np.column_stack([rng.uniform(33, 40, mask.sum()),
+                                    rng.uniform(15, 25, mask.sum())])
+    return normal
+
+
+def time_per_call(fn, points):
+    best = float('inf')
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        for x in points:
+            fn(x)
+        best = min(best, (time.perf_counter() - t0) / len(points))
+    return best * 1e6   # microseconds
+
+
+def main():
+    rng = np.random.default_rng(SEED)
+    model = IsolationForest(contamination=0.1, random_state=SEED)
+    model.fit(make_data(rng, N_TRAIN))
+    compiled = CompiledForest.from_isolation_forest(model)
+
+    queries = make_data(rng, N_QUERIES)
+    ref = model.predict(queries)
+    agree_batch = np.array_equal(compiled.predict(queries), ref)
+    agree_single = all(compiled.predict_one(x) == p for x, p in zip(queries, ref))
+    max_score_diff = np.abs(compiled.score_samples(queries)
+                            - model.score_samples(queries)).max()
+
+    single = queries[:200]
+    t_sklearn = time_per_call(lambda x: model.predict(x.reshape(1, -1)), single[:50])
+    t_compiled = time_per_call(compiled.predict_one, single)
+
+    batch = queries[:BATCH_SIZE]
+    t0 = time.perf_counter()
+    model.predict(batch)
+    t_sklearn_batch = (time.perf_counter() - t0) / BATCH_SIZE * 1e6
+    t0 = time.perf_counter()
+    compiled.predict(batch)
+    t_compiled_batch = (time.perf_counter() - t0) / BATCH_SIZE * 1e6
+
+    print("\n" + "=" * 66)
+    print("Anomaly scoring latency — IsolationForest vs CompiledForest")
+    print(f"{len(model.estimators_)} trees | max depth {compiled.max_depth} | "
+          f"{compiled.feature.size} nodes")
+    print("=" * 66)
+    print(f"{'Mode':<22} | {'sklearn us':>11} | {'compiled us':>11} | {'Speedup':>8}")
+    print("-" * 66)
+    print(f"{'single point':<22} | {t_sklearn:>11.1f} | {t_compiled:>11.1f} | "
+          f"{t_sklearn / t_compiled:>7.0f}x")
+    print(f"{f'batch of {BATCH_SIZE} (per pt)':<22} | {t_sklearn_batch:>11.2f} | "
+          f"{t_compiled_batch:>11.2f} | {t_sklearn_batch / t_compiled_batch:>7.1f}x")
+    print("-" * 66)
+    print(f"Predictions agree: batch={agree_batch}, single={agree_single} | "
+          f"max |score diff| = {max_score_diff:.1e}")
+    print("=" * 66)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+cache_contention_benchmark.py — SmartCache Lock Contention Study
+================================================================
+Measures SmartCache throughput with N concurrent threads running the
+edge.py access pattern (get(); set() on a miss) over a skewed key
+population, comparing a single global lock (shards=1) against the
+hash-sharded cache (shards=SHARDS).
+
+The total number of operations is fixed, so decisions/s across thread
+counts are directly comparable. Keys follow a Zipf-like distribution
+(a few hot summaries, a long tail of replicated files).
+"""
+
+import os
+import sys
+import time
+import random
+import threading
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.abspath(os.path.join(current_dir, '..'))
+multiregion_dir = os.path.join(parent_dir, 'multiregion')
+for p in (parent_dir, multiregion_dir):
+    if p not in sys.path:
+        sys.path.append(p)
+
+from smart_cache import SmartCache
+
+THREAD_COUNTS = [1, 2, 4, 8, 16, 32, 64]
+TOTAL_OPS     = 256_000
+N_KEYS        = 2000
+MAX_SIZE      = 256
+SHARDS        = 16
+ZIPF_S        = 1.1
+SEED          = 42
+
+
+def make_keys(rng, n_ops):
+    weights = [1.0 / (i + 1) ** ZIPF_S for i in range(N_KEYS)]
+    paths = [f"region_{i % 3 + 1}_cloud_storage/data_{i}.json" for i in range(N_KEYS)]
+    return rng.choices(paths, weights=weights, k=n_ops)
+
+
+def _worker(cache, keys, barrier, counts):
+    hits = 0
+    barrier.wait()
+    for key in keys:
+        if cache.get(key) is None:
+            cache.set(key, {'path': key})
+        else:
+            hits += 1
+    counts.append(hits)
+
+
+def run(n_threads, shards):
+    cache = SmartCache(max_size=MAX_SIZE, ttl=300, shards=shards)
+    per_thread = TOTAL_OPS // n_threads
+    key_lists = [make_keys(random.Random(SEED + i), per_thread)
+                 for i in range(n_threads)]
+    barrier = threading.Barrier(n_threads + 1)
+    counts = []
+    threads = [
+        threading.Thread(target=_worker, args=(cache, keys, barrier, counts),
+                         daemon=True)
+        for keys in key_lists
+    ]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    ops = per_thread * n_threads
+    return {
+        'threads': n_threads,
+        'mode': 'global' if shards == 1 else f'sharded/{shards}',
+        'ops_per_s': ops / elapsed,
+        'hit_ratio': sum(counts) / ops,
+        'size': len(cache),
+    }
+
+
+def main():
+    print("\n" + "=" * 66)
+    print("SmartCache contention — global lock vs hash-sharded locks")
+    print(f"{TOTAL_OPS} get/set ops | {N_KEYS} keys (Zipf s={ZIPF_S}) | "
+          f"max_size={MAX_SIZE}")
+    print("=" * 66)
+    print(f"{'Threads':>7} | {'Mode':<11} | {'Ops/s':>12} | {'Hit ratio':>9} | {'Size':>5}")
+    print("-" * 66)
+    for n in THREAD_COUNTS:
+        for shards in (1, SHARDS):
+            r = run(n, shards)
+            print(f"{r['threads']:>7} | {r['mode']:<11} | {r['ops_per_s']:>12,.0f} | "
+                  f"{r['hit_ratio']:>9.3f} | {r['size']:>5}")
+    print("=" * 66)
+
+
+if __name__ == "__main__":
+    main()
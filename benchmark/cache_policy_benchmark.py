@@ -0,0 +1,123 @@
+"""
+cache_policy_benchmark.py — SmartCache Eviction Policy Study (LRU vs W-TinyLFU)
+===============================================================================
+Replays a synthetic trace of the edge.py cache traffic:
+
+  write   : save_to_cloud() caches every new summary it stores
+  read    : dashboard/API reads, Zipf-skewed towards a hot set, under two
+            mixes: 'recent' (newest files hottest, the hot set moves every
+            step) and 'popular' (a fixed hot population of earlier files,
+            redrawn every POPULATION_EVERY steps)
+  scan    : every SCAN_EVERY steps replicate_data() sweeps all files of
+            a region through read_compressed_data() (get_or_load)
+
+and reports the hit ratio of the reads (the latency-sensitive path) and of
+all lookups, for each policy at several cache sizes. A scan touches each
+file once, so under LRU it flushes the hot set; W-TinyLFU rejects the
+scanned keys at its frequency filter. Its filter also rejects brand-new
+keys, so it loses to LRU when the newest records are the hottest; its 20%
+admission window narrows that gap but does not close it.
+"""
+
+import os
+import sys
+import random
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.abspath(os.path.join(current_dir, '..'))
+multiregion_dir = os.path.join(parent_dir, 'multiregion')
+for p in (parent_dir, multiregion_dir):
+    if p not in sys.path:
+        sys.path.append(p)
+
+from smart_cache import SmartCache
+
+SEED          = 42
+REGIONS       = ['region_1', 'region_2', 'region_3']
+N_STEPS       = 3000
+READS_PER_STEP = 4
+HOT_WINDOW    = 300          # reads target the most recent files
+ZIPF_S        = 1.2
+SCAN_EVERY    = 100
+POPULATION_EVERY = 500
+READ_MIXES    = ['recent', 'popular']
+CACHE_SIZES   = [20, 50, 100, 200]
+POLICIES      = ['lru', 'tinylfu']
+
+
+def make_trace(read_mix, seed=SEED):
+    """List of (kind, key) with kind in {'write', 'read', 'scan'}."""
+    rng = random.Random(seed)
+    files = {r: [] for r in REGIONS}
+    written = []
+    population = []
+    weights = [1.0 / (i + 1) ** ZIPF_S for i in range(HOT_WINDOW)]
+    trace = []
+    for step in range(N_STEPS):
+        region = REGIONS[step % len(REGIONS)]
+        key = f"{region}_cloud_storage/data_{step}.json"
+        files[region].append(key)
+        written.append(key)
+        trace.append(('write', key))
+
+        if read_mix == 'recent':
+            hot = written[-HOT_WINDOW:][::-1]     # newest first
+        else:
+            if step % POPULATION_EVERY == 0:
+                population = rng.sample(written, min(HOT_WINDOW, len(written)))
+            hot = population
+        for key in rng.choices(hot, weights=weights[:len(hot)], k=READS_PER_STEP):
+            trace.append(('read', key))
+
+        if step and step % SCAN_EVERY == 0:
+            for key in files[REGIONS[(step // SCAN_EVERY) % len(REGIONS)]]:
+                trace.append(('scan', key))
+    return trace
+
+
+def replay(trace, size, policy):
+    cache = SmartCache(max_size=size, ttl=10 ** 9, policy=policy)
+    hits = {'read': 0, 'scan': 0}
+    lookups = {'read': 0, 'scan': 0}
+    for kind, key in trace:
+        if kind == 'write':
+            cache.set(key, key)
+            continue
+        lookups[kind] += 1
+        # read_compressed_data(): get_or_load(), loader runs on a miss
+        misses = []
+        cache.get_or_load(key, lambda k: misses.append(k) or k)
+        if not misses:
+            hits[kind] += 1
+    total = sum(lookups.values())
+    return {
+        'read_hit_ratio': hits['read'] / lookups['read'],
+        'overall_hit_ratio': sum(hits.values()) / total,
+        'evictions': cache.stats()['evictions'] + cache.stats()['rejected'],
+    }
+
+
+def main():
+    print("\n" + "=" * 78)
+    print("SmartCache policy study — writes + Zipf reads + replication scans")
+    print(f"{N_STEPS} writes | {N_STEPS * READS_PER_STEP} reads | "
+          f"region scan every {SCAN_EVERY} steps")
+    print("=" * 78)
+    print(f"{'Reads':<8} | {'Size':>5} | {'Policy':<8} | {'Read hit ratio':>14} | "
+          f"{'Overall hit ratio':>17} | {'Evicted':>8}")
+    print("-" * 78)
+    for read_mix in READ_MIXES:
+        trace = make_trace(read_mix)
+        for size in CACHE_SIZES:
+            for policy in POLICIES:
+                r = replay(trace, size, policy)
+                print(f"{read_mix:<8} | {size:>5} | {policy:<8} | "
+                      f"{r['read_hit_ratio']:>14.3f} | "
+                      f"{r['overall_hit_ratio']:>17.3f} | {r['evictions']:>8}")
+    print("=" * 78)
+    print("Trade-off: tinylfu wins on 'popular' reads with scans; on 'recent'")
+    print("reads, where new keys are the hottest, lru keeps the higher hit ratio.")
+
+
+if __name__ == "__main__":
+    main()
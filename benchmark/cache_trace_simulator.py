@@ -0,0 +1,106 @@
+"""
+cache_trace_simulator.py — Offline SmartCache Sizing from Recorded Traces
+==========================================================================
+Replays a key trace recorded by SmartCache.dump_trace() (edge.py writes
+multiregion/.cache/trace.csv on shutdown) against SmartCache instances of
+other sizes and policies, and reports the hit ratio each would have had.
+Use it to choose max_size / max_bytes from production traffic instead of
+guessing.
+
+Each 'set' row is replayed with a placeholder value of the recorded size,
+so byte budgets are charged as in the original run. TTLs are not replayed
+(entries never expire), so the ratios are upper bounds for a given size.
+
+Usage:
+    python cache_trace_simulator.py [trace.csv] [--sizes 10 20 50]
+                                    [--budgets-kb 256 1024] [--policies lru tinylfu]
+
+Without a trace file, a synthetic edge.py trace from
+cache_policy_benchmark.py is replayed.
+"""
+
+import os
+import sys
+import csv
+import argparse
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.abspath(os.path.join(current_dir, '..'))
+multiregion_dir = os.path.join(parent_dir, 'multiregion')
+for p in (current_dir, parent_dir, multiregion_dir):
+    if p not in sys.path:
+        sys.path.append(p)
+
+from smart_cache import SmartCache
+
+DEFAULT_SIZES      = [10, 20, 50, 100, 200]
+DEFAULT_BUDGETS_KB = []
+DEFAULT_POLICIES   = ['lru', 'tinylfu']
+SYNTHETIC_SIZE     = 300          # bytes per record in the synthetic trace
+
+
+def load_trace(path):
+    """List of (op, key, size) from a dump_trace() CSV."""
+    with open(path, newline='') as f:
+        return [(row['op'], row['key'], int(row['size']) if row['size'] else 0)
+                for row in csv.DictReader(f)]
+
+
+def synthetic_trace():
+    """edge.py-like trace: writes, Zipf reads of recent files, replication scans."""
+    from cache_policy_benchmark import make_trace
+    trace = []
+    for kind, key in make_trace('recent'):
+        if kind == 'write':
+            trace.append(('set', key, SYNTHETIC_SIZE))
+        else:
+            # read_compressed_data(): get_or_load()
+            trace.append(('load', key, SYNTHETIC_SIZE))
+    return trace
+
+
+def replay(trace, policy, max_size=None, max_bytes=None):
+    cache = SmartCache(max_size=max_size, max_bytes=max_bytes,
+                       ttl=10 ** 9, policy=policy)
+    for op, key, size in trace:
+        if op == 'get':
+            cache.get(key)
+        elif op == 'set':
+            cache.set(key, bytes(size))
+        elif op == 'load':
+            cache.get_or_load(key, lambda _: bytes(size))
+    return cache.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('trace', nargs='?', help="CSV written by SmartCache.dump_trace()")
+    parser.add_argument('--sizes', type=int, nargs='*', default=DEFAULT_SIZES,
+                        help="item-count capacities (max_size)")
+    parser.add_argument('--budgets-kb', type=int, nargs='*', default=DEFAULT_BUDGETS_KB,
+                        help="byte budgets in KB (max_bytes)")
+    parser.add_argument('--policies', nargs='*', default=DEFAULT_POLICIES)
+    args = parser.parse_args()
+
+    trace = load_trace(args.trace) if args.trace else synthetic_trace()
+    gets = sum(1 for op, _, _ in trace if op in ('get', 'load'))
+    print("\n" + "=" * 74)
+    print(f"SmartCache trace replay — {args.trace or 'synthetic edge.py trace'}")
+    print(f"{len(trace)} operations | {gets} gets | "
+          f"{len({key for _, key, _ in trace})} distinct keys")
+    print("=" * 74)
+    print(f"{'Capacity':>12} | {'Policy':<8} | {'Hit ratio':>9} | "
+          f"{'Evicted':>8} | {'Bytes held':>10}")
+    print("-" * 74)
+    configs = ([(f"{n} items", {'max_size': n}) for n in args.sizes] +
+               [(f"{kb} KB", {'max_bytes': kb * 1024}) for kb in args.budgets_kb])
+    for label, capacity in configs:
+        for policy in args.policies:
+            stats = replay(trace, policy, **capacity)
+            print(f"{label:>12} | {policy:<8} | {stats['hit_ratio']:>9.3f} | "
+                  f"{stats['evictions'] + stats['rejected']:>8} | {stats['bytes']:>10}")
+    print("=" * 74)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+lb_contention_benchmark.py — LoadBalancer Lock Contention Study
+================================================================
+Measures routing throughput of the save_to_cloud() hot path
+(get_target_region() followed by update_load()) with N concurrent ingest
+threads, comparing the single global RLock against sharded mode
+(per-region shard locks + optimistic snapshot reads).
+
+Reports decisions/s and the lock wait time recorded by
+LoadBalancer.lock_stats() for each configuration. The 'batched' mode routes
+BATCH_SIZE packets per LoadBalancer.route_batch() call instead.
+"""
+
+import os
+import sys
+import time
+import random
+import threading
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.abspath(os.path.join(current_dir, '..'))
+multiregion_dir = os.path.join(parent_dir, 'multiregion')
+for p in (parent_dir, multiregion_dir):
+    if p not in sys.path:
+        sys.path.append(p)
+
+from load_balancer import LoadBalancer
+
+REGIONS          = ['region_1', 'region_2', 'region_3']
+THREAD_COUNTS    = [1, 2, 4, 8, 16]
+OPS_PER_THREAD   = 20000
+PACKET_SIZE      = (80, 200)
+SERVICE_RATE_BPS = 2_000_000   # keeps loads hovering around the threshold
+SEED             = 42
+BATCH_SIZE       = 32
+
+
+def _worker(lb, region, n_ops, seed, barrier):
+    rng = random.Random(seed)
+    barrier.wait()
+    for _ in range(n_ops):
+        target = lb.get_target_region(region)
+        lb.update_load(target, rng.randint(*PACKET_SIZE))
+
+
+def _batch_worker(lb, region, n_ops, seed, barrier):
+    rng = random.Random(seed)
+    barrier.wait()
+    for _ in range(n_ops // BATCH_SIZE):
+        lb.route_batch({region: [rng.randint(*PACKET_SIZE)
+                                 for _ in range(BATCH_SIZE)]})
+
+
+def run(n_threads, mode):
+    sharded = mode == 'sharded'
+    lb = LoadBalancer(REGIONS, alpha=0.7, load_threshold=1000,
+                      service_rate=SERVICE_RATE_BPS, sharded=sharded)
+    worker = _batch_worker if mode == 'batched' else _worker
+    barrier = threading.Barrier(n_threads + 1)
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(lb, REGIONS[i % len(REGIONS)], OPS_PER_THREAD,
+                  SEED + i, barrier),
+            daemon=True,
+        )
+        for i in range(n_threads)
+    ]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    stats = lb.lock_stats()
+    shard_wait = sum(s['wait_ms'] for s in stats['shards'].values())
+    return {
+        'threads': n_threads,
+        'mode': mode,
+        'decisions_per_s': n_threads * OPS_PER_THREAD / elapsed,
+        'global_wait_ms': stats['global']['wait_ms'],
+        'shard_wait_ms': shard_wait,
+        'retries': stats['optimistic_retries'],
+        'redirects': lb.redirect_events,
+    }
+
+
+def main():
+    print("\n" + "=" * 84)
+    print("LoadBalancer contention — global RLock vs sharded reads vs batching")
+    print(f"{OPS_PER_THREAD} route+update ops per thread | regions={len(REGIONS)}")
+    print("=" * 84)
+    print(f"{'Threads':>7} | {'Mode':<8} | {'Decisions/s':>12} | "
+          f"{'Global wait ms':>14} | {'Shard wait ms':>13} | {'Retries':>7}")
+    print("-" * 84)
+    for n in THREAD_COUNTS:
+        for mode in ('global', 'sharded', 'batched'):
+            r = run(n, mode)
+            print(f"{r['threads']:>7} | {r['mode']:<8} | "
+                  f"{r['decisions_per_s']:>12,.0f} | "
+                  f"{r['global_wait_ms']:>14.1f} | "
+                  f"{r['shard_wait_ms']:>13.1f} | {r['retries']:>7}")
+    print("=" * 84)
+
+
+if __name__ == "__main__":
+    main()
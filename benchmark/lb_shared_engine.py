@@ -20,6 +20,9 @@ for p in (parent_dir, multiregion_dir):
         sys.path.append(p)
 
 from load_balancer import LoadBalancer
+from routing_strategies import (ThresholdHysteresisStrategy,
+                                PowerOfDChoicesStrategy,
+                                ConsistentHashStrategy)
 
 # Canonical defaults (aligned to comparable experiments)
 REGIONS = ['region_1', 'region_2', 'region_3']
@@ -46,8 +49,14 @@ def generate_traffic_sequence(n=DURATION, seed=SEED, burst_prob=BURST_PROB,
     return seq
 
 
-def simulated_cpu(loads, threshold=THRESHOLD):
-    """Synthetic CPU proxy used by Table - "Load Balancing Comparison over 100 Simulation Time-Steps" scripts."""
+def simulated_cpu(loads, threshold=THRESHOLD, capacities=None):
+    """Synthetic CPU proxy used by Table - "Load Balancing Comparison over 100 Simulation Time-Steps" scripts.
+
+    With per-region capacities c_i, loads are normalised to L_i / c_i first,
+    so a large site carrying proportionally more bytes is not counted as hot.
+    """
+    if capacities:
+        loads = {r: v / capacities.get(r, 1.0) for r, v in loads.items()}
     base_cpu = 55.0
     max_load = max(loads.values())
     imbalance = (max_load - min(loads.values())) / max(threshold, 1)
@@ -55,6 +64,28 @@ def simulated_cpu(loads, threshold=THRESHOLD):
     return min(cpu, 100.0)
 
 
+def count_violation(loads, threshold=THRESHOLD, capacities=None,
+                    thresholds=None):
+    """
+    1 if ANY region exceeds its threshold this step: thresholds[r] if
+    given, else threshold * c_i (the LoadBalancer.threshold_for() rule).
+    """
+    if capacities or thresholds:
+        capacities = capacities or {}
+        thresholds = thresholds or {}
+        return int(any(v > thresholds.get(r, threshold * capacities.get(r, 1.0))
+                       for r, v in loads.items()))
+    return int(any(v > threshold for v in loads.values()))
+
+
+def apply_processing(loads, processing_rate):
+    """Drain each region by a scalar or per-region processing rate."""
+    for r in loads:
+        rate = processing_rate[r] if isinstance(processing_rate, dict) \
+            else processing_rate
+        loads[r] = max(0, loads[r] - rate)
+
+
 def count_oscillation(history, target):
     """A->B->A oscillation detector."""
     if len(history) >= 2 and target == history[-2] and target != history[-1]:
@@ -63,7 +94,8 @@ def count_oscillation(history, target):
 
 
 def run_round_robin(traffic, regions=REGIONS, threshold=THRESHOLD,
-                    processing_rate=PROCESSING_RATE):
+                    processing_rate=PROCESSING_RATE, capacities=None,
+                    thresholds=None):
     loads = {r: 0 for r in regions}
     idx = 0
     violations = 0
@@ -76,15 +108,12 @@ def run_round_robin(traffic, regions=REGIONS, threshold=THRESHOLD,
         idx = (idx + 1) % len(regions)
         loads[target] += traffic[t]
 
-        for r in regions:
-            loads[r] = max(0, loads[r] - processing_rate)
-
-        if any(v > threshold for v in loads.values()):
-            violations += 1
+        apply_processing(loads, processing_rate)
+        violations += count_violation(loads, threshold, capacities, thresholds)
 
         flaps += count_oscillation(history, target)
         history.append(target)
-        cpu_samples.append(simulated_cpu(loads, threshold))
+        cpu_samples.append(simulated_cpu(loads, threshold, capacities))
 
     mean_cpu = sum(cpu_samples) / len(cpu_samples) if cpu_samples else 0
     return {
@@ -97,7 +126,9 @@ def run_round_robin(traffic, regions=REGIONS, threshold=THRESHOLD,
 
 
 def run_least_connections(traffic, regions=REGIONS, threshold=THRESHOLD,
-                          processing_rate=PROCESSING_RATE):
+                          processing_rate=PROCESSING_RATE, capacities=None,
+                          thresholds=None):
+    """Least-connections; weighted by capacity (arg min L_i / c_i) if given."""
     loads = {r: 0 for r in regions}
     violations = 0
     flaps = 0
@@ -105,18 +136,18 @@ def run_least_connections(traffic, regions=REGIONS, threshold=THRESHOLD,
     cpu_samples = []
 
     for t in range(len(traffic)):
-        target = min(loads, key=loads.get)
+        if capacities:
+            target = min(loads, key=lambda r: loads[r] / capacities.get(r, 1.0))
+        else:
+            target = min(loads, key=loads.get)
         loads[target] += traffic[t]
 
-        for r in regions:
-            loads[r] = max(0, loads[r] - processing_rate)
-
-        if any(v > threshold for v in loads.values()):
-            violations += 1
+        apply_processing(loads, processing_rate)
+        violations += count_violation(loads, threshold, capacities, thresholds)
 
         flaps += count_oscillation(history, target)
         history.append(target)
-        cpu_samples.append(simulated_cpu(loads, threshold))
+        cpu_samples.append(simulated_cpu(loads, threshold, capacities))
 
     mean_cpu = sum(cpu_samples) / len(cpu_samples) if cpu_samples else 0
     return {
@@ -128,9 +159,27 @@ def run_least_connections(traffic, regions=REGIONS, threshold=THRESHOLD,
     }
 
 
+def make_strategy(name, regions=REGIONS, seed=SEED):
+    """Build a routing strategy by name for run_sedge_lb_only()."""
+    if name == 'threshold':
+        return ThresholdHysteresisStrategy()
+    if name == 'power_of_2':
+        return PowerOfDChoicesStrategy(d=2, seed=seed)
+    if name == 'power_of_2_ungated':
+        return PowerOfDChoicesStrategy(d=2, gated=False, seed=seed)
+    if name == 'consistent_hash':
+        return ConsistentHashStrategy(regions, c=1.25)
+    raise ValueError(f"Unknown strategy: {name}")
+
+
+STRATEGY_NAMES = ['threshold', 'power_of_2', 'power_of_2_ungated',
+                  'consistent_hash']
+
+
 def run_sedge_lb_only(traffic, regions=REGIONS, threshold=THRESHOLD,
                       processing_rate=PROCESSING_RATE, alpha=0.7,
-                      ingress=INGRESS_REGION):
+                      ingress=INGRESS_REGION, strategy=None, capacities=None,
+                      forecaster=None, thresholds=None):
     """
     Canonical S-Edge load-balancing engine used by both comparable tables.
 
@@ -138,12 +187,26 @@ def run_sedge_lb_only(traffic, regions=REGIONS, threshold=THRESHOLD,
     - One ingress stream per step.
     - Route decision uses LoadBalancer.get_target_region(ingress).
     - Apply update_load(target, traffic[t]) then simulate_processing().
-    - Violation counted once per step if ANY region exceeds threshold.
+    - Violation counted once per step if ANY region exceeds its threshold
+      (lb.threshold_for(r): thresholds[r], else threshold * c_i).
     - Redirect counted when target != ingress.
     - Net cost: 50ms per redirect (aligned with ablation assumptions).
     - Oscillation: A->B->A on target history.
+
+    strategy selects the routing policy (a RoutingStrategy or a name from
+    STRATEGY_NAMES); None runs the S-Edge threshold/hysteresis policy.
+    capacities ({region: c_i}) and a per-region processing_rate dict model
+    heterogeneous sites; routing then uses normalised utilisation.
+    thresholds ({region: bytes}) overrides threshold * c_i per region.
+    forecaster enables predictive redirects; each step is one epoch and
+    lb.end_epoch() is called after processing.
     """
-    lb = LoadBalancer(regions, alpha=alpha, load_threshold=threshold)
+    if isinstance(strategy, str):
+        strategy = make_strategy(strategy, regions)
+    lb = LoadBalancer(regions, alpha=alpha, load_threshold=threshold,
+                      strategy=strategy, capacities=capacities,
+                      thresholds=thresholds, forecaster=forecaster)
+    region_thresholds = {r: lb.threshold_for(r) for r in regions}
 
     violations = 0
     redirects = 0
@@ -158,11 +221,13 @@ def run_sedge_lb_only(traffic, regions=REGIONS, threshold=THRESHOLD,
 
         lb.update_load(target, traffic[t])
         lb.simulate_processing(processing_rate)
+        lb.end_epoch()
 
         with lb.lock:
-            if any(v > threshold for v in lb.region_loads.values()):
-                violations += 1
-            cpu_samples.append(simulated_cpu(dict(lb.region_loads), threshold))
+            violations += count_violation(lb.region_loads, threshold,
+                                          thresholds=region_thresholds)
+            cpu_samples.append(simulated_cpu(dict(lb.region_loads), threshold,
+                                             capacities))
 
         flaps += count_oscillation(history, target)
         history.append(target)
@@ -173,7 +238,21 @@ def run_sedge_lb_only(traffic, regions=REGIONS, threshold=THRESHOLD,
         'flaps': flaps,
         'mean_cpu': mean_cpu,
         'redirects': redirects,
+        'predictive_redirects': lb.predictive_redirects,
         'net_cost_ms': round(redirects * 50.0),
         'history': history,
         'final_loads': dict(lb.region_loads),
     }
+
+
+def run_all_strategies(traffic, regions=REGIONS, threshold=THRESHOLD,
+                       processing_rate=PROCESSING_RATE, alpha=0.7,
+                       ingress=INGRESS_REGION, capacities=None,
+                       thresholds=None):
+    """Run every routing strategy on the same traffic: {name: result}."""
+    return {
+        name: run_sedge_lb_only(traffic, regions, threshold, processing_rate,
+                                alpha, ingress, strategy=name,
+                                capacities=capacities, thresholds=thresholds)
+        for name in STRATEGY_NAMES
+    }
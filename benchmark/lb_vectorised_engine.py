@@ -0,0 +1,232 @@
+"""
+NumPy-vectorised counterpart of lb_shared_engine.py for large sweeps.
+
+Purpose:
+- Simulate a whole grid of (seed x alpha x threshold x processing rate)
+  trajectories at once. The time loop stays in Python, but every step
+  advances all trajectories together as array operations, so a sweep
+  over thousands of seeds costs about as much as a few serial runs.
+- Reproduce the reference engine exactly. Traffic comes from the same
+  generate_traffic_sequence(), and every step applies the same arithmetic
+  in the same order as run_round_robin, run_least_connections and
+  run_sedge_lb_only. verify_against_reference() checks this.
+
+All grid results are arrays of shape (n_seeds, n_alphas, n_thresholds,
+n_rates). Round-robin and least-connections ignore alpha, so their alpha
+axis has length 1.
+"""
+
+import time
+
+import numpy as np
+
+import lb_shared_engine as ref
+from lb_shared_engine import (REGIONS, THRESHOLD, PROCESSING_RATE, DURATION,
+                              INGRESS_REGION, generate_traffic_sequence)
+
+BASE_CPU = 55.0          # same constants as lb_shared_engine.simulated_cpu
+IMBALANCE_WEIGHT = 15
+NET_COST_PER_REDIRECT_MS = 50.0
+
+
+def traffic_matrix(seeds, n=DURATION, **kwargs):
+    """Stack reference traffic sequences into an (n_seeds, n) array."""
+    return np.array([generate_traffic_sequence(n=n, seed=s, **kwargs)
+                     for s in seeds], dtype=np.float64)
+
+
+def _grid(traffic, alphas, thresholds, processing_rates, n_regions):
+    """Flatten the parameter grid into per-trajectory column vectors."""
+    traffic = np.asarray(traffic, dtype=np.float64)
+    alphas = np.asarray(alphas, dtype=np.float64)
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    rates = np.asarray(processing_rates, dtype=np.float64)
+
+    shape = (traffic.shape[0], len(alphas), len(thresholds), len(rates))
+    s_idx, a_idx, t_idx, p_idx = (ix.ravel() for ix in np.indices(shape))
+    return {
+        'shape': shape,
+        'traffic': traffic[s_idx],            # (B, n)
+        'alpha': alphas[a_idx],               # (B,)
+        'threshold': thresholds[t_idx],
+        'rate': rates[p_idx],
+        'loads': np.zeros((s_idx.size, n_regions)),
+    }
+
+
+def _cpu(loads, threshold):
+    """Vectorised simulated_cpu(): same formula, same operation order."""
+    max_load = loads.max(axis=1)
+    imbalance = (max_load - loads.min(axis=1)) / np.maximum(threshold, 1)
+    cpu = (max_load / threshold) * BASE_CPU + imbalance * IMBALANCE_WEIGHT
+    return np.minimum(cpu, 100.0)
+
+
+def _run(g, choose, n_regions):
+    """
+    Shared step loop. choose(t, loads) returns (target, redirected) arrays.
+    Processing, violation, oscillation and CPU accounting mirror the
+    reference loops.
+    """
+    loads = g['loads']
+    traffic, threshold, rate = g['traffic'], g['threshold'], g['rate']
+    batch = np.arange(loads.shape[0])
+    n_steps = traffic.shape[1]
+
+    violations = np.zeros(loads.shape[0], dtype=np.int64)
+    flaps = np.zeros_like(violations)
+    redirects = np.zeros_like(violations)
+    cpu_sum = np.zeros(loads.shape[0])
+    prev1 = prev2 = None
+
+    for t in range(n_steps):
+        target, redirected = choose(t, loads)
+        if redirected is not None:
+            redirects += redirected
+
+        loads[batch, target] += traffic[:, t]
+        np.maximum(loads - rate[:, None], 0, out=loads)
+
+        violations += (loads > threshold[:, None]).any(axis=1)
+        if prev2 is not None:
+            flaps += (target == prev2) & (target != prev1)
+        prev2, prev1 = prev1, target
+        cpu_sum += _cpu(loads, threshold)
+
+    shape = g['shape']
+    return {
+        'violations': violations.reshape(shape),
+        'flaps': flaps.reshape(shape),
+        'mean_cpu': (cpu_sum / max(n_steps, 1)).reshape(shape),
+        'redirects': redirects.reshape(shape),
+        'net_cost_ms': np.round(redirects * NET_COST_PER_REDIRECT_MS).reshape(shape),
+        'final_loads': loads.reshape(shape + (n_regions,)),
+    }
+
+
+def run_round_robin_grid(traffic, thresholds=(THRESHOLD,),
+                         processing_rates=(PROCESSING_RATE,), regions=REGIONS):
+    n_regions = len(regions)
+    g = _grid(traffic, (0.0,), thresholds, processing_rates, n_regions)
+    batch_size = g['loads'].shape[0]
+
+    def choose(t, loads):
+        return np.full(batch_size, t % n_regions), None
+
+    return _run(g, choose, n_regions)
+
+
+def run_least_connections_grid(traffic, thresholds=(THRESHOLD,),
+                               processing_rates=(PROCESSING_RATE,),
+                               regions=REGIONS):
+    n_regions = len(regions)
+    g = _grid(traffic, (0.0,), thresholds, processing_rates, n_regions)
+
+    def choose(t, loads):
+        # argmin returns the first minimum, matching min(dict, key=...)
+        return loads.argmin(axis=1), None
+
+    return _run(g, choose, n_regions)
+
+
+def run_sedge_grid(traffic, alphas=(0.7,), thresholds=(THRESHOLD,),
+                   processing_rates=(PROCESSING_RATE,), regions=REGIONS,
+                   ingress=INGRESS_REGION):
+    """
+    Vectorised run_sedge_lb_only(): threshold check (Eq. 1), arg-min
+    target (Eq. 2) and alpha hysteresis (Eq. 3) for every trajectory.
+    """
+    n_regions = len(regions)
+    g = _grid(traffic, alphas, thresholds, processing_rates, n_regions)
+    src = regions.index(ingress)
+    alpha, threshold = g['alpha'], g['threshold']
+    batch = np.arange(g['loads'].shape[0])
+
+    def choose(t, loads):
+        current = loads[:, src]
+        r_opt = loads.argmin(axis=1)
+        redirect = ((current > threshold)
+                    & (r_opt != src)
+                    & (loads[batch, r_opt] < alpha * current))
+        return np.where(redirect, r_opt, src), redirect
+
+    return _run(g, choose, n_regions)
+
+
+def verify_against_reference(seeds=range(20), alphas=(0.5, 0.7, 0.9),
+                             thresholds=(800, 1000),
+                             processing_rates=(80, 120), n=DURATION):
+    """
+    Compare every grid cell with the serial reference engine.
+    Returns the number of cells checked; raises AssertionError on mismatch.
+    """
+    seeds = list(seeds)
+    traffic = traffic_matrix(seeds, n)
+    sedge = run_sedge_grid(traffic, alphas, thresholds, processing_rates)
+    rr = run_round_robin_grid(traffic, thresholds, processing_rates)
+    lc = run_least_connections_grid(traffic, thresholds, processing_rates)
+
+    checked = 0
+    for i, seed in enumerate(seeds):
+        seq = generate_traffic_sequence(n=n, seed=seed)
+        for k, thr in enumerate(thresholds):
+            for m, rate in enumerate(processing_rates):
+                for name, fn, grid in (('rr', ref.run_round_robin, rr),
+                                       ('lc', ref.run_least_connections, lc)):
+                    expected = fn(seq, threshold=thr, processing_rate=rate)
+                    for key in ('violations', 'flaps'):
+                        assert grid[key][i, 0, k, m] == expected[key], \
+                            (name, key, seed, thr, rate)
+                    assert np.isclose(grid['mean_cpu'][i, 0, k, m],
+                                      expected['mean_cpu']), (name, seed)
+                    checked += 1
+                for j, alpha in enumerate(alphas):
+                    expected = ref.run_sedge_lb_only(
+                        seq, threshold=thr, processing_rate=rate, alpha=alpha)
+                    for key in ('violations', 'flaps', 'redirects',
+                                'net_cost_ms'):
+                        assert sedge[key][i, j, k, m] == expected[key], \
+                            ('sedge', key, seed, alpha, thr, rate)
+                    assert np.isclose(sedge['mean_cpu'][i, j, k, m],
+                                      expected['mean_cpu']), ('sedge', seed)
+                    checked += 1
+    return checked
+
+
+def main():
+    print("Verifying vectorised engine against lb_shared_engine...")
+    cells = verify_against_reference()
+    print(f"  {cells} grid cells match the reference implementation.")
+
+    seeds = range(1000)
+    alphas = np.round(np.arange(0.5, 0.951, 0.05), 2)
+    thresholds = (800, 1000, 1200)
+    rates = (80, 120, 160)
+    n_cells = len(seeds) * len(alphas) * len(thresholds) * len(rates)
+
+    t0 = time.perf_counter()
+    traffic = traffic_matrix(seeds)
+    result = run_sedge_grid(traffic, alphas, thresholds, rates)
+    vec_s = time.perf_counter() - t0
+
+    # Time a slice of the serial reference and extrapolate
+    sample = 200
+    t0 = time.perf_counter()
+    for s in range(sample):
+        seq = generate_traffic_sequence(seed=s)
+        ref.run_sedge_lb_only(seq, alpha=0.7)
+    serial_s = (time.perf_counter() - t0) / sample * n_cells
+
+    print(f"\nS-Edge sweep: {n_cells} trajectories x {DURATION} steps")
+    print(f"  vectorised: {vec_s:.2f} s | serial (extrapolated): {serial_s:.1f} s "
+          f"| speed-up: {serial_s / vec_s:.0f}x")
+
+    mean_viol = result['violations'].mean(axis=0)
+    print(f"\nMean violations by alpha (threshold={thresholds[1]}, "
+          f"rate={rates[1]}):")
+    for j, alpha in enumerate(alphas):
+        print(f"  alpha={alpha:.2f}: {mean_viol[j, 1, 1]:6.2f}")
+
+
+if __name__ == "__main__":
+    main()
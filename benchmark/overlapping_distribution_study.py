@@ -16,22 +16,44 @@ three overlap scenarios.
 Uses sklearn.IsolationForest directly (bypassing the predict() buffer
 guard in AnomalyDetector which requires 20 warm-up samples — appropriate
 for the formal evaluation context of this study).
+
+The same protocol is repeated for the streaming AnomalyDetector backends
+(Half-Space Trees, EWMA-Mahalanobis), and each backend's per-point cost
+is reported next to its F1:
+  Score us  : one predict() call on a single point
+  Update us : learning cost per new point. For the Isolation Forest this
+              is a refit on an N_TRAIN window amortised over
+              RETRAIN_EVERY samples (edge.py schedule); streaming
+              backends learn each point in place.
+  Memory KB : model state (compiled forest + training window for the
+              Isolation Forest).
 """
 
 import random
 import csv
 import os
 import sys
+import time
 import numpy as np
 from sklearn.ensemble import IsolationForest
 
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+current_dir = os.path.dirname(os.path.abspath(__file__))
+multiregion_dir = os.path.join(os.path.dirname(current_dir), 'multiregion')
+sys.path.insert(0, current_dir)
+if multiregion_dir not in sys.path:
+    sys.path.append(multiregion_dir)
+
+from compiled_forest import CompiledForest
+from streaming_detectors import HalfSpaceTrees, EWMAMahalanobis
 
 SEED           = 42
 N_TRAIN        = 900    # matches paper's held-out set size
 N_TEST_NORMAL  = 900
 N_TEST_ANOMALY = 100
 N_RUNS         = 5
+BACKENDS       = ['iforest', 'hst', 'mahalanobis']
+RETRAIN_EVERY  = 20     # edge.py retraining schedule
+N_TIMED        = 200    # points timed for score/update latency
 
 
 def generate(rng, n, temp_range, hum_range):
@@ -57,36 +79,93 @@ def evaluate(model, X, y_true):
     return prec, rec, f1, fpr
 
 
+def make_model(backend, seed):
+    if backend == 'iforest':
+        return IsolationForest(contamination=0.1, random_state=seed)
+    if backend == 'hst':
+        return HalfSpaceTrees(contamination=0.1, seed=seed)
+    return EWMAMahalanobis(contamination=0.1)
+
+
+def measure_costs(backend, train, stream_points, seed):
+    """Per-point score/update latency (us) and model memory (KB)."""
+    X = np.array(train)
+    points = np.array(stream_points[:N_TIMED])
+    model = make_model(backend, seed)
+
+    t0 = time.perf_counter()
+    model.fit(X)
+    fit_s = time.perf_counter() - t0
+
+    if backend == 'iforest':
+        compiled = CompiledForest.from_isolation_forest(model)
+        predict_one = compiled.predict_one
+        update_us = fit_s / RETRAIN_EVERY * 1e6
+        memory = (sum(a.nbytes for a in (compiled.feature, compiled.threshold,
+                                         compiled.left, compiled.right,
+                                         compiled.value))
+                  + X.nbytes)
+    else:
+        predict_one = model.predict_one
+        t0 = time.perf_counter()
+        for x in points:
+            model.learn_one(x)
+        update_us = (time.perf_counter() - t0) / len(points) * 1e6
+        memory = model.nbytes()
+
+    t0 = time.perf_counter()
+    for x in points:
+        predict_one(x)
+    score_us = (time.perf_counter() - t0) / len(points) * 1e6
+    return score_us, update_us, memory / 1024
+
+
 def run_scenario(scenario_name, normal_ranges, anomaly_ranges, seed=SEED):
-    precisions, recalls, f1s, fprs = [], [], [], []
+    metrics = {b: {'prec': [], 'rec': [], 'f1': [], 'fpr': []} for b in BACKENDS}
+    costs = {}
 
     for run in range(N_RUNS):
         rng = random.Random(seed + run)
 
         train = generate(rng, N_TRAIN, *normal_ranges)
-        model = IsolationForest(contamination=0.1, random_state=seed + run)
-        model.fit(train)
-
         test_normal  = generate(rng, N_TEST_NORMAL,  *normal_ranges)
         test_anomaly = generate(rng, N_TEST_ANOMALY, *anomaly_ranges)
         X      = test_normal + test_anomaly
         y_true = [1]*N_TEST_NORMAL + [-1]*N_TEST_ANOMALY
 
-        prec, rec, f1, fpr = evaluate(model, X, y_true)
-        precisions.append(prec)
-        recalls.append(rec)
-        f1s.append(f1)
-        fprs.append(fpr)
+        for backend in BACKENDS:
+            model = make_model(backend, seed + run)
+            model.fit(train)
+
+            prec, rec, f1, fpr = evaluate(model, X, y_true)
+            m = metrics[backend]
+            m['prec'].append(prec)
+            m['rec'].append(rec)
+            m['f1'].append(f1)
+            m['fpr'].append(fpr)
+
+            if run == 0:
+                costs[backend] = measure_costs(backend, train, test_normal,
+                                               seed + run)
 
     def avg(lst): return round(sum(lst)/len(lst), 3)
 
-    return {
-        'Scenario':            scenario_name,
-        'Precision':           avg(precisions),
-        'Recall':              avg(recalls),
-        'F1 Score':            avg(f1s),
-        'False Positive Rate': avg(fprs),
-    }
+    results = []
+    for backend in BACKENDS:
+        m = metrics[backend]
+        score_us, update_us, memory_kb = costs[backend]
+        results.append({
+            'Scenario':            scenario_name,
+            'Backend':             backend,
+            'Precision':           avg(m['prec']),
+            'Recall':              avg(m['rec']),
+            'F1 Score':            avg(m['f1']),
+            'False Positive Rate': avg(m['fpr']),
+            'Score us':            round(score_us, 1),
+            'Update us':           round(update_us, 1),
+            'Memory KB':           round(memory_kb, 1),
+        })
+    return results
 
 
 def main():
@@ -115,11 +194,11 @@ def main():
           f"Runs: {N_RUNS} | Seed: {SEED}")
     print("="*80)
 
-    results = []
+    all_results = []
     for s in scenarios:
         print(f"  Running {s['scenario_name']}...")
-        r = run_scenario(**s)
-        results.append(r)
+        all_results.extend(run_scenario(**s))
+    results = [r for r in all_results if r['Backend'] == 'iforest']
 
     print("\n" + "="*80)
     print(f"{'Scenario':<42} | {'Prec':>6} {'Rec':>6} "
@@ -148,12 +227,25 @@ def main():
     print(f"\n  The paper's F1~0.99 is an upper bound for the controlled")
     print(f"  simulation setup. Real-world performance would be lower.")
 
+    print("\n" + "="*80)
+    print("Backend comparison — F1 vs per-point cost")
+    print("="*80)
+    print(f"{'Scenario':<10} | {'Backend':<12} | {'F1':>6} {'FPR':>6} | "
+          f"{'Score us':>9} {'Update us':>10} {'Mem KB':>8}")
+    print("-"*80)
+    for r in all_results:
+        print(f"{r['Scenario'][:10]:<10} | {r['Backend']:<12} | "
+              f"{r['F1 Score']:>6.3f} {r['False Positive Rate']:>6.3f} | "
+              f"{r['Score us']:>9.1f} {r['Update us']:>10.1f} "
+              f"{r['Memory KB']:>8.1f}")
+    print("="*80)
+
     out_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
                             'overlapping_distribution_results.csv')
     with open(out_path, 'w', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=list(results[0].keys()))
+        writer = csv.DictWriter(f, fieldnames=list(all_results[0].keys()))
         writer.writeheader()
-        writer.writerows(results)
+        writer.writerows(all_results)
     print(f"\nResults saved to: {out_path}")
     return results
 
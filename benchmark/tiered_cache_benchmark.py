@@ -0,0 +1,103 @@
+"""
+tiered_cache_benchmark.py — Read Cost per Cache Tier
+====================================================
+Compares the three ways read_compressed_data() can serve a record:
+
+  decode : cache miss — read the file, AES-256-GCM decrypt, decompress,
+           json.loads (the full path through region_N_cloud_storage)
+  disk   : DiskCache hit — one mmap slice + marshal.loads
+  memory : SmartCache hit — a dict lookup
+
+for an aggregated summary (~100 B) and a raw record carrying the
+generate_sensor_data() system log (~230 KB), LZMA- and ZLIB-compressed.
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.abspath(os.path.join(current_dir, '..'))
+multiregion_dir = os.path.join(parent_dir, 'multiregion')
+for p in (parent_dir, multiregion_dir):
+    if p not in sys.path:
+        sys.path.append(p)
+
+from compression_manager import CompressionManager, CompressionType
+from encryption_manager import EncryptionManager
+from disk_cache import DiskCache
+from smart_cache import SmartCache
+
+N_READS = 2000
+RECORDS = {
+    'summary': {
+        'timestamp': '2025-01-01 12:00:00',
+        'temperature': 24.81,
+        'humidity': 51.37,
+        'priority': 'low',
+    },
+    'raw_log': {
+        'timestamp': '2025-01-01 12:00:00',
+        'temperature': 24.81,
+        'humidity': 51.37,
+        'system_log': "SYSTEM_STATUS_OK_CHECK_SENSOR_VOLTAGE_STABLE_ " * 5000,
+    },
+}
+
+
+def time_per_read(fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    workdir = tempfile.mkdtemp(prefix='tiered_cache_')
+    encryption_manager = EncryptionManager()
+    disk = DiskCache(os.path.join(workdir, 'cache.bin'),
+                     max_bytes=16 * 1024 * 1024)
+    memory = SmartCache(max_size=None, ttl=300, max_bytes=64 * 1024 * 1024)
+
+    print("\n" + "=" * 72)
+    print("Read cost per cache tier (mean µs per read)")
+    print("=" * 72)
+    print(f"{'Record':<9} | {'Algo':<5} | {'Decode':>10} | {'Disk tier':>10} | "
+          f"{'Memory':>8} | {'Decode/Disk':>11}")
+    print("-" * 72)
+    try:
+        for name, record in RECORDS.items():
+            for algo in (CompressionType.ZLIB, CompressionType.LZMA):
+                compression_manager = CompressionManager(algo)
+                raw = json.dumps(record).encode('utf-8')
+                path = os.path.join(workdir, f"{name}_{algo.value}.json.gz")
+                with open(path, 'wb') as f:
+                    f.write(encryption_manager.encrypt(
+                        compression_manager.compress(raw)))
+
+                def decode():
+                    with open(path, 'rb') as f:
+                        data = encryption_manager.decrypt(f.read())
+                    return json.loads(
+                        compression_manager.decompress(data).decode('utf-8'))
+
+                disk.put(path, decode(), time.time() + 300)
+                memory.set(path, decode())
+                n = N_READS if name == 'summary' else N_READS // 10
+                t_decode = time_per_read(decode, n)
+                t_disk = time_per_read(lambda: disk.get(path), n)
+                t_memory = time_per_read(lambda: memory.get(path), n)
+                print(f"{name:<9} | {algo.value:<5} | {t_decode:>10.1f} | "
+                      f"{t_disk:>10.1f} | {t_memory:>8.1f} | "
+                      f"{t_decode / t_disk:>10.1f}x")
+    finally:
+        disk.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+    print("=" * 72)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+version_store_benchmark.py — DataVersionControl Metadata Write Path
+===================================================================
+Measures DataVersionControl.save_version() against the original
+connect-per-call implementation (default rollback journal, a fresh
+sqlite3.connect() + commit + close() for every version), with the
+edge.py write pattern: one region thread per region saving versions
+concurrently.
+
+Write paths:
+  connect per call   : the original implementation (baseline)
+  commit per save    : pooled WAL connections, group_commit=False
+  group commit, wait : each save waits for its 'committed' future
+  group commit, async: saves do not wait (as in edge.py); the run ends
+                       with flush(), so every row is committed
+
+each WAL path under synchronous=NORMAL and FULL (a sync per commit).
+
+Reports per-save latency (until committed, where the caller waits) and
+aggregate throughput.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import tempfile
+import threading
+import statistics
+from concurrent.futures import Future
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.abspath(os.path.join(current_dir, '..'))
+multiregion_dir = os.path.join(parent_dir, 'multiregion')
+for p in (parent_dir, multiregion_dir):
+    if p not in sys.path:
+        sys.path.append(p)
+
+from version_control import DataVersionControl
+
+REGIONS        = ['region_1', 'region_2', 'region_3']
+SAVES_PER_THREAD = 300
+SUMMARY = {'timestamp': '2025-01-01 12:00:00', 'temperature': 24.8,
+           'humidity': 51.4, 'priority': 'low'}
+METADATA = {'region': 'region_1', 'priority': 'low', 'algorithm': 'zlib',
+            'compression_ratio': 0.62, 'upload_latency_ms': 48.0}
+
+
+class ConnectPerCallVersionControl(DataVersionControl):
+    """The pre-pooling write path, kept here as the baseline."""
+
+    def _initialize(self):
+        os.makedirs(self.version_dir, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE IF NOT EXISTS versions "
+                     "(checksum TEXT PRIMARY KEY, file_path TEXT, "
+                     "timestamp TEXT, metadata TEXT)")
+        conn.commit()
+        conn.close()
+
+    def close(self):
+        pass
+
+    def flush(self):
+        pass
+
+    def stats(self):
+        return {'mean_batch_size': 1.0}
+
+    def save_version(self, file_path, data, metadata=None):
+        relative_path = os.path.relpath(file_path, self.base_dir)
+        checksum = self._calculate_checksum(data)
+        timestamp = time.strftime('%Y-%m-%dT%H:%M:%S')
+        version_path = os.path.join(self.version_dir, f"{checksum}.json")
+        with open(version_path, 'w') as f:
+            json.dump({'data': data}, f)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("INSERT OR REPLACE INTO versions VALUES (?, ?, ?, ?)",
+                         (checksum, relative_path, timestamp, json.dumps(metadata or {})))
+            conn.commit()
+        finally:
+            conn.close()
+        committed = Future()
+        committed.set_result(True)
+        return {'checksum': checksum, 'timestamp': timestamp, 'committed': committed}
+
+
+def run(vc_class, wait=True, **kwargs):
+    workdir = tempfile.mkdtemp(prefix='version_store_')
+    vc = vc_class(workdir, **kwargs)
+    latencies = []
+    lock = threading.Lock()
+
+    def region_thread(region):
+        local = []
+        for i in range(SAVES_PER_THREAD):
+            data = dict(SUMMARY, seq=i, region=region)
+            path = os.path.join(workdir, f"{region}_cloud_storage", f"data_{i}.json.gz")
+            t0 = time.perf_counter()
+            result = vc.save_version(path, data, METADATA)
+            if wait:
+                result['committed'].result()
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=region_thread, args=(r,)) for r in REGIONS]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    vc.flush()
+    elapsed = time.perf_counter() - start
+    batch = vc.stats()['mean_batch_size']
+    vc.close()
+    shutil.rmtree(workdir, ignore_errors=True)
+    latencies.sort()
+    return {
+        'mean_ms': statistics.mean(latencies) * 1000,
+        'p95_ms': latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        'throughput': len(latencies) / elapsed,
+        'batch': batch,
+    }
+
+
+def main():
+    print("\n" + "=" * 78)
+    print(f"DataVersionControl.save_version — {len(REGIONS)} region threads x "
+          f"{SAVES_PER_THREAD} saves")
+    print("=" * 78)
+    print(f"{'Write path':<34} | {'Mean (ms)':>9} | {'p95 (ms)':>8} | {'Saves/s':>8} | "
+          f"{'Batch':>5}")
+    print("-" * 78)
+    paths = [("connect per call, rollback journal", ConnectPerCallVersionControl, True, {})]
+    for sync in ('NORMAL', 'FULL'):
+        paths += [
+            (f"WAL/{sync}, commit per save", DataVersionControl, True,
+             {'group_commit': False, 'synchronous': sync}),
+            (f"WAL/{sync}, group commit, wait", DataVersionControl, True,
+             {'synchronous': sync}),
+            (f"WAL/{sync}, group commit, async", DataVersionControl, False,
+             {'synchronous': sync}),
+        ]
+    for label, vc_class, wait, kwargs in paths:
+        r = run(vc_class, wait, **kwargs)
+        print(f"{label:<34} | {r['mean_ms']:>9.3f} | {r['p95_ms']:>8.3f} | "
+              f"{r['throughput']:>8.0f} | {r['batch']:>5.1f}")
+    print("=" * 78)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,14 @@
+import threading
+import time
 import numpy as np
 from sklearn.ensemble import IsolationForest
 
+from compiled_forest import CompiledForest
+from forest_training import train_compiled_forest
+from model_store import save_model_file, load_model_file
+from streaming_detectors import BACKENDS
+from training_window import TrainingWindow
+
 
 class AnomalyDetector:
     """
@@ -19,9 +27,43 @@ class AnomalyDetector:
     contamination=0.1 corresponds to the top 10% of anomaly scores being
     classified as anomalous. The operational delta value is stored explicitly
     as self.delta for transparency and paper consistency.
+
+    Retraining can run synchronously inside update() (default, as in the
+    paper's evaluation) or on a background worker thread (background=True).
+    In background mode a freshly fitted model is published by a single
+    reference assignment, so predict() always sees either the old or the
+    new model and never waits for training.
+
+    Training data is kept in a bounded TrainingWindow (sliding window or
+    reservoir sample), so memory and refit cost stay constant for the
+    life of the process.
+
+    Each trained forest is also exported to a CompiledForest, and
+    predict()/score() use that flat-array scorer instead of sklearn's
+    per-call machinery; decisions are identical.
+
+    backend='hst' (Half-Space Trees) or 'mahalanobis' (EWMA mean and
+    covariance) replaces the forest with an incrementally learning model
+    from streaming_detectors: update() costs O(1) per point and there is
+    no retraining, no training buffer and no worker thread.
+
+    save()/load() persist the trained model together with its training
+    window (model_store: compressed .npz, format version and sha256
+    checked on load). A detector loaded at startup predicts immediately
+    instead of waiting for 20 fresh samples; with checkpoint_path set, the
+    model is saved after every retrain.
+
+    With an executor (e.g. the ProcessPoolExecutor of a DetectorRegistry),
+    retraining runs as train_compiled_forest() jobs in that pool and only
+    the compiled arrays are published; at most one job per detector is in
+    flight, and a retrain requested meanwhile runs on the latest window
+    when it completes.
     """
 
-    def __init__(self, contamination=0.1, delta=0.5, random_state=42):
+    def __init__(self, contamination=0.1, delta=0.5, random_state=42,
+                 background=False, retrain_every=1, drift_threshold=None,
+                 window_size=1000, window_policy='sliding', backend='iforest',
+                 checkpoint_path=None, executor=None):
         """
         Parameters
         ----------
@@ -37,25 +79,111 @@ class AnomalyDetector:
             Default 0.5 (scores above 0.5 on the [0,1] scale are anomalous).
         random_state : int
             Seed for reproducibility (random_state=42, Section 6.1).
+        background : bool
+            Retrain on a background worker thread instead of inside
+            update(). The new model is swapped in atomically.
+        retrain_every : int
+            Retrain after this many new samples once 20 have been
+            collected. Default 1 refits on every update (original schedule).
+        drift_threshold : float, optional
+            Also retrain early when the recent feature mean moves more than
+            this many training standard deviations from the training mean.
+        window_size : int
+            Maximum number of samples kept for retraining.
+        window_policy : str
+            'sliding' keeps the most recent window_size samples,
+            'reservoir' a uniform sample of the whole stream.
+        backend : str
+            'iforest' (default), 'hst' or 'mahalanobis'. Streaming
+            backends ignore the retraining and window options.
+        checkpoint_path : str, optional
+            Save the model here after each retrain (streaming backends:
+            once per threshold window of updates).
+        executor : concurrent.futures.Executor, optional
+            Run Isolation Forest retraining in this pool instead of in
+            update() or a background thread.
         """
         self.contamination = contamination
         self.delta = delta              # explicit delta threshold (Eq. 7)
         self.random_state = random_state
-        self.model = IsolationForest(
-            contamination=contamination,
-            random_state=random_state
-        )
+        self.model = self._new_model()
+        self.compiled = None
         self.trained = False
-        self.data_buffer = []
+        self.data_buffer = TrainingWindow(window_size, window_policy,
+                                          seed=random_state)
+
+        # Retraining schedule
+        self.retrain_every = retrain_every
+        self.drift_threshold = drift_threshold
+        self._since_fit = 0
+        self._train_mean = None
+        self._train_std = None
+        self._recent_mean = None
+        self.retrain_count = 0
+        self.checkpoint_path = checkpoint_path
+
+        # Streaming backend (None for the Isolation Forest)
+        if backend != 'iforest' and backend not in BACKENDS:
+            raise ValueError(f"Unknown anomaly detector backend: {backend}")
+        self.backend = backend
+        self.stream = None
+        self.n_updates = 0
+        if backend == 'hst':
+            self.stream = BACKENDS[backend](contamination, seed=random_state)
+        elif backend != 'iforest':
+            self.stream = BACKENDS[backend](contamination)
+
+        # Retraining in an external (process) pool
+        self.executor = executor if self.stream is None else None
+        self._job = None
+        self._job_pending = False
+
+        # Background retraining
+        self.background = (background and self.stream is None
+                           and self.executor is None)
+        self.lock = threading.Lock()
+        self._retrain_event = threading.Event()
+        self._stopping = False
+        self._worker = None
+        if self.background:
+            self._worker = threading.Thread(target=self._retrain_loop,
+                                            daemon=True)
+            self._worker.start()
+
+    def _new_model(self):
+        return IsolationForest(
+            contamination=self.contamination,
+            random_state=self.random_state
+        )
 
     def fit(self, data):
         """
         Fit the Isolation Forest model on collected feature vectors.
         Data should be a list of feature vectors [temperature, humidity].
+
+        A new model is trained and then published by reference swap, so
+        concurrent predict() calls keep using the previous model meanwhile.
         """
-        X = np.array(data)
-        self.model.fit(X)
+        X = np.asarray(data, dtype=float)
+        if self.stream is not None:
+            with self.lock:
+                self.stream.fit(X)
+                self.trained = True
+            return
+        model = self._new_model()
+        model.fit(X)
+        self._publish(model, X)
+
+    def _publish(self, model, X, compiled=None):
+        """Atomically swap in a trained model and its drift baseline."""
+        if compiled is None:
+            compiled = CompiledForest.from_isolation_forest(model)
+        self._train_mean = X.mean(axis=0)
+        self._train_std = X.std(axis=0) + 1e-9
+        self.compiled = compiled
+        self.model = model
         self.trained = True
+        self.retrain_count += 1
 
     def predict(self, data_point):
         """
@@ -68,10 +196,29 @@ class AnomalyDetector:
             1  -> inlier  (normal, s(X_t) <= delta)
            -1  -> outlier (anomaly, s(X_t) > delta)
         """
+        if self.stream is not None:
+            if self.n_updates < 20:
+                return 1
+            return self.stream.predict_one(data_point)
+        compiled = self.compiled
         if not self.trained or len(self.data_buffer) < 20:
             return 1
-        prediction = self.model.predict(np.array(data_point).reshape(1, -1))
-        return prediction[0]
+        return compiled.predict_one(data_point)
+
+    def predict_batch(self, data_points):
+        """
+        Vectorised predict() for an (n, n_features) array of points;
+        returns an int array of 1 / -1. Used by BatchScorer.
+        """
+        compiled = self.compiled
+        X = np.asarray(data_points, dtype=float)
+        if self.stream is not None:
+            if self.n_updates < 20:
+                return np.ones(len(X), dtype=int)
+            return self.stream.predict(X)
+        if not self.trained or len(self.data_buffer) < 20:
+            return np.ones(len(X), dtype=int)
+        return compiled.predict(X)
 
     def score(self, data_point):
         """
@@ -79,21 +226,198 @@ class AnomalyDetector:
         Higher scores indicate greater anomaly likelihood.
         Used for ablation studies and delta threshold analysis.
         """
+        if self.stream is not None:
+            return self.stream.score_one(data_point)
+        compiled = self.compiled
         if not self.trained:
             return 0.0
         # IsolationForest.decision_function returns negative scores for
         # anomalies; we convert to a [0,1] scale consistent with Eq.
-        raw = self.model.decision_function(
-            np.array(data_point).reshape(1, -1)
-        )[0]
+        raw = compiled.decision_function(data_point)[0]
         # Normalise: map from [-0.5, 0.5] range to [0, 1]
         return float(np.clip(0.5 - raw, 0, 1))
 
     def update(self, data_point):
         """
         Add a new data point and retrain the model periodically.
-        Retraining is triggered every 20 samples to adapt to data drift.
+        Retraining starts once 20 samples are buffered and then runs every
+        retrain_every samples, or early on drift, to adapt to data drift.
+        In background mode this only signals the worker thread.
+        Streaming backends learn the point immediately instead.
+        """
+        if self.stream is not None:
+            with self.lock:
+                self.stream.learn_one(data_point)
+                self.n_updates += 1
+                self.trained = self.stream.ready
+                due = self.n_updates % self.stream.threshold_window == 0
+            if due:
+                self._checkpoint()
+            return
+        with self.lock:
+            self.data_buffer.append(data_point)
+            self.n_updates += 1
+            self._since_fit += 1
+            due = (len(self.data_buffer) >= 20
+                   and (self._since_fit >= self.retrain_every
+                        or not self.trained
+                        or self._drifted(data_point)))
+            if due:
+                self._since_fit = 0
+                if not self.background:
+                    snapshot = self.data_buffer.array()
+        if not due:
+            return
+        if self.executor is not None:
+            self._submit_training(snapshot)
+        elif self.background:
+            self._retrain_event.set()
+        else:
+            self.fit(snapshot)
+            self._checkpoint()
+
+    def _drifted(self, data_point):
+        """
+        Drift trigger: EWMA of recent points vs training mean, measured in
+        training standard deviations. Caller holds self.lock.
+        """
+        if self.drift_threshold is None or self._train_mean is None:
+            return False
+        x = np.asarray(data_point, dtype=float)
+        if self._recent_mean is None:
+            self._recent_mean = x
+        else:
+            self._recent_mean = 0.9 * self._recent_mean + 0.1 * x
+        shift = np.abs(self._recent_mean - self._train_mean) / self._train_std
+        if shift.max() > self.drift_threshold:
+            self._recent_mean = None
+            return True
+        return False
+
+    # ------------------------------------------------------------------
+    # Background retraining
+    # ------------------------------------------------------------------
+    def _retrain_loop(self):
+        """Worker: fit on the latest buffer snapshot whenever signalled."""
+        while True:
+            self._retrain_event.wait()
+            self._retrain_event.clear()
+            if self._stopping:
+                return
+            with self.lock:
+                snapshot = self.data_buffer.array()
+            try:
+                self.fit(snapshot)
+            except Exception as e:
+                print(f"Anomaly model retraining error: {e}")
+                continue
+            self._checkpoint()
+
+    # ------------------------------------------------------------------
+    # Pool retraining
+    # ------------------------------------------------------------------
+    def _submit_training(self, X):
+        with self.lock:
+            if self._job is not None:
+                self._job_pending = True
+                return
+            try:
+                self._job = self.executor.submit(train_compiled_forest, X,
+                                                 self.contamination,
+                                                 self.random_state)
+            except RuntimeError:
+                return      # pool shut down
+        self._job.add_done_callback(lambda job: self._on_trained(job, X))
+
+    def _on_trained(self, job, X):
+        """Publish a pool-trained forest; resubmit if a retrain was requested."""
+        try:
+            arrays, scalars = job.result()
+            # sklearn estimator stays in the worker; scoring needs only arrays
+            self._publish(None, X, CompiledForest.from_state(arrays, scalars))
+        except Exception as e:
+            print(f"Anomaly model retraining error: {e}")
+        else:
+            self._checkpoint()
+        with self.lock:
+            self._job = None
+            pending, self._job_pending = self._job_pending, False
+            snapshot = self.data_buffer.array() if pending else None
+        if pending:
+            self._submit_training(snapshot)
+
+    def stop(self):
+        """Stop the background retraining worker."""
+        self._stopping = True
+        self._retrain_event.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+
+    # ------------------------------------------------------------------
+    # Persistence and warm start
+    # ------------------------------------------------------------------
+    def save(self, path):
+        """Write the trained model and its training window to path (.npz)."""
+        with self.lock:
+            meta = {
+                'backend': self.backend,
+                'contamination': self.contamination,
+                'window_policy': self.data_buffer.policy,
+                'window_total_seen': self.data_buffer.total_seen,
+                'n_updates': self.n_updates,
+                'retrain_count': self.retrain_count,
+                'saved_at': time.time(),
+            }
+            arrays = {'window': self.data_buffer.array()}
+            if self.stream is not None:
+                state_arrays, scalars = self.stream.state()
+            elif self.compiled is not None:
+                state_arrays, scalars = self.compiled.state()
+            else:
+                raise ValueError("Cannot save an untrained AnomalyDetector")
+        arrays.update({f"model.{k}": v for k, v in state_arrays.items()})
+        meta['model'] = scalars
+        save_model_file(path, arrays, meta)
+
+    def load(self, path):
+        """
+        Warm start from a file written by save(). Raises ValueError if the
+        file fails validation or was saved by a different backend.
         """
-        self.data_buffer.append(data_point)
-        if len(self.data_buffer) >= 20:
-            self.fit(self.data_buffer)
+        arrays, meta = load_model_file(path)
+        if meta['backend'] != self.backend:
+            raise ValueError(f"{path}: saved with backend '{meta['backend']}', "
+                             f"detector uses '{self.backend}'")
+        state_arrays = {k[len('model.'):]: v for k, v in arrays.items()
+                        if k.startswith('model.')}
+        window = arrays['window']
+
+        with self.lock:
+            self.data_buffer.clear()
+            for row in window[-self.data_buffer.capacity:]:
+                self.data_buffer.append(row)
+            self.data_buffer.total_seen = meta['window_total_seen']
+            self.n_updates = meta['n_updates']
+            self.retrain_count = meta['retrain_count']
+            self._since_fit = 0
+            if self.stream is not None:
+                self.stream.set_state(state_arrays, meta['model'])
+                self.trained = self.stream.ready
+                return
+            # The sklearn estimator is rebuilt on the next retrain; scoring
+            # only needs the compiled forest.
+            self.compiled = CompiledForest.from_state(state_arrays, meta['model'])
+            self.model = None
+            if len(window):
+                self._train_mean = window.mean(axis=0)
+                self._train_std = window.std(axis=0) + 1e-9
+            self.trained = True
+
+    def _checkpoint(self):
+        if self.checkpoint_path is None:
+            return
+        try:
+            self.save(self.checkpoint_path)
+        except Exception as e:
+            print(f"Anomaly model checkpoint error: {e}")
@@ -0,0 +1,122 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class BatchScorer:
+    """
+    Batching front end for a shared AnomalyDetector or a DetectorRegistry.
+
+    Region threads call submit() (or the blocking predict()) with one
+    feature vector and receive a Future. A single scorer thread takes the
+    first pending request, keeps collecting for at most max_wait seconds
+    or until max_batch_size requests are queued, and scores the batch with
+    one predict_batch() call per detector. Each Future resolves to the
+    same value predict() would return (1 or -1).
+
+    Batching only pays off when many requests share a detector: per-call
+    overhead is then paid once per batch. Through a registry, requests are
+    grouped by key and each group is a separate predict_batch() call, so
+    with one detector per region and one request per region in flight
+    every call scores a single point, and each request still waits up to
+    max_wait. edge.py therefore calls DetectorRegistry.predict() directly;
+    use BatchScorer with a shared detector, or when a key receives many
+    requests at once.
+    """
+
+    def __init__(self, detector, max_batch_size=32, max_wait=0.005):
+        """
+        Parameters
+        ----------
+        detector : AnomalyDetector or DetectorRegistry
+            Shared detector, or a registry whose get(key) returns one.
+            Only predict_batch() is called.
+        max_batch_size : int
+            Upper bound on the number of points scored per call.
+        max_wait : float
+            Seconds to wait for more requests after the first one arrives.
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.detector = detector
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self.batches = 0
+        self.points = 0
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, features, key=None):
+        """
+        Queue one feature vector; returns a Future for its prediction.
+        key selects the registry detector (ignored for a single detector).
+        """
+        future = Future()
+        self._queue.put((key, features, future))
+        return future
+
+    def predict(self, features, key=None, timeout=None):
+        """Blocking drop-in for AnomalyDetector.predict()."""
+        return self.submit(features, key).result(timeout)
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'points': self.points,
+            'mean_batch_size': self.points / self.batches if self.batches else 0.0,
+        }
+
+    def stop(self):
+        """Score what is already queued, then stop the scorer thread."""
+        self._queue.put(None)
+        self._worker.join()
+
+    # ------------------------------------------------------------------
+    # Scorer thread
+    # ------------------------------------------------------------------
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stopping = False
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = (self._queue.get(timeout=remaining) if remaining > 0
+                            else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._score(batch)
+            if stopping:
+                return
+
+    def _score(self, batch):
+        groups = {}
+        for key, features, future in batch:
+            groups.setdefault(key, []).append((features, future))
+        for key, items in groups.items():
+            futures = [future for _, future in items]
+            try:
+                detector = (self.detector if key is None
+                            else self.detector.get(key))
+                X = np.array([features for features, _ in items], dtype=float)
+                predictions = detector.predict_batch(X)
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            for future, prediction in zip(futures, predictions):
+                future.set_result(int(prediction))
+        self.batches += 1
+        self.points += len(batch)
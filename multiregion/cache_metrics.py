@@ -0,0 +1,70 @@
+from bisect import bisect_left
+
+
+def key_prefix(key):
+    """Default SmartCache key grouping: the directory part of a path key."""
+    prefix, sep, _ = str(key).rpartition('/')
+    return prefix if sep else ''
+
+
+class LatencyHistogram:
+    """
+    Operation latencies in fixed, roughly log-spaced buckets (1-2-5 per
+    decade, in microseconds), so recording is O(log buckets) and memory is
+    constant however many operations are recorded. Percentiles are read
+    off the bucket upper bounds. Not thread-safe; SmartCache records
+    under a shard lock and merges shard histograms for reporting.
+    """
+
+    BOUNDS_US = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000,
+                 10000, 20000, 50000, 100000, 200000, 500000, 1000000)
+
+    def __init__(self, bounds_us=BOUNDS_US):
+        self.bounds_us = tuple(bounds_us)
+        self.counts = [0] * (len(self.bounds_us) + 1)   # last: overflow
+        self.count = 0
+        self.total_us = 0.0
+        self.max_us = 0.0
+
+    def record(self, seconds):
+        us = seconds * 1e6
+        self.counts[bisect_left(self.bounds_us, us)] += 1
+        self.count += 1
+        self.total_us += us
+        if us > self.max_us:
+            self.max_us = us
+
+    def merge(self, other):
+        """Add other's counts to this histogram; returns self."""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total_us += other.total_us
+        self.max_us = max(self.max_us, other.max_us)
+        return self
+
+    def percentile(self, q):
+        """Upper bound (µs) of the bucket holding the q-th percentile (<= max)."""
+        if self.count == 0:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank and c:
+                if i == len(self.bounds_us):
+                    return self.max_us
+                return min(float(self.bounds_us[i]), self.max_us)
+        return self.max_us
+
+    def snapshot(self):
+        buckets = {f"<={b}us": c for b, c in zip(self.bounds_us, self.counts)}
+        buckets[f">{self.bounds_us[-1]}us"] = self.counts[-1]
+        return {
+            'count': self.count,
+            'mean_us': self.total_us / self.count if self.count else 0.0,
+            'p50_us': self.percentile(50),
+            'p95_us': self.percentile(95),
+            'p99_us': self.percentile(99),
+            'max_us': self.max_us,
+            'buckets': buckets,
+        }
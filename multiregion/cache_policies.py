@@ -0,0 +1,220 @@
+from collections import OrderedDict
+from hashlib import blake2b
+
+
+class LRUPolicy:
+    """
+    Eviction order for one SmartCache shard: plain least-recently-used.
+
+    A policy tracks keys and their weights (bytes, or 1 per item) against
+    a fixed capacity. The shard calls record() on every lookup and every
+    write, access() on a hit, insert() for a new key and remove() when it drops a key
+    itself. insert() returns (evicted, rejected): the keys pushed out to
+    make room, and the keys an admission filter refused to keep (possibly
+    the inserted key itself). LRU admits everything.
+    """
+
+    name = 'lru'
+
+    def __init__(self, capacity, expected_entries=None):
+        self.capacity = capacity
+        self.order = OrderedDict()      # key -> weight, LRU first
+        self.total = 0
+
+    def record(self, key):
+        pass
+
+    def access(self, key):
+        self.order.move_to_end(key)
+
+    def insert(self, key, weight):
+        self.order[key] = weight
+        self.total += weight
+        victims = []
+        while self.total > self.capacity and len(self.order) > 1:
+            victims.append(self.evict_one())
+        return victims, []
+
+    def remove(self, key):
+        self.total -= self.order.pop(key)
+
+    def evict_one(self):
+        key, weight = self.order.popitem(last=False)
+        self.total -= weight
+        return key
+
+
+class CountMinSketch:
+    """
+    Approximate access frequencies for TinyLFU: `depth` rows of 4-bit
+    counters (saturating at 15) indexed by independent hashes of the key.
+    The estimate is the minimum over rows. After sample_size increments
+    every counter is halved, so popularity ages out.
+
+    Row indexes come from one blake2b digest of str(key) (double hashing),
+    not the built-in hash(), which is salted per process for str keys, so
+    admission decisions and benchmark results are reproducible.
+    """
+
+    MAX_COUNT = 15
+
+    def __init__(self, width=1024, depth=4, sample_size=None):
+        self.width = width
+        self.depth = depth
+        self.rows = [[0] * width for _ in range(depth)]
+        self.sample_size = sample_size or 10 * width
+        self.additions = 0
+
+    def _indexes(self, key):
+        digest = blake2b(str(key).encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.depth):
+            yield i, (h1 + i * h2) % self.width
+
+    def increment(self, key):
+        for i, j in self._indexes(key):
+            if self.rows[i][j] < self.MAX_COUNT:
+                self.rows[i][j] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self._age()
+
+    def estimate(self, key):
+        return min(self.rows[i][j] for i, j in self._indexes(key))
+
+    def _age(self):
+        for row in self.rows:
+            for j in range(self.width):
+                row[j] >>= 1
+        self.additions //= 2
+
+
+class WTinyLFUPolicy:
+    """
+    W-TinyLFU (Einziger, Friedman & Manes, 2017).
+
+    New keys enter a small LRU window (window_fraction of capacity). Keys
+    pushed out of the window compete for a place in the main space, a
+    segmented LRU with a probation and a protected segment. A candidate is
+    admitted only if its estimated access frequency (CountMinSketch over
+    every lookup, hits and misses, and every write) beats that of the probation victim it
+    would displace. A one-off sweep of cold keys, such as a replication
+    pass, therefore cycles through the window and is rejected at the
+    admission filter instead of flushing the hot entries in main.
+
+    The window is 20% of capacity rather than Caffeine's 1%: at the few
+    hundred entries SmartCache holds, 1% is a single slot, and traffic
+    where the newest keys are the hottest was mostly rejected at
+    admission (0.38 vs LRU's 0.66 read hit ratio at 20 entries in
+    benchmark/cache_policy_benchmark.py). At 20% TinyLFU is within
+    0.06-0.14 of LRU on that trace and keeps its lead on popularity-skewed
+    reads with scans; recency-dominated workloads are still better
+    served by 'lru'.
+    """
+
+    name = 'tinylfu'
+
+    def __init__(self, capacity, window_fraction=0.2, protected_fraction=0.8,
+                 expected_entries=None):
+        """
+        capacity: total weight (items or bytes) of window + main.
+        window_fraction: share of capacity given to the LRU window.
+        protected_fraction: share of main reserved for protected entries.
+        expected_entries: entries the cache holds when full (defaults to
+            capacity); sizes the sketch (4 counters per entry) and its
+            aging period (10 x entries), as in Caffeine.
+        """
+        self.capacity = capacity
+        self.total = 0
+        self.window_capacity = max(1, int(capacity * window_fraction))
+        self.protected_capacity = int((capacity - self.window_capacity)
+                                      * protected_fraction)
+        self.window = OrderedDict()
+        self.probation = OrderedDict()
+        self.protected = OrderedDict()
+        self.window_total = self.probation_total = self.protected_total = 0
+        entries = expected_entries or capacity
+        width = 16
+        while width < 4 * entries:
+            width *= 2
+        self.sketch = CountMinSketch(width=width, sample_size=10 * entries)
+
+    def record(self, key):
+        self.sketch.increment(key)
+
+    def access(self, key):
+        if key in self.window:
+            self.window.move_to_end(key)
+        elif key in self.protected:
+            self.protected.move_to_end(key)
+        elif key in self.probation:
+            # Second hit while in main: promote to protected
+            weight = self.probation.pop(key)
+            self.probation_total -= weight
+            self.protected[key] = weight
+            self.protected_total += weight
+            while self.protected_total > self.protected_capacity and len(self.protected) > 1:
+                demoted, w = self.protected.popitem(last=False)
+                self.protected_total -= w
+                self.probation[demoted] = w
+                self.probation_total += w
+
+    def insert(self, key, weight):
+        self.window[key] = weight
+        self.window_total += weight
+        self.total += weight
+        evicted, rejected = [], []
+        while self.window_total > self.window_capacity and self.window:
+            candidate, w = self.window.popitem(last=False)
+            self.window_total -= w
+            self.probation[candidate] = w
+            self.probation_total += w
+            if not self._admit(candidate, evicted):
+                rejected.append(candidate)
+        return evicted, rejected
+
+    def _admit(self, candidate, evicted):
+        """
+        Make room in main for candidate (already in probation), appending
+        displaced keys to evicted. Returns False if candidate was rejected.
+        """
+        while self.total > self.capacity:
+            victim = next((k for k in self.probation if k != candidate), None)
+            if victim is None:
+                victim = next(iter(self.protected), None)
+            if victim is None:
+                break
+            if self.sketch.estimate(candidate) > self.sketch.estimate(victim):
+                self.remove(victim)
+                evicted.append(victim)
+            else:
+                self.remove(candidate)
+                return False
+        return True
+
+    def remove(self, key):
+        if key in self.window:
+            weight = self.window.pop(key)
+            self.window_total -= weight
+        elif key in self.probation:
+            weight = self.probation.pop(key)
+            self.probation_total -= weight
+        else:
+            weight = self.protected.pop(key)
+            self.protected_total -= weight
+        self.total -= weight
+
+    def evict_one(self):
+        for entries in (self.probation, self.window, self.protected):
+            if entries:
+                key = next(iter(entries))
+                self.remove(key)
+                return key
+        raise KeyError("evict_one from an empty policy")
+
+
+POLICIES = {
+    LRUPolicy.name: LRUPolicy,
+    WTinyLFUPolicy.name: WTinyLFUPolicy,
+}
@@ -0,0 +1,161 @@
+import numpy as np
+
+
+def average_path_length(n):
+    """
+    c(n): average path length of an unsuccessful BST search in a tree
+    built from n samples (Liu et al., 2008), the normalisation constant
+    of the Isolation Forest score.
+    """
+    n = np.asarray(n, dtype=float)
+    c = np.where(n == 2, 1.0, 0.0)
+    big = n > 2
+    nb = n[big]
+    c[big] = 2.0 * (np.log(nb - 1.0) + np.euler_gamma) - 2.0 * (nb - 1.0) / nb
+    return c
+
+
+class CompiledForest:
+    """
+    A trained IsolationForest flattened into NumPy arrays for fast scoring.
+
+    Every node of every tree is stored in one set of parallel arrays:
+        feature[k], threshold[k]   split test X[feature] <= threshold
+        left[k], right[k]          children (leaves point to themselves)
+        value[k]                   at leaves, depth + c(n_node_samples)
+    Tree features are mapped through estimators_features_ to input columns,
+    so X needs no per-tree column subsetting.
+
+    Scoring walks all trees at once: one fancy-indexing step per level,
+    max_depth steps in total. Leaves loop back to themselves, so paths
+    that end early just stay put. Because nothing goes through sklearn's
+    input validation or joblib dispatch, a single point scores two orders of
+    magnitude or more faster than IsolationForest.predict(). Results
+    match sklearn: X is cast to float32 and compared against the float64
+    thresholds, as sklearn's trees do.
+
+        score_samples(x) = -2^(-mean_t value_t(x) / c(max_samples_))
+        decision(x)      = score_samples(x) - offset_
+        predict(x)       = 1 if decision(x) >= 0 else -1
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots,
+                 max_depth, max_samples, offset):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_trees = len(roots)
+        self.offset = offset
+        self.max_samples = max_samples
+        self.denominator = self.n_trees * float(average_path_length([max_samples])[0])
+
+    @classmethod
+    def from_isolation_forest(cls, model):
+        """Export a fitted sklearn IsolationForest."""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        base = 0
+        max_depth = 0
+        for est, est_features in zip(model.estimators_, model.estimators_features_):
+            tree = est.tree_
+            n = tree.node_count
+            left = tree.children_left.astype(np.intp)
+            right = tree.children_right.astype(np.intp)
+            is_leaf = left == -1
+
+            depth = np.zeros(n, dtype=np.intp)
+            for k in range(n):          # children always follow their parent
+                if not is_leaf[k]:
+                    depth[left[k]] = depth[k] + 1
+                    depth[right[k]] = depth[k] + 1
+            max_depth = max(max_depth, int(depth.max()))
+
+            own = np.arange(n, dtype=np.intp)
+            left = np.where(is_leaf, own, left) + base
+            right = np.where(is_leaf, own, right) + base
+            feature = np.where(is_leaf, 0,
+                               np.asarray(est_features)[np.maximum(tree.feature, 0)])
+            value = np.where(is_leaf,
+                             depth + average_path_length(tree.n_node_samples), 0.0)
+
+            features.append(feature.astype(np.intp))
+            thresholds.append(tree.threshold.astype(np.float64))
+            lefts.append(left)
+            rights.append(right)
+            values.append(value)
+            roots.append(base)
+            base += n
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            max_samples=model.max_samples_,
+            offset=float(model.offset_),
+        )
+
+    _ARRAYS = ('feature', 'threshold', 'left', 'right', 'value', 'roots')
+
+    def state(self):
+        """(arrays, scalars) sufficient to rebuild the forest."""
+        arrays = {name: getattr(self, name) for name in self._ARRAYS}
+        scalars = {'max_depth': self.max_depth,
+                   'max_samples': int(self.max_samples),
+                   'offset': self.offset}
+        return arrays, scalars
+
+    @classmethod
+    def from_state(cls, arrays, scalars):
+        kwargs = {name: arrays[name] for name in cls._ARRAYS}
+        return cls(**kwargs, **scalars)
+
+    # ------------------------------------------------------------------
+    # Scoring
+    # ------------------------------------------------------------------
+    def _leaves(self, X):
+        """Leaf node index per (sample, tree)."""
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.n_trees))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def score_samples(self, X):
+        """Same as IsolationForest.score_samples (higher is more normal)."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        depths = self.value[self._leaves(X)].sum(axis=1)
+        if self.denominator == 0:
+            # single training sample: sklearn defines the score as 2^-1
+            return np.full(X.shape[0], -0.5)
+        return -(2.0 ** (-depths / self.denominator))
+
+    def decision_function(self, X):
+        return self.score_samples(X) - self.offset
+
+    def predict(self, X):
+        """1 for inliers, -1 for anomalies, as IsolationForest.predict."""
+        return np.where(self.decision_function(X) < 0, -1, 1)
+
+    def predict_one(self, x):
+        """Fast path for one feature vector; returns 1 or -1."""
+        x = np.asarray(x, dtype=np.float32).ravel()
+        nodes = self.roots
+        for _ in range(self.max_depth):
+            go_left = x[self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        depth = self.value[nodes].sum()
+        if self.denominator == 0:
+            score = -0.5
+        else:
+            score = -(2.0 ** (-depth / self.denominator))
+        return 1 if score - self.offset >= 0 else -1
@@ -47,7 +47,8 @@ def generate_layout():
     )
     layout["right"].split(
         Layout(name="region_stats", size=15),
-        Layout(name="compression_stats")
+        Layout(name="compression_stats"),
+        Layout(name="cache_stats")
     )
     return layout
 
@@ -147,6 +148,30 @@ def run_dashboard():
                     Panel(comp_table, title="Compression Statistics", border_style="magenta")
                 )
                 
+                # Cache Stats Panel
+                cache_table = Table(box=box.ROUNDED)
+                cache_table.add_column("Metric")
+                cache_table.add_column("Value")
+                
+                cache_stats = shared_data.get('cache_stats', {})
+                if cache_stats:
+                    lookups = cache_stats['hits'] + cache_stats['misses']
+                    cache_table.add_row("Hit ratio", f"{cache_stats['hit_ratio']:.1%} "
+                                        f"({cache_stats['hits']}/{lookups})")
+                    cache_table.add_row("Entries / Size", f"{cache_stats['entries']} / "
+                                        f"{cache_stats['bytes']/1024:.1f} KB")
+                    causes = cache_stats['evictions_by_cause']
+                    cache_table.add_row("Removed", ", ".join(f"{c}={n}" for c, n in causes.items()))
+                    get_latency = cache_stats['get_latency']
+                    cache_table.add_row("get p50 / p95", f"{get_latency['p50_us']:.0f} / "
+                                        f"{get_latency['p95_us']:.0f} us")
+                    for prefix, p in cache_stats['prefixes'].items():
+                        cache_table.add_row(f"  {prefix or '(none)'}", f"{p['hit_ratio']:.1%}")
+                
+                layout["right"]["cache_stats"].update(
+                    Panel(cache_table, title="Cache Statistics", border_style="cyan")
+                )
+                
                 # Update footer
                 layout["footer"].update(
                     Panel("Press Ctrl+C to exit", style="dim")
@@ -0,0 +1,110 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from anomaly_detector import AnomalyDetector
+
+
+class DetectorRegistry:
+    """
+    One AnomalyDetector per key (region, device class, ...).
+
+    Each region learns its own distribution in its own training window
+    and lock, so region threads no longer share a buffer or contend with
+    each other. Isolation Forest retraining is dispatched to a shared
+    ProcessPoolExecutor (train_compiled_forest); workers send back only
+    the CompiledForest arrays, so training scales across cores with the
+    number of regions while scoring stays in-process.
+
+    The pool uses the 'spawn' start method by default: forking a process
+    that is running ingest threads can copy locks in a held state.
+    """
+
+    def __init__(self, keys=(), max_workers=None, checkpoint_dir=None,
+                 mp_context='spawn', **detector_kwargs):
+        """
+        Parameters
+        ----------
+        keys : iterable of str
+            Keys to create detectors for up front; others are created on
+            first use.
+        max_workers : int, optional
+            Training processes (default: number of CPUs).
+        checkpoint_dir : str, optional
+            Each detector checkpoints to <checkpoint_dir>/<key>.npz.
+        mp_context : str
+            multiprocessing start method for the training pool.
+        **detector_kwargs
+            Passed to every AnomalyDetector.
+        """
+        self.detector_kwargs = detector_kwargs
+        self.checkpoint_dir = checkpoint_dir
+        self.executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context(mp_context),
+        )
+        self.lock = threading.Lock()
+        self.detectors = {}
+        for key in keys:
+            self.get(key)
+
+    def checkpoint_path(self, key):
+        if self.checkpoint_dir is None:
+            return None
+        return os.path.join(self.checkpoint_dir, f"{key}.npz")
+
+    def get(self, key):
+        """Detector for key, created on first use."""
+        detector = self.detectors.get(key)
+        if detector is not None:
+            return detector
+        with self.lock:
+            if key not in self.detectors:
+                self.detectors[key] = AnomalyDetector(
+                    checkpoint_path=self.checkpoint_path(key),
+                    executor=self.executor,
+                    **self.detector_kwargs
+                )
+            return self.detectors[key]
+
+    def predict(self, key, data_point):
+        return self.get(key).predict(data_point)
+
+    def predict_batch(self, key, data_points):
+        return self.get(key).predict_batch(data_points)
+
+    def score(self, key, data_point):
+        return self.get(key).score(data_point)
+
+    def update(self, key, data_point):
+        self.get(key).update(data_point)
+
+    def warm_start(self):
+        """Load every detector's checkpoint that exists; returns the loaded keys."""
+        loaded = []
+        for key, detector in list(self.detectors.items()):
+            path = self.checkpoint_path(key)
+            if path is None or not os.path.exists(path):
+                continue
+            try:
+                detector.load(path)
+                loaded.append(key)
+            except (ValueError, OSError, KeyError) as e:
+                print(f"Ignoring saved anomaly model for {key}: {e}")
+        return loaded
+
+    def stats(self):
+        return {
+            key: {
+                'samples': len(d.data_buffer),
+                'updates': d.n_updates,
+                'retrains': d.retrain_count,
+                'trained': d.trained,
+            }
+            for key, d in self.detectors.items()
+        }
+
+    def shutdown(self):
+        """Stop the training pool, waiting for running jobs."""
+        self.executor.shutdown(wait=True)
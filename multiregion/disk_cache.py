@@ -0,0 +1,307 @@
+import marshal
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+# Record header: key length, value length, expires_at, crc32 of key+value.
+# A value length of TOMBSTONE marks the key as deleted.
+_HEADER = struct.Struct('<IIdI')
+TOMBSTONE = 0xFFFFFFFF
+
+
+class DiskCache:
+    """
+    Second cache tier: decoded records in a memory-mapped, append-only file.
+
+    Values are encoded with marshal (dicts, lists, str, numbers) and
+    appended to a file of fixed size max_bytes. marshal is not safe
+    against crafted input, so the file is created with mode 0600 and must
+    only ever be written by this class. An in-memory dict maps each key to the
+    offset of its latest record, so a lookup is one dict probe plus one
+    mmap slice and marshal.loads, with no decryption or decompression.
+    Every record carries a crc32, and the index is rebuilt by scanning
+    the file on open, so the tier survives restarts and a torn last
+    record is ignored.
+
+    When the file is full, live records are compacted to the start of a
+    new file, oldest dropped first until at most half the space is used,
+    so each compaction pays for itself with at least max_bytes / 2 of
+    appends (amortised O(1) per put()). The new file is written and
+    fsynced beside the old one and then renamed over it, so a crash
+    during compaction leaves either the old file or the new one, never a
+    mix that brings back overwritten values or discarded keys.
+
+    After close() every method is a no-op (get() misses, put() stores
+    nothing), so threads still using the cache during shutdown do not
+    touch the unmapped file.
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024):
+        """
+        Parameters
+        ----------
+        path : str
+            Cache file; created (and its directory) if missing.
+        max_bytes : int
+            File size; also the tier's capacity.
+        """
+        if max_bytes < 4096:
+            raise ValueError("max_bytes must be >= 4096")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.index = {}                  # key -> (offset, expires_at)
+        self.end = 0                     # append position
+        self.live_bytes = 0
+        self.compactions = 0
+        self.closed = False
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._open()
+
+    # ------------------------------------------------------------------
+    # File handling
+    # ------------------------------------------------------------------
+    def _open(self):
+        # Left behind by a compaction interrupted before its rename
+        try:
+            os.unlink(self.path + '.compact')
+        except FileNotFoundError:
+            pass
+        self.mm = self._map()
+        self._scan()
+
+    def _map(self):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size != self.max_bytes:
+                os.ftruncate(fd, self.max_bytes)
+            return mmap.mmap(fd, self.max_bytes)
+        finally:
+            os.close(fd)
+
+    def _scan(self):
+        """Rebuild the index from the records in the file."""
+        self.index.clear()
+        self.live_bytes = 0
+        sizes = {}
+        offset = 0
+        while offset + _HEADER.size <= self.max_bytes:
+            key_len, value_len, expires_at, crc = _HEADER.unpack_from(self.mm, offset)
+            if key_len == 0:
+                break                    # zero-filled tail
+            body_len = key_len + (0 if value_len == TOMBSTONE else value_len)
+            end = offset + _HEADER.size + body_len
+            if end > self.max_bytes:
+                break
+            body = self.mm[offset + _HEADER.size:end]
+            if zlib.crc32(body) != crc:
+                break                    # torn write
+            try:
+                key = marshal.loads(body[:key_len])
+            except (ValueError, EOFError, TypeError):
+                break
+            if value_len == TOMBSTONE:
+                self.index.pop(key, None)
+                sizes.pop(key, None)
+            else:
+                self.index[key] = (offset, expires_at)
+                sizes[key] = end - offset
+            offset = end
+        self.end = offset
+        self.live_bytes = sum(sizes.values())
+        # Clear anything after the last valid record
+        if self.end < self.max_bytes:
+            self.mm[self.end:self.end + _HEADER.size] = bytes(
+                min(_HEADER.size, self.max_bytes - self.end))
+
+    def _sync_dir(self):
+        """Persist the rename of the cache file (no-op where unsupported)."""
+        if not hasattr(os, 'O_DIRECTORY'):
+            return
+        fd = os.open(os.path.dirname(os.path.abspath(self.path)),
+                     os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _record(key_bytes, value_bytes, expires_at):
+        if value_bytes is None:
+            body = key_bytes
+            value_len = TOMBSTONE
+        else:
+            body = key_bytes + value_bytes
+            value_len = len(value_bytes)
+        return _HEADER.pack(len(key_bytes), value_len, expires_at,
+                            zlib.crc32(body)) + body
+
+    def _append(self, record):
+        """
+        Write record at the end, compacting first if needed; returns its
+        offset, or None for a record over half the file, which no
+        compaction could make room for without dropping everything else.
+        """
+        if len(record) + _HEADER.size > self.max_bytes // 2:
+            return None
+        if self.end + len(record) + _HEADER.size > self.max_bytes:
+            self._compact(self.max_bytes // 2 - len(record))
+            if self.end + len(record) + _HEADER.size > self.max_bytes:
+                return None
+        offset = self.end
+        self.mm[offset:offset + len(record)] = record
+        self.end += len(record)
+        # Keep a zero header after the last record so _scan() stops there
+        self.mm[self.end:self.end + _HEADER.size] = bytes(_HEADER.size)
+        return offset
+
+    def _compact(self, budget):
+        """
+        Write live, unexpired records (newest kept first, within budget
+        bytes) to a new file, then atomically replace the cache file.
+        """
+        now = time.time()
+        live = sorted(((offset, key) for key, (offset, expires_at) in self.index.items()
+                       if expires_at > now), reverse=True)
+        records = []
+        used = 0
+        for offset, key in live:
+            key_len, value_len, _, _ = _HEADER.unpack_from(self.mm, offset)
+            length = _HEADER.size + key_len + value_len
+            if used + length > budget:
+                break
+            records.append((key, self.mm[offset:offset + length]))
+            used += length
+        records.reverse()
+
+        tmp_path = self.path + '.compact'
+        fd = os.open(tmp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for _, record in records:
+                    f.write(record)
+                f.truncate(self.max_bytes)
+                f.flush()
+                os.fsync(f.fileno())
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.mm.close()
+        try:
+            os.replace(tmp_path, self.path)
+        finally:
+            # On failure this maps the old file again, which the index
+            # still describes
+            self.mm = self._map()
+        self._sync_dir()
+
+        self.index.clear()
+        offset = 0
+        for key, record in records:
+            expires_at = _HEADER.unpack_from(record)[2]
+            self.index[key] = (offset, expires_at)
+            offset += len(record)
+        self.end = offset
+        self.live_bytes = used
+        self.compactions += 1
+
+    # ------------------------------------------------------------------
+    # Cache API
+    # ------------------------------------------------------------------
+    def put(self, key, value, expires_at):
+        """
+        Store value until expires_at; returns False (and stores nothing,
+        leaving any earlier value for key in place) if the key or value
+        cannot be marshalled or does not fit.
+        """
+        try:
+            key_bytes = marshal.dumps(key)
+            value_bytes = marshal.dumps(value)
+        except ValueError:
+            return False
+        record = self._record(key_bytes, value_bytes, expires_at)
+        with self.lock:
+            if self.closed:
+                return False
+            offset = self._append(record)
+            if offset is None:
+                # No room: the previous value, if any, stays current
+                return False
+            # Looked up after _append(): a compaction rewrites offsets
+            old = self.index.get(key)
+            if old is not None:
+                self.live_bytes -= self._length(old[0])
+            self.index[key] = (offset, expires_at)
+            self.live_bytes += len(record)
+        return True
+
+    def get(self, key):
+        """(value, expires_at) for a live key, else None."""
+        with self.lock:
+            entry = None if self.closed else self.index.get(key)
+            if entry is None:
+                return None
+            offset, expires_at = entry
+            if expires_at <= time.time():
+                return None
+            key_len, value_len, _, _ = _HEADER.unpack_from(self.mm, offset)
+            start = offset + _HEADER.size + key_len
+            raw = self.mm[start:start + value_len]
+        return marshal.loads(raw), expires_at
+
+    def expires_at(self, key):
+        entry = self.index.get(key)
+        return None if entry is None else entry[1]
+
+    def discard(self, key):
+        """Delete key, writing a tombstone so it stays deleted after a restart."""
+        with self.lock:
+            old = None if self.closed else self.index.pop(key, None)
+            if old is None:
+                return
+            self.live_bytes -= self._length(old[0])
+            self._append(self._record(marshal.dumps(key), None, 0.0))
+
+    def _length(self, offset):
+        key_len, value_len, _, _ = _HEADER.unpack_from(self.mm, offset)
+        return _HEADER.size + key_len + value_len
+
+    def clear(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.index.clear()
+            self.mm[:self.end] = bytes(self.end)
+            self.end = 0
+            self.live_bytes = 0
+
+    def flush(self):
+        with self.lock:
+            if not self.closed:
+                self.mm.flush()
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.mm.flush()
+            self.mm.close()
+
+    def stats(self):
+        return {
+            'entries': len(self.index),
+            'live_bytes': self.live_bytes,
+            'file_bytes': self.end,
+            'max_bytes': self.max_bytes,
+            'compactions': self.compactions,
+        }
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, key):
+        return key in self.index
@@ -6,9 +6,11 @@ import time
 import pandas as pd
 from datetime import datetime
 from load_balancer import LoadBalancer
+from link_estimator import LinkEstimator
 from compression_manager import CompressionManager, CompressionType
-from anomaly_detector import AnomalyDetector
+from detector_registry import DetectorRegistry
 from smart_cache import SmartCache
+from disk_cache import DiskCache
 from encryption_manager import EncryptionManager
 from version_control import DataVersionControl
 from health_monitor import HealthMonitor
@@ -20,34 +22,84 @@ regions = ['region_1', 'region_2', 'region_3']
 replicated_directories = {region: f"{region}_replicated_storage" for region in regions}
 cloud_directories = {region: f"{region}_cloud_storage" for region in regions}
 
-# Ensure directories exist
-for directory in cloud_directories.values():
-    os.makedirs(directory, exist_ok=True)
-for directory in replicated_directories.values():
-    os.makedirs(directory, exist_ok=True)
-
-# Load balancer — alpha=0.7, load_threshold=1000 bytes (operationalises 80% policy)
-load_balancer = LoadBalancer(regions, alpha=0.7, load_threshold=1000)
-
-# Compression manager — tau=0.5 efficiency threshold
-compression_manager = CompressionManager(CompressionType.ZLIB, tau=0.5)
-
-# Anomaly detector — contamination=0.1, delta=0.5, random_state=42
-anomaly_detector = AnomalyDetector(contamination=0.1, delta=0.5, random_state=42)
-
-# Smart cache
-smart_cache = SmartCache(max_size=20, ttl=300)
-
-# Encryption manager (AES-256-GCM)
-encryption_manager = EncryptionManager()
-
-# Version control (SQLite-backed)
-version_control = DataVersionControl(os.path.dirname(os.path.abspath(__file__)))
-
-# Health monitor
-health_monitor = HealthMonitor(check_interval=5)
-health_monitor.update_threshold('disk_percent', 85.0)
-health_monitor.update_threshold('cpu_percent', 75.0)
+# Anomaly detector checkpoints and the SmartCache disk tier / trace
+ANOMALY_MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 '.models')
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+
+# Shared services, built by init_services() from main(). Nothing stateful
+# is created at import time: the anomaly training pool uses the 'spawn'
+# start method, which re-imports this module as __mp_main__ in every
+# worker, and each worker would otherwise start its own pool, writer
+# thread and SQLite connection and reopen the parent's mmap cache file.
+load_balancer = None
+compression_manager = None
+anomaly_registry = None
+smart_cache = None
+encryption_manager = None
+version_control = None
+health_monitor = None
+
+# Set on shutdown; the edge and replication loops exit at their next check
+stop_event = threading.Event()
+
+
+def init_services():
+    """Create the output directories and build the shared services."""
+    global load_balancer, compression_manager, anomaly_registry
+    global smart_cache, encryption_manager, version_control, health_monitor
+
+    # Ensure directories exist
+    for directory in cloud_directories.values():
+        os.makedirs(directory, exist_ok=True)
+    for directory in replicated_directories.values():
+        os.makedirs(directory, exist_ok=True)
+
+    # Load balancer — alpha=0.7, load_threshold=1000 bytes (operationalises 80% policy)
+    # service_rate=45 B/s: ~1.2x the mean ingest (~38 B/s), so bursts still redirect.
+    # Redirect targets are chosen by expected completion time using RTT and
+    # bandwidth learned online from observed WAN transfers.
+    load_balancer = LoadBalancer(regions, alpha=0.7, load_threshold=1000,
+                                 service_rate=45, link_estimator=LinkEstimator())
+
+    # Compression manager — tau=0.5 efficiency threshold
+    compression_manager = CompressionManager(CompressionType.ZLIB, tau=0.5)
+
+    # Anomaly detectors — one per region, contamination=0.1, delta=0.5,
+    # random_state=42. Retraining runs in a process pool; each model is
+    # checkpointed after every retrain and reloaded at startup (main()), so
+    # detection is live immediately after a restart.
+    anomaly_registry = DetectorRegistry(regions, checkpoint_dir=ANOMALY_MODEL_DIR,
+                                        contamination=0.1, delta=0.5,
+                                        random_state=42, retrain_every=20,
+                                        drift_threshold=3.0)
+    # Each region thread scores its own summary directly (one compiled
+    # forest per region, so a cross-region BatchScorer would only add its
+    # collection wait; see batch_scorer.py).
+
+    # Smart cache — byte budget rather than item count: a decoded record
+    # ranges from ~100 B (summary) to megabytes (anomaly with raw readings).
+    # Entries evicted from memory fall back to a memory-mapped disk tier of
+    # decoded records, so re-reading them skips decrypt + decompress.
+    # The last 100k operations are kept and written to .cache/trace.csv on
+    # shutdown for benchmark/cache_trace_simulator.py. One shard: a few
+    # threads at ~1 op/s do not contend, and shards split the byte budget.
+    smart_cache = SmartCache(max_size=None, ttl=300, max_bytes=8 * 1024 * 1024,
+                             disk_cache=DiskCache(os.path.join(CACHE_DIR, 'records.bin'),
+                                                  max_bytes=64 * 1024 * 1024),
+                             trace_size=100000)
+
+    # Encryption manager (AES-256-GCM)
+    encryption_manager = EncryptionManager()
+
+    # Version control (SQLite-backed)
+    version_control = DataVersionControl(os.path.dirname(os.path.abspath(__file__)))
+
+    # Health monitor
+    health_monitor = HealthMonitor(check_interval=5)
+    health_monitor.update_threshold('disk_percent', 85.0)
+    health_monitor.update_threshold('cpu_percent', 75.0)
+    health_monitor.add_source('cache', smart_cache.health_metrics)
 
 
 # ------------------------------------------------------------------
@@ -56,13 +108,25 @@ health_monitor.update_threshold('cpu_percent', 75.0)
 # Transmission delay modelled from 4G average upload (10 Mbps).
 # Source: documented 4G/LTE backhaul characteristics.
 # ------------------------------------------------------------------
-def simulate_network_latency(data_size_bytes=0, connection_type="4G"):
+
+# Mean one-way WAN base latency (seconds) between region pairs. Regions are
+# unevenly distant, so redirect cost depends on the target.
+INTER_REGION_BASE_LATENCY = {
+    frozenset(('region_1', 'region_2')): 0.020,
+    frozenset(('region_2', 'region_3')): 0.060,
+    frozenset(('region_1', 'region_3')): 0.120,
+}
+
+
+def simulate_network_latency(data_size_bytes=0, connection_type="4G",
+                             base_mean=0.050):
     """
     Simulate network transmission time using empirically documented
     4G/LTE parameters rather than hardcoded constants.
+    base_mean overrides the mean base latency (e.g. per region pair).
     """
-    # Base latency (ping) ~ N(50ms, 15ms)
-    base_latency = max(0.010, random.gauss(0.050, 0.015))
+    # Base latency (ping) ~ N(base_mean, 15ms), default N(50ms, 15ms)
+    base_latency = max(0.010, random.gauss(base_mean, 0.015))
 
     # Transmission delay based on connection type
     # 4G average upload: 10 Mbps (1.25 MB/s)
@@ -112,7 +176,7 @@ def edge_device(region):
     data_buffer = []
     aggregation_interval = 5  # seconds
 
-    while True:
+    while not stop_event.is_set():
         new_data = generate_sensor_data()
         data_buffer.append(new_data)
 
@@ -124,19 +188,22 @@ def edge_device(region):
             }
 
             features = [summary['temperature'], summary['humidity']]
-            prediction = anomaly_detector.predict(features)
-            anomaly_detector.update(features)
+            prediction = anomaly_registry.predict(region, features)
+            anomaly_registry.update(region, features)
 
             priority = determine_priority(summary, prediction)
             summary["priority"] = priority
 
             if priority == "high":
                 print(f"[{region}] WARNING: High priority / Anomaly detected!")
+                # Upload the raw readings behind the anomaly for analysis
+                # (LZMA path: ~1.1 MB of JSON compresses to ~520 B)
+                summary['raw_readings'] = list(data_buffer)
 
             save_to_cloud(region, summary)
             data_buffer.clear()
 
-        time.sleep(1)
+        stop_event.wait(1)
 
 
 class DateTimeEncoder(json.JSONEncoder):
@@ -179,13 +246,19 @@ def save_to_cloud(region, data):
     # Implements Algorithm 2: arg min selection + hysteresis check (Eq. 3)
     # L_i(t) is updated POST-compression (closed feedback loop, Section 2.4)
     # ------------------------------------------------------------------
-    target_region = load_balancer.get_target_region(region)
+    target_region = load_balancer.get_target_region(region, data_size)
 
     if target_region != region:
         print(f"Load redirect: {region} -> {target_region} "
-              f"(load {load_balancer.region_loads[region]} > threshold, "
+              f"(load {load_balancer.get_load(region):.0f} > threshold, "
               f"hysteresis check passed)")
-        simulate_network_latency(data_size, "WAN")
+        wan_latency = simulate_network_latency(
+            data_size, "WAN",
+            INTER_REGION_BASE_LATENCY[frozenset((region, target_region))]
+        )
+        # Feed the observed transfer back into the RTT/bandwidth model
+        load_balancer.observe_transfer(region, target_region, data_size,
+                                       wan_latency)
 
     file_name = f"aggregated_data_{datetime.now().strftime('%Y%m%d%H%M%S%f')}.json.gz"
     file_path = os.path.join(cloud_directories[target_region], file_name)
@@ -206,32 +279,43 @@ def save_to_cloud(region, data):
     }
     version_control.save_version(file_path, data, metadata)
 
+    loads = {r: round(l) for r, l in load_balancer.get_loads().items()}
     print(f"[{target_region}] Saved. Algo={algorithm_used.value} "
           f"eta={eta:.2f} | Latency={upload_latency*1000:.1f}ms "
-          f"| Loads={load_balancer.region_loads}")
+          f"| Loads={loads}")
 
     # Update L_i(t) AFTER compression (closed feedback loop)
     load_balancer.update_load(target_region, data_size)
-    smart_cache.set(file_path, data)
+    # Cache what a reader decodes from the file (timestamps as strings), so
+    # hits match misses and the disk tier can marshal the entry
+    smart_cache.set(file_path, json.loads(json_data))
 
 
 def replicate_data(source_region, target_region):
     source_dir = cloud_directories[source_region]
     target_dir = replicated_directories[target_region]
 
-    while True:
+    while not stop_event.is_set():
         try:
             files = sorted(
                 os.listdir(source_dir),
                 key=lambda x: os.path.getmtime(os.path.join(source_dir, x))
             )
             for file_name in files:
+                if stop_event.is_set():
+                    return
                 source_file = os.path.join(source_dir, file_name)
                 target_file = os.path.join(target_dir, file_name)
 
                 if not os.path.exists(target_file):
                     file_size = os.path.getsize(source_file)
-                    latency = simulate_network_latency(file_size, "WAN")
+                    latency = simulate_network_latency(
+                        file_size, "WAN",
+                        INTER_REGION_BASE_LATENCY[
+                            frozenset((source_region, target_region))]
+                    )
+                    load_balancer.observe_transfer(source_region, target_region,
+                                                   file_size, latency)
                     data = read_compressed_data(source_file)
                     if data:
                         with open(target_file, 'w') as tgt:
@@ -240,53 +324,61 @@ def replicate_data(source_region, target_region):
                               f"({latency*1000:.1f}ms delay)")
         except Exception as e:
             print(f"Replication error: {e}")
-        time.sleep(5)
+        stop_event.wait(5)
+
+
+def _load_compressed_data(file_path):
+    with open(file_path, 'rb') as f:
+        encrypted_data = f.read()
+    decrypted_data = encryption_manager.decrypt(encrypted_data)
+    if decrypted_data is None:
+        raise Exception("Failed to decrypt")
+    json_data = compression_manager.decompress(decrypted_data)
+    if not json_data:
+        raise Exception("Failed to decompress")
+    return json.loads(json_data.decode('utf-8'))
 
 
 def read_compressed_data(file_path):
-    cached_data = smart_cache.get(file_path)
-    if cached_data is not None:
-        return cached_data
+    # Single-flight: concurrent replicators missing on one file share a
+    # single read/decrypt/decompress; failures are negatively cached.
     try:
-        with open(file_path, 'rb') as f:
-            encrypted_data = f.read()
-            decrypted_data = encryption_manager.decrypt(encrypted_data)
-            if decrypted_data is None:
-                raise Exception("Failed to decrypt")
-            json_data = compression_manager.decompress(decrypted_data)
-            if json_data:
-                data = json.loads(json_data.decode('utf-8'))
-                smart_cache.set(file_path, data)
-                return data
+        return smart_cache.get_or_load(file_path, _load_compressed_data)
     except Exception:
-        pass
-    return None
+        return None
 
 
 def main():
+    init_services()
+    producers = []
+    dashboard_process = None
     try:
         health_monitor.start()
         print("--- S-Edge Framework Started (Parameter-Driven Simulation Mode) ---")
         print("Initializing SQLite Storage Engine...")
         print("Initializing 4G/LTE Network Simulation (mu=50ms, sigma=15ms)...")
         print(f"Load Balancer: alpha={load_balancer.alpha}, "
-              f"L_thresh={load_balancer.load_threshold} bytes")
+              f"L_thresh={load_balancer.load_threshold} bytes, "
+              f"service_rate={load_balancer.service_rates[regions[0]]} B/s")
         print(f"Compression Manager: tau={compression_manager.tau}")
-        print(f"Anomaly Detector: contamination={anomaly_detector.contamination}, "
-              f"delta={anomaly_detector.delta}")
-
-        dashboard = MonitoringDashboard(health_monitor, load_balancer, compression_manager)
+        print(f"Anomaly Detectors: one per region, "
+              f"contamination={anomaly_registry.detector_kwargs['contamination']}, "
+              f"delta={anomaly_registry.detector_kwargs['delta']}")
+        warm = anomaly_registry.warm_start()
+        if warm:
+            print(f"Anomaly models warm-started for: {', '.join(warm)}")
+
+        dashboard = MonitoringDashboard(health_monitor, load_balancer, compression_manager,
+                                        cache=smart_cache)
         dashboard_process = dashboard.start()
 
-        edge_threads = []
         for region in regions:
             thread = threading.Thread(
                 target=edge_device, args=(region,), daemon=True
             )
             thread.start()
-            edge_threads.append(thread)
+            producers.append(thread)
 
-        replication_threads = []
         for i, source_region in enumerate(regions):
             target_region = regions[(i + 1) % len(regions)]
             thread = threading.Thread(
@@ -295,21 +387,32 @@ def main():
                 daemon=True
             )
             thread.start()
-            replication_threads.append(thread)
+            producers.append(thread)
 
         while True:
             time.sleep(1)
 
     except KeyboardInterrupt:
         print("\nStopping S-Edge Framework...")
-        health_monitor.stop()
-        if dashboard_process:
-            dashboard_process.terminate()
-        print("System Halted.")
 
     except Exception as e:
         print(f"\nCritical Error: {str(e)}")
+
+    finally:
+        # Stop the producers before closing the services they write to
+        stop_event.set()
+        for thread in producers:
+            thread.join()
         health_monitor.stop()
+        anomaly_registry.shutdown()
+        smart_cache.stop()
+        version_control.close()
+        traced = smart_cache.dump_trace(os.path.join(CACHE_DIR, 'trace.csv'))
+        print(f"Cache: {smart_cache.stats()['hit_ratio']:.1%} hit ratio, "
+              f"{traced} operations traced to {CACHE_DIR}")
+        if dashboard_process:
+            dashboard_process.terminate()
+        print("System Halted.")
 
 
 if __name__ == "__main__":
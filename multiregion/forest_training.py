@@ -0,0 +1,19 @@
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+from compiled_forest import CompiledForest
+
+
+def train_compiled_forest(X, contamination, random_state):
+    """
+    Fit an IsolationForest and return its CompiledForest state.
+
+    Runs in the DetectorRegistry process pool. It lives in its own module,
+    which imports nothing with side effects, so a spawn worker unpickling
+    this job loads only numpy, sklearn and compiled_forest; only the
+    compact arrays travel back to the parent.
+    """
+    model = IsolationForest(contamination=contamination,
+                            random_state=random_state)
+    model.fit(np.asarray(X, dtype=float))
+    return CompiledForest.from_isolation_forest(model).state()
@@ -29,6 +29,13 @@ class HealthMonitor:
         # Add alert cooldown to prevent spam
         self.last_alert_time = defaultdict(float)
         self.alert_cooldown = 60  # seconds
+
+        # Component metric sources: name -> callable returning {metric: number}
+        self.sources = {}
+    
+    def add_source(self, name, collect):
+        """Also record collect()'s metrics each interval, as '<name>_<metric>'"""
+        self.sources[name] = collect
     
     def start(self):
         """Start health monitoring"""
@@ -68,6 +75,12 @@ class HealthMonitor:
             'network_connections': len(psutil.net_connections()),
             'thread_count': threading.active_count()
         }
+        for name, collect in list(self.sources.items()):
+            try:
+                for key, value in collect().items():
+                    metrics[f"{name}_{key}"] = value
+            except Exception as e:
+                print(f"Error collecting {name} metrics: {e}")
         
         with self.lock:
             for key, value in metrics.items():
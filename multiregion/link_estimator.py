@@ -0,0 +1,94 @@
+import threading
+
+
+class LinkEstimator:
+    """
+    Online RTT and bandwidth estimates for every (source, target) region
+    pair, learned from the transfer latencies the pipeline observes.
+
+    Each observation is one transfer of size x bytes that took y seconds.
+    The link model is y = RTT + x / B, so the estimator runs an
+    exponentially weighted least-squares fit of y on x per pair:
+        intercept -> RTT
+        slope     -> 1 / B
+    Sums are decayed by (1 - weight) per observation, so the estimate
+    tracks drift like an EWMA (weight=0.125 matches the TCP SRTT gain).
+    When the observed sizes are too similar to separate RTT from
+    bandwidth, the bandwidth prior is kept and only RTT is fitted.
+    """
+
+    def __init__(self, weight=0.125, prior_rtt_s=0.050,
+                 prior_bandwidth_bps=12.5 * 1024 * 1024):
+        """
+        Parameters
+        ----------
+        weight : float
+            EWMA gain in (0, 1] for new observations.
+        prior_rtt_s : float
+            RTT assumed for pairs with no observations (4G/LTE mean, 50 ms).
+        prior_bandwidth_bps : float
+            Bandwidth in bytes/s assumed until it can be fitted
+            (WAN inter-region: 100 Mbps).
+        """
+        self.weight = weight
+        self.prior_rtt_s = prior_rtt_s
+        self.prior_bandwidth_bps = prior_bandwidth_bps
+        self.lock = threading.Lock()
+        # (source, target) -> [w, sum_x, sum_y, sum_xx, sum_xy, n]
+        self._stats = {}
+
+    def observe(self, source, target, size_bytes, elapsed_s):
+        """Record one transfer of size_bytes that took elapsed_s seconds."""
+        x, y = float(size_bytes), float(elapsed_s)
+        keep = 1.0 - self.weight
+        with self.lock:
+            s = self._stats.get((source, target))
+            if s is None:
+                self._stats[(source, target)] = [1.0, x, y, x * x, x * y, 1]
+                return
+            s[0] = s[0] * keep + 1.0
+            s[1] = s[1] * keep + x
+            s[2] = s[2] * keep + y
+            s[3] = s[3] * keep + x * x
+            s[4] = s[4] * keep + x * y
+            s[5] += 1
+
+    def estimate(self, source, target):
+        """Return (rtt_s, bandwidth_bps) for the pair."""
+        with self.lock:
+            s = self._stats.get((source, target))
+            if s is None:
+                return self.prior_rtt_s, self.prior_bandwidth_bps
+            w, sx, sy, sxx, sxy, _ = s
+
+        mean_x, mean_y = sx / w, sy / w
+        var_x = sxx / w - mean_x * mean_x
+        bandwidth = self.prior_bandwidth_bps
+        # Require a spread of at least 1 KB in sizes before fitting a slope
+        if var_x > 1024.0 ** 2:
+            slope = (sxy / w - mean_x * mean_y) / var_x
+            if slope > 0:
+                bandwidth = 1.0 / slope
+        rtt = max(0.0, mean_y - mean_x / bandwidth)
+        return rtt, bandwidth
+
+    def transfer_time(self, source, target, size_bytes):
+        """Expected seconds to move size_bytes from source to target."""
+        if source == target:
+            return 0.0
+        rtt, bandwidth = self.estimate(source, target)
+        return rtt + size_bytes / bandwidth
+
+    def matrix(self):
+        """Snapshot {(source, target): {'rtt_ms', 'bandwidth_mbps', 'samples'}}."""
+        with self.lock:
+            pairs = {pair: s[5] for pair, s in self._stats.items()}
+        result = {}
+        for pair, samples in pairs.items():
+            rtt, bandwidth = self.estimate(*pair)
+            result[pair] = {
+                'rtt_ms': rtt * 1000,
+                'bandwidth_mbps': bandwidth * 8 / 1e6,
+                'samples': samples,
+            }
+        return result
@@ -2,6 +2,67 @@ import threading
 import time
 import random
 from collections import defaultdict
+from contextlib import contextmanager
+
+from routing_strategies import ThresholdHysteresisStrategy
+
+
+class InstrumentedLock:
+    """
+    Context-manager wrapper around a threading lock that records how often
+    it was acquired, how often the acquisition was contended, and the total
+    and worst-case time callers spent waiting for it.
+
+    An uncontended acquisition costs one non-blocking try; the timer only
+    runs when the lock is already held by another thread. Statistics are
+    updated while the lock is held, so they need no extra synchronisation.
+    """
+
+    def __init__(self, lock=None):
+        self._lock = lock if lock is not None else threading.Lock()
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_s = 0.0
+        self.max_wait_s = 0.0
+
+    def acquire(self):
+        if self._lock.acquire(blocking=False):
+            self.acquisitions += 1
+            return True
+        t0 = time.perf_counter()
+        self._lock.acquire()
+        wait = time.perf_counter() - t0
+        self.acquisitions += 1
+        self.contended += 1
+        self.wait_s += wait
+        if wait > self.max_wait_s:
+            self.max_wait_s = wait
+        return True
+
+    def release(self):
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+    def stats(self):
+        return {
+            'acquisitions': self.acquisitions,
+            'contended': self.contended,
+            'wait_ms': self.wait_s * 1000,
+            'max_wait_ms': self.max_wait_s * 1000,
+        }
+
+    def reset_stats(self):
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_s = 0.0
+        self.max_wait_s = 0.0
 
 
 class LoadBalancer:
@@ -19,9 +80,45 @@ class LoadBalancer:
       NOT as physical transfer of existing load. This matches Algorithm 2
       exactly: the load balancer returns a target region; the caller routes
       new packets there.
+    - Optional time-based load model: when a service rate or decay
+      half-life is configured, L_i(t) drains continuously with wall-clock
+      time. The drain is applied lazily from per-region timestamps whenever
+      a region's load is read or updated (O(1) per region), so no periodic
+      sweep over all regions is needed.
+    - Optional sharded state (sharded=True): each region's load is guarded
+      by its own lock plus a sequence counter. Readers take optimistic,
+      lock-free snapshots and retry only if a writer raced them. Routing
+      decisions run lock-free on those snapshots and only the counter
+      update (record_decision()) takes the global lock, so concurrent
+      redirects can pick the same r_opt from equally stale loads; the
+      alpha hysteresis bounds how far that overshoots. All locks record
+      their wait time (see lock_stats()).
+    - Optional latency-aware routing (link_estimator=LinkEstimator()): the
+      redirect target is the region with the lowest expected completion
+      time (queue drain + transfer + RTT) instead of the fewest bytes.
+      The threshold trigger is unchanged and the alpha hysteresis is
+      applied to queue drain times, so flapping protection is preserved.
+    - Heterogeneous regions: per-region capacities and thresholds. Routing
+      and hysteresis compare normalised utilisation u_i = L_i / c_i rather
+      than raw bytes, so a large site is not left idle while a small one
+      is flagged overloaded. With default capacities (all 1.0) u_i = L_i.
+    - Optional predictive routing (forecaster=...): the balancer records
+      arrivals per decision epoch and the threshold policy also triggers
+      when the forecast next-epoch load of the source would cross
+      L_thresh, redirecting before the violation happens.
+    - Pluggable routing policy (strategy=RoutingStrategy): the default is
+      ThresholdHysteresisStrategy (Algorithm 2). Power-of-d-choices and
+      bounded-load consistent hashing are available in routing_strategies.
     """
 
-    def __init__(self, regions, alpha=0.7, load_threshold=1000):
+    # Optimistic snapshot attempts before falling back to the shard locks
+    OPTIMISTIC_RETRIES = 8
+
+    def __init__(self, regions, alpha=0.7, load_threshold=1000,
+                 service_rate=None, decay_half_life=None,
+                 clock=time.monotonic, sharded=False, link_estimator=None,
+                 strategy=None, capacities=None, thresholds=None,
+                 forecaster=None):
         """
         Parameters
         ----------
@@ -34,16 +131,93 @@ class LoadBalancer:
         load_threshold : int
             Byte-level rebalancing trigger (L_thresh). Operationalises the
             80% capacity policy: redistribution fires before saturation.
+        service_rate : float or dict[str, float], optional
+            Bytes per second each region serves. A scalar applies to every
+            region; a dict sets per-region rates (missing regions drain at 0).
+            None (default) keeps L_i(t) cumulative, as in Section 6.2.
+        decay_half_life : float, optional
+            Half-life in seconds of an exponential (EWMA-style) decay applied
+            to L_i(t) after the linear drain. None disables decay.
+        clock : callable
+            Monotonic time source in seconds. Injectable so simulations can
+            advance time deterministically.
+        sharded : bool
+            Use per-region shard locks and optimistic reads instead of the
+            single global lock for every call. Routing decisions are the
+            same; only the synchronisation differs.
+        link_estimator : LinkEstimator, optional
+            Online per-(source, target) RTT/bandwidth model. When given,
+            redirect targets are chosen by expected completion time and
+            callers should report observed transfers via observe_transfer().
+            Requires a non-zero service_rate for every region: queue drain
+            time L_j / mu_j is undefined without one.
+        strategy : RoutingStrategy, optional
+            Routing policy used by get_target_region(). Defaults to
+            ThresholdHysteresisStrategy, the S-Edge policy.
+        capacities : dict[str, float], optional
+            Relative capacity c_i of each region (CPU/uplink), where 1.0 is
+            the reference site sized for load_threshold. Missing regions
+            default to 1.0.
+        thresholds : dict[str, float], optional
+            Per-region byte thresholds. Regions not listed use
+            load_threshold * c_i.
+        forecaster : EWMAArrivalForecaster or HoltForecaster, optional
+            Next-epoch load predictor (load_forecaster). Callers mark epoch
+            boundaries with end_epoch().
         """
         self.regions = regions
         self.region_loads = {region: 0 for region in regions}
+        # Running sum(L_i) under the global lock, so the mean is O(1).
+        # Sharded mode sums the per-shard loads on read instead.
+        self.total_load = 0
         self.alpha = alpha                      # hysteresis factor alpha
         self.load_threshold = load_threshold    # L_thresh in bytes
-        self.lock = threading.RLock()
+        self.lock = InstrumentedLock(threading.RLock())
+
+        # Sharded state: one lock and one sequence counter per region.
+        # An odd sequence value means a write is in progress.
+        self.sharded = sharded
+        self._shard_locks = {region: InstrumentedLock() for region in regions}
+        self._versions = {region: 0 for region in regions}
+        self._retries = {region: 0 for region in regions}
+
+        # Time-based load model (lazy continuous drain)
+        if isinstance(service_rate, dict):
+            self.service_rates = {r: service_rate.get(r, 0) for r in regions}
+        else:
+            self.service_rates = {r: service_rate or 0 for r in regions}
+        self.decay_half_life = decay_half_life
+        self.time_based = service_rate is not None or decay_half_life is not None
+        self.clock = clock
+        self._last_drain = {region: clock() for region in regions}
+
+        # Latency-aware routing
+        if link_estimator is not None and not all(self.service_rates.values()):
+            raise ValueError("link_estimator requires a non-zero service_rate "
+                             "for every region")
+        self.link_estimator = link_estimator
+
+        # Routing policy
+        self.strategy = strategy or ThresholdHysteresisStrategy()
+
+        # Heterogeneous capacities: u_i = L_i / c_i, L_thresh_i = L_thresh * c_i
+        capacities = capacities or {}
+        thresholds = thresholds or {}
+        self.capacities = {r: capacities.get(r, 1.0) for r in regions}
+        self.total_capacity = sum(self.capacities.values())
+        self.region_thresholds = {
+            r: thresholds.get(r, load_threshold * self.capacities[r])
+            for r in regions
+        }
+
+        # Predictive routing: bytes routed to each region this epoch
+        self.forecaster = forecaster
+        self._epoch_arrivals = dict.fromkeys(regions, 0)
 
         # Counters for benchmarking
         self.threshold_violations = 0
         self.redirect_events = 0
+        self.predictive_redirects = 0
 
     # ------------------------------------------------------------------
     # PARAMETER-DRIVEN SIMULATION: 4G/LTE Edge Network Latency Model
@@ -57,14 +231,158 @@ class LoadBalancer:
         time.sleep(latency)
         return latency
 
+    # ------------------------------------------------------------------
+    # Time-based load model
+    # L_i(t) = max(0, L_i(t0) - mu_i * (t - t0)) * 2^(-(t - t0) / T_half)
+    # Evaluated only when region i is read or updated.
+    # ------------------------------------------------------------------
+    def _project(self, region, load, last, now):
+        """Return load as drained from time last to now (no mutation)."""
+        elapsed = now - last
+        if elapsed <= 0:
+            return load
+        rate = self.service_rates[region]
+        if rate:
+            load = max(0, load - rate * elapsed)
+        if self.decay_half_life:
+            load *= 0.5 ** (elapsed / self.decay_half_life)
+        return load
+
+    def _drain(self, region, now):
+        """
+        Apply the elapsed drain to one region. Caller holds the lock that
+        guards the region (self.lock, or its shard lock when sharded).
+        """
+        old = self.region_loads[region]
+        load = self._project(region, old, self._last_drain[region], now)
+        self.region_loads[region] = load
+        self._adjust_total(load - old)
+        self._last_drain[region] = max(now, self._last_drain[region])
+        return load
+
+    def _drain_all(self):
+        """Bring every region up to date (used by arg-min reads only)."""
+        if self.time_based:
+            now = self.clock()
+            for region in self.regions:
+                self._drain(region, now)
+
+    # ------------------------------------------------------------------
+    # Sharded state: seqlock-style optimistic reads
+    # ------------------------------------------------------------------
+    def _read_region(self, region, now):
+        """Lock-free read of one region's current load."""
+        versions = self._versions
+        for attempt in range(self.OPTIMISTIC_RETRIES):
+            v0 = versions[region]
+            if not v0 & 1:
+                load = self.region_loads[region]
+                last = self._last_drain[region]
+                if versions[region] == v0:
+                    if attempt:
+                        self._count_retries(region, attempt)
+                    if self.time_based:
+                        return self._project(region, load, last, now)
+                    return load
+        with self._shard_locks[region]:
+            self._retries[region] += self.OPTIMISTIC_RETRIES
+            if self.time_based:
+                return self._project(region, self.region_loads[region],
+                                     self._last_drain[region], now)
+            return self.region_loads[region]
+
+    def _count_retries(self, region, n):
+        """Add n failed optimistic reads to region's tally (rare path)."""
+        with self._shard_locks[region]:
+            self._retries[region] += n
+
+    @property
+    def optimistic_retries(self):
+        """Optimistic reads that a concurrent writer forced to retry."""
+        return sum(self._retries.values())
+
+    def _snapshot(self):
+        """Optimistic per-region snapshot {region: L_i(t)}."""
+        now = self.clock() if self.time_based else 0
+        return {region: self._read_region(region, now)
+                for region in self.regions}
+
+    def get_load(self, region):
+        """Return the current L_i(t) for one region."""
+        if self.sharded:
+            return self._read_region(
+                region, self.clock() if self.time_based else 0)
+        with self.lock:
+            if self.time_based:
+                return self._drain(region, self.clock())
+            return self.region_loads[region]
+
+    def get_loads(self):
+        """Return a snapshot of all current loads {region: L_i(t)}."""
+        if self.sharded:
+            return self._snapshot()
+        with self.lock:
+            self._drain_all()
+            return dict(self.region_loads)
+
     def get_optimal_region(self):
         """Return the region with the minimum current load (arg min)."""
+        if self.sharded:
+            return min(self._snapshot().items(), key=lambda x: x[1])[0]
         with self.lock:
+            self._drain_all()
             return min(self.region_loads.items(), key=lambda x: x[1])[0]
 
-    def get_target_region(self, current_region):
+    def lock_stats(self):
+        """
+        Return lock wait instrumentation: the global (redirect) lock,
+        each shard lock, and the number of optimistic read retries.
+        """
+        return {
+            'global': self.lock.stats(),
+            'shards': {region: lock.stats()
+                       for region, lock in self._shard_locks.items()},
+            'optimistic_retries': self.optimistic_retries,
+        }
+
+    def mean_load(self):
+        """Return the mean L_i(t) across regions."""
+        loads = self.get_loads()
+        return sum(loads.values()) / len(loads)
+
+    # ------------------------------------------------------------------
+    # Heterogeneous capacities
+    # ------------------------------------------------------------------
+    def threshold_for(self, region):
+        """Byte threshold L_thresh_i for one region."""
+        return self.region_thresholds[region]
+
+    def utilisation(self, region, load):
+        """Normalised utilisation u_i = L_i / c_i."""
+        return load / self.capacities[region]
+
+    def get_utilisations(self):
+        """Return a snapshot {region: u_i(t)}."""
+        return {region: self.utilisation(region, load)
+                for region, load in self.get_loads().items()}
+
+    def mean_utilisation(self):
+        """
+        Capacity-weighted mean utilisation sum(L_i) / sum(c_i): O(1) from
+        the running total_load, or in sharded mode a lock-free sum of the
+        per-shard loads (so writers to different regions share no lock).
+        Under the time-based model each L_i counts as of its last drain
+        (its last update, or also its last read when not sharded), so the
+        mean can run ahead of the fully drained value.
         """
-        Core routing decision implementing Eq. (2) and Eq. (3).
+        if self.sharded:
+            return sum(self.region_loads.values()) / self.total_capacity
+        return self.total_load / self.total_capacity
+
+    def get_target_region(self, current_region, data_size=0, key=None):
+        """
+        Core routing decision. With the default strategy this implements
+        Eq. (2) and Eq. (3):
 
         Returns the region to which new traffic should be directed.
         If the current region is not overloaded, returns current_region.
@@ -72,52 +390,191 @@ class LoadBalancer:
 
         This is a ROUTING decision for new packets only. No existing load
         is physically moved. Matches Algorithm 2 line-for-line.
+
+        data_size is the size of the packet being routed (used by
+        latency-aware and bounded-load routing); key identifies the packet
+        for consistent hashing.
+
+        In sharded mode the strategy runs lock-free on optimistic reads
+        and only record_decision() takes the global lock; the decision is
+        not serialised against concurrent decisions or updates.
         """
+        if self.sharded:
+            return self.strategy.select(self, current_region, data_size, key)
         with self.lock:
-            current_load = self.region_loads[current_region]
+            return self.strategy.select(self, current_region, data_size, key)
 
-            # Check if current region is overloaded (Eq. 1)
-            if current_load <= self.load_threshold:
-                return current_region
+    def record_decision(self, violated=False, redirected=False,
+                        predictive=False):
+        """
+        Update the benchmark counters for one routing decision. predictive
+        marks a redirect triggered by the forecast alone.
+        """
+        with self.lock:
+            if violated:
+                self.threshold_violations += 1
+            if redirected:
+                self.redirect_events += 1
+                if predictive:
+                    self.predictive_redirects += 1
 
-            # Record threshold violation for benchmarking
-            self.threshold_violations += 1
+    # ------------------------------------------------------------------
+    # Predictive routing
+    # ------------------------------------------------------------------
+    def predicted_load(self, region, current_load):
+        """Forecast load of region at the end of the next epoch."""
+        if self.forecaster is None:
+            return current_load
+        return self.forecaster.predict(region, current_load)
 
-            # Find optimal target: r_opt = arg min L_j(t) (Eq. 2)
-            r_opt = min(self.region_loads.items(), key=lambda x: x[1])[0]
-            load_opt = self.region_loads[r_opt]
+    def end_epoch(self):
+        """
+        Close the current decision epoch: feed each region's arrivals and
+        current load to the forecaster and reset the arrival counters.
+        """
+        with self._exclusive():
+            arrivals = self._epoch_arrivals
+            self._epoch_arrivals = dict.fromkeys(self.regions, 0)
+            if self.forecaster is not None:
+                for region, load in self.get_loads().items():
+                    self.forecaster.observe(region, arrivals[region], load)
 
-            # Hysteresis check (Eq. 3): redirect only if target has
-            # sufficient capacity advantage (at least 1-alpha = 30%)
-            if r_opt != current_region and load_opt < self.alpha * current_load:
-                self.redirect_events += 1
-                return r_opt
+    # ------------------------------------------------------------------
+    # Latency-aware cost model (used by ThresholdHysteresisStrategy)
+    # D_j = L_j(t) / mu_j                          (queue drain time)
+    # T_j = D_j + RTT(src, j) + size / B(src, j)   (expected completion)
+    # ------------------------------------------------------------------
+    def drain_time(self, region, load):
+        """Seconds for region to serve its queued bytes."""
+        return load / self.service_rates[region]
 
-            # Hysteresis condition not met: stay in current region
-            return current_region
+    def expected_completion_time(self, source, target, load, data_size=0):
+        """Expected seconds until a packet routed source -> target is served."""
+        return (self.drain_time(target, load)
+                + self.link_estimator.transfer_time(source, target, data_size))
+
+    def observe_transfer(self, source, target, data_size, elapsed_s):
+        """Feed an observed inter-region transfer latency to the link model."""
+        if self.link_estimator is not None:
+            self.link_estimator.observe(source, target, data_size, elapsed_s)
 
     def update_load(self, region, data_size):
         """
         Update the load metric L_i(t) for the given region.
         L_i(t) = cumulative size of encrypted data (bytes) routed to r_i,
-        as defined in Section 6.2.
+        as defined in Section 6.2. Under the time-based model the elapsed
+        drain is applied before the new bytes are added.
         """
+        if self.sharded:
+            with self._shard_locks[region]:
+                self._add_load(region, data_size)
+            return
+
         with self.lock:
-            self.region_loads[region] += data_size
+            self._add_load(region, data_size)
+
+    def _add_load(self, region, data_size):
+        """Drain then add bytes. Caller holds the lock guarding region."""
+        if self.sharded:
+            self._versions[region] += 1
+        if self.time_based:
+            self._drain(region, self.clock())
+        self.region_loads[region] += data_size
+        self._adjust_total(data_size)
+        self._epoch_arrivals[region] += data_size
+        if self.sharded:
+            self._versions[region] += 1
+
+    def _adjust_total(self, delta):
+        """
+        Add delta to total_load (caller holds the global lock). Sharded
+        writers skip it: mean_utilisation() sums their shards instead.
+        """
+        if not self.sharded:
+            self.total_load += delta
+
+    @contextmanager
+    def _exclusive(self):
+        """Hold the global lock and, in sharded mode, every shard lock."""
+        with self.lock:
+            if not self.sharded:
+                yield
+                return
+            held = []
+            try:
+                for region in self.regions:
+                    self._shard_locks[region].acquire()
+                    held.append(region)
+                yield
+            finally:
+                for region in reversed(held):
+                    self._shard_locks[region].release()
+
+    def route_batch(self, sizes_by_ingress):
+        """
+        Route a whole decision epoch of packets in one call.
+
+        Parameters
+        ----------
+        sizes_by_ingress : dict[str, list[int]]
+            Packet sizes (bytes) arriving at each ingress region this epoch.
+
+        Returns
+        -------
+        dict[str, list[str]]
+            Target region for every packet, in the same order as the input.
+
+        Packets are taken round-robin across ingresses and each decision
+        sees the loads left by the previous ones, so redirected traffic
+        water-fills the least-loaded regions. All load updates are applied
+        while the balancer is held exclusively, so concurrent callers
+        observe the batch atomically, and the locks are taken once per
+        batch instead of twice per packet.
+        """
+        with self._exclusive():
+            return self.strategy.route_batch(self, sizes_by_ingress)
 
     def simulate_processing(self, processing_rate):
         """
         Simulate per-step data processing draining load from each region.
+        processing_rate is a scalar or a per-region dict.
         """
+        if isinstance(processing_rate, dict):
+            rates = processing_rate
+        else:
+            rates = dict.fromkeys(self.regions, processing_rate)
+
+        if self.sharded:
+            for region in self.regions:
+                with self._shard_locks[region]:
+                    self._versions[region] += 1
+                    old = self.region_loads[region]
+                    self.region_loads[region] = max(0, old - rates[region])
+                    self._adjust_total(self.region_loads[region] - old)
+                    self._versions[region] += 1
+            return
+
         with self.lock:
             for region in self.regions:
-                self.region_loads[region] = max(
-                    0, self.region_loads[region] - processing_rate
-                )
+                old = self.region_loads[region]
+                self.region_loads[region] = max(0, old - rates[region])
+                self._adjust_total(self.region_loads[region] - old)
 
     def reset_counters(self):
         """Reset benchmark counters between experimental runs."""
-        with self.lock:
+        # Every shard lock is held, so no update lands between the resets
+        with self._exclusive():
             self.threshold_violations = 0
             self.redirect_events = 0
-            self.region_loads = {region: 0 for region in self.regions}
+            self.predictive_redirects = 0
+            self._epoch_arrivals = dict.fromkeys(self.regions, 0)
+            now = self.clock()
+            for region in self.regions:
+                self._versions[region] += 1
+                self.region_loads[region] = 0
+                self._last_drain[region] = now
+                self._versions[region] += 1
+                self._shard_locks[region].reset_stats()
+            self.total_load = 0
+            self._retries = dict.fromkeys(self.regions, 0)
+            self.lock.reset_stats()
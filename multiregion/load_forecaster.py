@@ -0,0 +1,95 @@
+import math
+
+
+class EWMAArrivalForecaster:
+    """
+    Per-region EWMA of arrivals per decision epoch.
+
+    Predicted next-epoch load:
+        L_hat_i = max(0, L_i + mean_i + z * std_i - drain_per_epoch)
+    where mean_i / std_i are the exponentially weighted mean and standard
+    deviation of bytes arriving at region i per epoch. z > 0 adds burst
+    headroom, so bursty regions are flagged before they cross L_thresh.
+    """
+
+    def __init__(self, weight=0.3, z=1.0, drain_per_epoch=0):
+        """
+        Parameters
+        ----------
+        weight : float
+            EWMA gain in (0, 1] for the latest epoch.
+        z : float
+            Number of standard deviations of headroom added to the mean.
+        drain_per_epoch : float or dict[str, float]
+            Bytes each region serves per epoch (scalar or per region).
+        """
+        self.weight = weight
+        self.z = z
+        self.drain_per_epoch = drain_per_epoch
+        self.mean = {}
+        self.var = {}
+
+    def _drain(self, region):
+        if isinstance(self.drain_per_epoch, dict):
+            return self.drain_per_epoch.get(region, 0)
+        return self.drain_per_epoch
+
+    def observe(self, region, arrivals, load):
+        """Record one completed epoch for region."""
+        if region not in self.mean:
+            self.mean[region] = float(arrivals)
+            self.var[region] = 0.0
+            return
+        diff = arrivals - self.mean[region]
+        incr = self.weight * diff
+        self.mean[region] += incr
+        # West's incremental exponentially weighted variance
+        self.var[region] = (1 - self.weight) * (self.var[region] + diff * incr)
+
+    def predict(self, region, current_load):
+        """Predicted load of region at the end of the next epoch."""
+        if region not in self.mean:
+            return current_load
+        expected = self.mean[region] + self.z * math.sqrt(self.var[region])
+        return max(0.0, current_load + expected - self._drain(region))
+
+
+class HoltForecaster:
+    """
+    Holt's linear (double exponential) smoothing of each region's load,
+    i.e. Holt-Winters without a seasonal term (the traffic generators have
+    no fixed period).
+
+        level_t = a * L_t + (1 - a) * (level_{t-1} + trend_{t-1})
+        trend_t = b * (level_t - level_{t-1}) + (1 - b) * trend_{t-1}
+        L_hat   = level_t + trend_t + (L_now - L_t)
+
+    The last term carries over bytes added since the epoch was observed.
+    """
+
+    def __init__(self, alpha=0.5, beta=0.3):
+        self.alpha = alpha
+        self.beta = beta
+        self.level = {}
+        self.trend = {}
+        self.last_load = {}
+
+    def observe(self, region, arrivals, load):
+        """Record one completed epoch for region."""
+        if region not in self.level:
+            self.level[region] = float(load)
+            self.trend[region] = 0.0
+        else:
+            prev_level = self.level[region]
+            self.level[region] = (self.alpha * load
+                                  + (1 - self.alpha) * (prev_level + self.trend[region]))
+            self.trend[region] = (self.beta * (self.level[region] - prev_level)
+                                  + (1 - self.beta) * self.trend[region])
+        self.last_load[region] = load
+
+    def predict(self, region, current_load):
+        """Predicted load of region at the end of the next epoch."""
+        if region not in self.level:
+            return current_load
+        forecast = self.level[region] + self.trend[region]
+        return max(0.0, forecast + current_load - self.last_load[region])
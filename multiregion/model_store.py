@@ -0,0 +1,72 @@
+import hashlib
+import json
+import os
+import zipfile
+import zlib
+
+import numpy as np
+
+# Bump when the array layout written by AnomalyDetector.save() changes
+FORMAT_VERSION = 1
+
+
+def _digest(arrays, meta):
+    """sha256 over the metadata and every array's name, dtype, shape and bytes."""
+    h = hashlib.sha256()
+    h.update(json.dumps(meta, sort_keys=True).encode('utf-8'))
+    for name in sorted(arrays):
+        a = np.ascontiguousarray(arrays[name])
+        h.update(name.encode('utf-8'))
+        h.update(a.dtype.str.encode('ascii'))
+        h.update(repr(a.shape).encode('ascii'))
+        h.update(a.tobytes())
+    return h.hexdigest()
+
+
+def save_model_file(path, arrays, meta):
+    """
+    Write arrays plus JSON metadata to a compressed .npz file.
+
+    The format version and a sha256 checksum of the contents are stored
+    alongside. The file is written to a temporary name and renamed, so a
+    crash mid-write never leaves a truncated model behind.
+    """
+    meta = dict(meta, format_version=FORMAT_VERSION)
+    payload = {name: np.asarray(a) for name, a in arrays.items()}
+    checksum = _digest(payload, meta)
+    payload['__meta__'] = np.frombuffer(json.dumps(meta).encode('utf-8'),
+                                        dtype=np.uint8)
+    payload['__sha256__'] = np.frombuffer(checksum.encode('ascii'), dtype=np.uint8)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez_compressed(f, **payload)
+    os.replace(tmp_path, path)
+
+
+def load_model_file(path):
+    """
+    Read a file written by save_model_file() and return (arrays, meta).
+    Raises ValueError if the format version is unknown or the checksum
+    does not match, or if the file is not a readable archive (truncated or
+    damaged bytes fail in np.load or decompression, before the checksum).
+    """
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+    except (zipfile.BadZipFile, zlib.error, EOFError) as e:
+        raise ValueError(f"{path}: corrupt model file ({e})")
+    try:
+        meta = json.loads(arrays.pop('__meta__').tobytes().decode('utf-8'))
+        checksum = arrays.pop('__sha256__').tobytes().decode('ascii')
+    except KeyError:
+        raise ValueError(f"{path}: not a model file (missing metadata)")
+
+    if meta.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported model format version "
+                         f"{meta.get('format_version')} (expected {FORMAT_VERSION})")
+    if _digest(arrays, meta) != checksum:
+        raise ValueError(f"{path}: checksum mismatch, model file is corrupt")
+    return arrays, meta
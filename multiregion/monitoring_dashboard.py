@@ -13,11 +13,12 @@ import os
 import json
 import pickle 
 class MonitoringDashboard:
-    def __init__(self, health_monitor, load_balancer, compression_manager):
+    def __init__(self, health_monitor, load_balancer, compression_manager, cache=None):
         self.console = Console()
         self.health_monitor = health_monitor
         self.load_balancer = load_balancer
         self.compression_manager = compression_manager
+        self.cache = cache
         self.is_running = False
         self.update_interval = 1.0  # Update every second
         self.dashboard_process = None
@@ -44,7 +45,8 @@ class MonitoringDashboard:
         
         layout["right"].split(
             Layout(name="region_stats"),
-            Layout(name="compression_stats")
+            Layout(name="compression_stats"),
+            Layout(name="cache_stats")
         )
         
         return layout
@@ -96,10 +98,10 @@ class MonitoringDashboard:
         table.add_column("Load")
         table.add_column("Status")
         
-        for region, load in self.load_balancer.region_loads.items():
-            status = "OK" if load < self.load_balancer.load_threshold else "HIGH"
+        for region, load in self.load_balancer.get_loads().items():
+            status = "OK" if load < self.load_balancer.threshold_for(region) else "HIGH"
             style = "green" if status == "OK" else "yellow"
-            table.add_row(region, str(load), status, style=style)
+            table.add_row(region, f"{load:.0f}", status, style=style)
         
         return Panel(table, title="Region Statistics", border_style="green")
     
@@ -127,6 +129,25 @@ class MonitoringDashboard:
         table.add_row("Compression Type", str(self.compression_manager.compression_type.value))
         
         return Panel(table, title="Compression Statistics", border_style="magenta")
+
+    def generate_cache_stats(self):
+        """Generate smart cache statistics panel"""
+        table = Table(box=box.ROUNDED)
+        table.add_column("Metric")
+        table.add_column("Value")
+        if self.cache is not None:
+            stats = self.cache.stats()
+            table.add_row("Hit ratio", f"{stats['hit_ratio']:.1%} "
+                          f"({stats['hits']}/{stats['hits'] + stats['misses']})")
+            table.add_row("Entries / Size", f"{stats['entries']} / {stats['bytes']/1024:.1f} KB")
+            causes = stats['evictions_by_cause']
+            table.add_row("Removed", ", ".join(f"{c}={n}" for c, n in causes.items()))
+            table.add_row("get p50 / p95", f"{stats['get_latency']['p50_us']:.0f} / "
+                          f"{stats['get_latency']['p95_us']:.0f} us")
+            for prefix, p in stats['prefixes'].items():
+                table.add_row(f"  {prefix or '(none)'}", f"{p['hit_ratio']:.1%}")
+        
+        return Panel(table, title="Cache Statistics", border_style="cyan")
     
     def update_dashboard(self, layout):
         """Update dashboard content"""
@@ -144,6 +165,7 @@ class MonitoringDashboard:
         layout["left"]["alerts"].update(self.generate_alerts_panel(alerts))
         layout["right"]["region_stats"].update(self.generate_region_stats())
         layout["right"]["compression_stats"].update(self.generate_compression_stats())
+        layout["right"]["cache_stats"].update(self.generate_cache_stats())
         
         # Update footer
         layout["footer"].update(
@@ -223,8 +245,8 @@ class MonitoringDashboard:
                             for alert in alerts
                         ],
                         'region_loads': {
-                            region: load 
-                            for region, load in self.load_balancer.region_loads.items()
+                            region: round(load)
+                            for region, load in self.load_balancer.get_loads().items()
                         },
                         'compression_stats': {
                                     'size_reduction': self.compression_manager.get_average_ratio(),
@@ -237,7 +259,8 @@ class MonitoringDashboard:
                                         if self.compression_manager.compression_stats.get('total_original', 0) > 0 else 0.0
                                     ),
                                     'type': str(self.compression_manager.compression_type.value)
-                        }
+                        },
+                        'cache_stats': self.cache.stats() if self.cache is not None else {}
                     }
                     
                     # Write to shared file
@@ -254,7 +277,7 @@ class MonitoringDashboard:
         initial_data = {
             'metrics': self.health_monitor.get_metrics_summary(),
             'alerts': [],
-            'region_loads': self.load_balancer.region_loads,
+            'region_loads': self.load_balancer.get_loads(),
             'compression_stats': {
                 'size_reduction': 0.0,
                 'avg_ratio': 0.0,
@@ -262,7 +285,8 @@ class MonitoringDashboard:
                 'total_compressed': 0,
                 'compression_factor': 0.0,
                 'type': str(self.compression_manager.compression_type.value)
-            }
+            },
+            'cache_stats': {}
         }
         
         with open(shared_data_path, 'w', encoding='utf-8') as f:
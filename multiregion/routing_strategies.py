@@ -0,0 +1,291 @@
+import bisect
+import heapq
+import random
+import zlib
+from itertools import zip_longest
+
+
+def interleave(sizes_by_ingress):
+    """Yield (ingress, index, size) taking packets round-robin by ingress."""
+    queues = [[(ingress, i, size) for i, size in enumerate(sizes)]
+              for ingress, sizes in sizes_by_ingress.items()]
+    for group in zip_longest(*queues):
+        for item in group:
+            if item is not None:
+                yield item
+
+
+class RoutingStrategy:
+    """
+    Pluggable routing policy for LoadBalancer.
+
+    select() is called by LoadBalancer.get_target_region() and returns the
+    region that should receive the next packet. Strategies read state only
+    through the balancer (get_load(), get_loads(), utilisation(),
+    threshold_for()), so the same policy runs under the global lock, in
+    sharded mode, and in the shared benchmark engine. Benchmark counters
+    are reported through lb.record_decision().
+    """
+
+    name = 'base'
+
+    def select(self, lb, current_region, data_size=0, key=None):
+        raise NotImplementedError
+
+    def route_batch(self, lb, sizes_by_ingress):
+        """
+        Route a batch of packets (see LoadBalancer.route_batch). The caller
+        holds the balancer exclusively. The default applies select() and
+        the load update packet by packet.
+        """
+        assignments = {ingress: [None] * len(sizes)
+                       for ingress, sizes in sizes_by_ingress.items()}
+        for ingress, i, size in interleave(sizes_by_ingress):
+            target = self.select(lb, ingress, size)
+            lb._add_load(target, size)
+            assignments[ingress][i] = target
+        return assignments
+
+
+class ThresholdHysteresisStrategy(RoutingStrategy):
+    """
+    The S-Edge policy (Algorithm 2): stay local while L_src <= L_thresh,
+    otherwise redirect to r_opt = arg min L_j(t) (Eq. 2) if it passes the
+    alpha hysteresis check (Eq. 3). Needs a global view of every region's
+    load, but only when the source region is overloaded. Arg-min and
+    hysteresis use normalised utilisation u_j = L_j / c_j, which equals
+    L_j with the default unit capacities.
+
+    With a link estimator configured on the balancer, r_opt is chosen by
+    expected completion time instead of bytes (see LoadBalancer). With a
+    forecaster, the policy also triggers when the predicted next-epoch
+    load of the source exceeds its threshold; hysteresis then compares
+    against the predicted source load.
+    """
+
+    name = 'threshold'
+
+    def select(self, lb, current_region, data_size=0, key=None):
+        current_load = lb.get_load(current_region)
+        threshold = lb.threshold_for(current_region)
+
+        # Check if current region is overloaded (Eq. 1), or will be
+        # within the next epoch according to the forecaster
+        violated = current_load > threshold
+        if not violated:
+            if lb.forecaster is None:
+                return current_region
+            predicted = lb.predicted_load(current_region, current_load)
+            if predicted <= threshold:
+                return current_region
+            source_load = predicted
+        else:
+            source_load = max(current_load,
+                              lb.predicted_load(current_region, current_load))
+
+        loads = lb.get_loads()
+        loads[current_region] = source_load
+        r_opt = self.select_redirect(lb, current_region, loads, data_size)
+
+        # Record threshold violation (and redirect) for benchmarking
+        lb.record_decision(violated=violated, redirected=r_opt is not None,
+                           predictive=not violated)
+        if r_opt is not None:
+            return r_opt
+
+        # Hysteresis condition not met: stay in current region
+        return current_region
+
+    def select_redirect(self, lb, current_region, loads, data_size=0):
+        """
+        Pick the redirect target for an overloaded region, or None if the
+        hysteresis condition is not met. loads is a current snapshot.
+        """
+        if lb.link_estimator is not None:
+            return self._select_by_completion_time(lb, current_region, loads,
+                                                   data_size)
+
+        util = {region: lb.utilisation(region, load)
+                for region, load in loads.items()}
+
+        # Find optimal target: r_opt = arg min u_j(t) (Eq. 2)
+        r_opt = min(util.items(), key=lambda x: x[1])[0]
+
+        # Hysteresis check (Eq. 3): redirect only if target has
+        # sufficient capacity advantage (at least 1-alpha = 30%)
+        if r_opt != current_region and util[r_opt] < lb.alpha * util[current_region]:
+            return r_opt
+        return None
+
+    def route_batch(self, lb, sizes_by_ingress):
+        """
+        Water-filling batch version of select(): one load snapshot, then
+        a min-heap over the working loads gives r_opt in O(log R) per
+        packet. Decisions equal calling select() packet by packet.
+        """
+        if lb.link_estimator is not None or lb.forecaster is not None:
+            return super().route_batch(lb, sizes_by_ingress)
+
+        loads = lb.get_loads()
+        util = {r: lb.utilisation(r, load) for r, load in loads.items()}
+        order = {region: i for i, region in enumerate(lb.regions)}
+        # (utilisation, region order, region); stale entries skipped lazily
+        heap = [(u, order[r], r) for r, u in util.items()]
+        heapq.heapify(heap)
+        deltas = dict.fromkeys(loads, 0)
+        assignments = {ingress: [None] * len(sizes)
+                       for ingress, sizes in sizes_by_ingress.items()}
+
+        for ingress, i, size in interleave(sizes_by_ingress):
+            target = ingress
+            if loads[ingress] > lb.threshold_for(ingress):
+                while heap[0][0] != util[heap[0][2]]:
+                    heapq.heappop(heap)
+                util_opt, _, r_opt = heap[0]
+                if r_opt != ingress and util_opt < lb.alpha * util[ingress]:
+                    target = r_opt
+                # Same counters, and lock, as select()
+                lb.record_decision(violated=True, redirected=target != ingress)
+            loads[target] += size
+            util[target] = lb.utilisation(target, loads[target])
+            deltas[target] += size
+            heapq.heappush(heap, (util[target], order[target], target))
+            assignments[ingress][i] = target
+
+        for region, delta in deltas.items():
+            if delta:
+                lb._add_load(region, delta)
+        return assignments
+
+    # ------------------------------------------------------------------
+    # Latency-aware variant
+    # D_j = L_j(t) / mu_j                          (queue drain time)
+    # T_j = D_j + RTT(src, j) + size / B(src, j)   (expected completion)
+    # Eligible targets satisfy the hysteresis in drain time,
+    # D_j < alpha * D_src; r_opt = arg min T_j over eligible j, and the
+    # redirect must also beat staying put (T_opt < D_src).
+    # ------------------------------------------------------------------
+    def _select_by_completion_time(self, lb, current_region, loads, data_size):
+        drain_src = lb.drain_time(current_region, loads[current_region])
+        best, best_cost = None, drain_src
+        for region, load in loads.items():
+            if region == current_region:
+                continue
+            if lb.drain_time(region, load) >= lb.alpha * drain_src:
+                continue
+            cost = lb.expected_completion_time(current_region, region,
+                                               load, data_size)
+            if cost < best_cost:
+                best, best_cost = region, cost
+        return best
+
+
+class PowerOfDChoicesStrategy(RoutingStrategy):
+    """
+    Power-of-d-choices sampling. The source region is always one candidate
+    and d - 1 other regions are sampled uniformly at random; the packet
+    goes to the least-utilised candidate. Each decision reads d loads
+    regardless of the number of regions.
+
+    gated=True keeps the S-Edge behaviour of staying local while the
+    source is under L_thresh (one read); alpha hysteresis still applies
+    to any redirect.
+    """
+
+    name = 'power_of_d'
+
+    def __init__(self, d=2, gated=True, seed=None):
+        if d < 1:
+            raise ValueError("d must be >= 1")
+        self.d = d
+        self.gated = gated
+        self.rng = random.Random(seed)
+
+    def select(self, lb, current_region, data_size=0, key=None):
+        current_load = lb.get_load(current_region)
+        violated = current_load > lb.threshold_for(current_region)
+        if self.gated and not violated:
+            return current_region
+
+        others = [r for r in lb.regions if r != current_region]
+        k = min(self.d - 1, len(others))
+        current_util = lb.utilisation(current_region, current_load)
+        best, best_util = current_region, current_util
+        for region in self.rng.sample(others, k):
+            u = lb.utilisation(region, lb.get_load(region))
+            if u < best_util:
+                best, best_util = region, u
+
+        redirected = best != current_region and best_util < lb.alpha * current_util
+        if violated or redirected:
+            lb.record_decision(violated=violated, redirected=redirected)
+        return best if redirected else current_region
+
+
+class ConsistentHashStrategy(RoutingStrategy):
+    """
+    Consistent hashing with bounded loads (Mirrokni et al., 2018).
+
+    Each region owns `vnodes` points on a hash ring. A packet's key (its
+    file name, device id, ...) hashes to a ring position; with no key the
+    walk starts at the source region's own ring point, so it is the home
+    region. The packet goes to the first region clockwise whose
+    utilisation is within c times the capacity-weighted mean utilisation
+    (counting the packet). Keys keep their home region while it has
+    headroom, and overflow moves to the next region on the ring rather
+    than to a global arg-min. The mean comes from the balancer's running
+    load total (O(1); in sharded mode a lock-free sum of the shard loads),
+    so a decision takes no lock and reads only the loads of the regions it
+    walks past (usually one) and the source load; only when every region
+    is over the bound does it fall back to reading all of them.
+    """
+
+    name = 'consistent_hash'
+
+    def __init__(self, regions, c=1.25, vnodes=64):
+        if c < 1.0:
+            raise ValueError("c must be >= 1.0")
+        self.c = c
+        self._ring = sorted(
+            (self._hash(f"{region}#{i}"), region)
+            for region in regions for i in range(vnodes)
+        )
+        self._points = [point for point, _ in self._ring]
+
+    @staticmethod
+    def _hash(value):
+        return zlib.crc32(str(value).encode('utf-8'))
+
+    def _walk(self, position):
+        """Yield distinct regions clockwise from a ring position."""
+        start = bisect.bisect_left(self._points, position)
+        seen = set()
+        n = len(self._ring)
+        for i in range(n):
+            region = self._ring[(start + i) % n][1]
+            if region not in seen:
+                seen.add(region)
+                yield region
+
+    def select(self, lb, current_region, data_size=0, key=None):
+        if key is None:
+            position = self._hash(f"{current_region}#0")
+        else:
+            position = self._hash(key)
+        bound = self.c * (lb.mean_utilisation() + data_size / lb.total_capacity)
+
+        target = None
+        for region in self._walk(position):
+            # Load after placement, as in the bounded-load definition
+            if lb.utilisation(region, lb.get_load(region) + data_size) <= bound:
+                target = region
+                break
+        if target is None:
+            target = min(lb.get_utilisations().items(), key=lambda x: x[1])[0]
+
+        violated = lb.get_load(current_region) > lb.threshold_for(current_region)
+        redirected = target != current_region
+        if violated or redirected:
+            lb.record_decision(violated=violated, redirected=redirected)
+        return target
+
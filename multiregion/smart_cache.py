@@ -1,42 +1,543 @@
+import csv
+import math
+import sys
+import threading
 import time
-from collections import OrderedDict
+from collections import defaultdict, deque
+from concurrent.futures import Future
+
+from cache_metrics import LatencyHistogram, key_prefix
+from cache_policies import POLICIES
+from timing_wheel import TimingWheel
+
+
+def entry_size(obj):
+    """
+    Approximate memory footprint of a cached value in bytes: len() for
+    binary buffers, sys.getsizeof() summed recursively over containers
+    for everything else (shared objects are counted once).
+    """
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return len(obj)
+    seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+    return total
+
+
+class _Shard:
+    """
+    One lock-protected segment of a SmartCache. Entries live in a dict;
+    the eviction policy keeps the order and weights (bytes under a byte
+    budget, otherwise one per item) and a timing wheel their deadlines.
+    Entries pushed out for capacity are demoted to the disk tier, if any;
+    entries refused by the admission filter are not, so a one-off scan
+    cannot flush the disk tier either.
+    Metrics are kept per shard and updated under its lock.
+    """
+
+    def __init__(self, max_size, max_bytes, policy, expiry_tick, disk=None):
+        self.lock = threading.Lock()
+        self.cache = {}                  # key -> (data, expires_at, size)
+        self.wheel = TimingWheel(tick=expiry_tick, now=time.time())
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        if max_bytes is None:
+            self.policy = POLICIES[policy](max_size)
+        else:
+            # Weights are bytes; size frequency state for ~1 KB records
+            expected = max_size or max(16, max_bytes // 1024)
+            self.policy = POLICIES[policy](max_bytes, expected_entries=expected)
+        self.bytes = 0
+        self.evictions = 0               # capacity
+        self.rejected = 0                # admission filter
+        self.oversize = 0                # larger than the shard budget
+        self.expirations = 0
+        self.disk = disk
+        self.demotions = 0
+        self.promotions = 0
+        self.hits = 0
+        self.misses = 0
+        self.prefixes = defaultdict(lambda: [0, 0])   # prefix -> [hits, misses]
+        self.get_latency = LatencyHistogram()
+        self.set_latency = LatencyHistogram()
+
+    def weight(self, size):
+        return size if self.max_bytes is not None else 1
+
+    def remove(self, key):
+        _, _, size = self.cache.pop(key)
+        self.bytes -= size
+        self.policy.remove(key)
+        self.wheel.cancel(key)
+
+    def _drop(self, key):
+        """Forget an entry the policy has already evicted."""
+        data, expires_at, size = self.cache.pop(key)
+        self.bytes -= size
+        self.wheel.cancel(key)
+        self.evictions += 1
+        self.demote(key, data, expires_at)
+
+    def demote(self, key, data, expires_at):
+        """Copy an entry leaving memory to the disk tier (if marshallable)."""
+        if self.disk is None or self.disk.expires_at(key) == expires_at:
+            return                       # no tier, or promoted and unchanged
+        if self.disk.put(key, data, expires_at):
+            self.demotions += 1
+
+    def expire(self, now):
+        """Remove every entry whose deadline passed; cheap between ticks."""
+        for key in self.wheel.advance(now):
+            _, _, size = self.cache.pop(key)
+            self.bytes -= size
+            self.policy.remove(key)
+            self.expirations += 1
+
+    def insert(self, key, data, expires_at, size):
+        self.cache[key] = (data, expires_at, size)
+        self.bytes += size
+        self.wheel.schedule(key, expires_at)
+        evicted, rejected = self.policy.insert(key, self.weight(size))
+        for victim in evicted:
+            self._drop(victim)
+        for victim in rejected:
+            _, _, victim_size = self.cache.pop(victim)
+            self.bytes -= victim_size
+            self.wheel.cancel(victim)
+            self.rejected += 1
+        # Item limit on top of a byte budget
+        while (self.max_bytes is not None and self.max_size is not None
+               and len(self.cache) > self.max_size):
+            self._drop(self.policy.evict_one())
+
 
 class SmartCache:
-    def __init__(self, max_size=10, ttl=300):
+    """
+    Thread-safe LRU cache with a per-item time-to-live.
+
+    Keys are spread over `shards` independent segments by key hash. Each
+    shard has its own lock and LRU order, so threads touching different
+    keys do not serialise on one lock. Capacity is split evenly across
+    shards, which makes LRU exact per shard and approximate overall;
+    shards=1 gives a single global lock with exact LRU.
+
+    Capacity can be an item count (max_size), a byte budget (max_bytes),
+    or both. Every entry is charged entry_size(data) bytes and entries are
+    evicted until the new one fits; a value larger than a whole shard's
+    budget is not cached.
+
+    The eviction policy is pluggable (cache_policies): 'lru' (default) or
+    'tinylfu', a W-TinyLFU admission filter that keeps frequently read
+    entries when a one-off scan (a replication pass) streams through.
+
+    Expired entries are removed proactively: each shard files deadlines
+    in a hierarchical timing wheel (timing_wheel), and every get()/set()
+    on the shard first advances its wheel and drops what came due, so
+    stale entries stop holding memory and capacity without an O(n) scan.
+    sweep_interval additionally runs a background sweeper for caches that
+    go quiet. set() accepts a per-entry ttl override.
+
+    stats() reports hits and misses (overall and per key prefix), removals
+    by cause and get/set latency histograms. With trace_size set, the last
+    trace_size operations are kept for dump_trace(), which writes a CSV
+    that benchmark/cache_trace_simulator.py replays at other sizes.
+
+    get_or_load() is a read-through path with single-flight loading:
+    concurrent misses on one key wait for a single loader call instead of
+    each repeating it, and a failed load is remembered for negative_ttl
+    seconds so callers do not hammer a broken source.
+
+    With a DiskCache as disk_cache the cache has two tiers: entries
+    evicted from memory for capacity are demoted to the memory-mapped
+    file (values marshal cannot encode, e.g. pd.Timestamp, are skipped),
+    and a memory miss that hits on disk promotes the entry back, keeping
+    its original deadline. set() and invalidate() drop the disk copy.
+    """
+
+    def __init__(self, max_size=10, ttl=300, shards=1, max_bytes=None,
+                 policy='lru', expiry_tick=1.0, sweep_interval=None,
+                 negative_ttl=5.0, disk_cache=None, prefix=key_prefix,
+                 trace_size=None):
         """
-        max_size: Maximum number of items to keep in cache.
-        ttl: Time-to-live (in seconds) for each cached item.
+        max_size: Maximum number of items to keep in cache (None: no limit).
+        ttl: Default time-to-live (in seconds) for each cached item.
+        shards: Number of independently locked segments.
+        max_bytes: Byte budget across all shards (None: no limit).
+        policy: Eviction policy name, 'lru' or 'tinylfu'.
+        expiry_tick: Timing-wheel resolution in seconds; expired entries are
+            swept at most this late (get() never returns them).
+        sweep_interval: Seconds between background sweeps (None: expire
+            only on cache operations).
+        negative_ttl: Seconds a failed get_or_load() is remembered.
+        disk_cache: Optional DiskCache used as the second tier.
+        prefix: Maps a key to the group its hit ratio is reported under
+            (default: the directory of a path key).
+        trace_size: Number of recent get/set operations to keep for
+            dump_trace() (None: no tracing).
         """
-        self.cache = OrderedDict()
+        if shards < 1:
+            raise ValueError("shards must be >= 1")
+        if max_size is None and max_bytes is None:
+            raise ValueError("Set max_size, max_bytes or both")
+        if max_size is not None and shards > max_size:
+            raise ValueError("shards must be <= max_size")
+        if max_bytes is not None and shards > max_bytes:
+            raise ValueError("shards must be <= max_bytes")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown cache policy: {policy}")
+        self.policy = policy
         self.max_size = max_size
+        self.max_bytes = max_bytes
         self.ttl = ttl
+        self.disk = disk_cache
+        self.prefix = prefix
+        self._trace = deque(maxlen=trace_size) if trace_size else None
+        self._shards = [_Shard(self._split(max_size, shards, i),
+                               self._split(max_bytes, shards, i), policy,
+                               expiry_tick, disk_cache)
+                        for i in range(shards)]
+        self.negative_ttl = negative_ttl
+        self._load_lock = threading.Lock()
+        self._inflight = {}              # key -> Future of the running load
+        self._failures = {}              # key -> (exception, expires_at)
+        self._failure_wheel = TimingWheel(tick=expiry_tick, now=time.time())
+        self._load_times = deque(maxlen=1024)   # recent load latencies (s)
+        self.loads = 0
+        self.load_failures = 0
+        self.coalesced = 0
+        self.negative_hits = 0
+        self._stop_sweeper = threading.Event()
+        self._sweeper = None
+        if sweep_interval is not None:
+            self._sweeper = threading.Thread(target=self._sweep_loop,
+                                             args=(sweep_interval,), daemon=True)
+            self._sweeper.start()
+
+    @staticmethod
+    def _split(total, shards, i):
+        """Shard i's share of total, so shares sum to total (shards <= total)."""
+        if total is None:
+            return None
+        base, extra = divmod(total, shards)
+        return base + (1 if i < extra else 0)
+
+    def _shard(self, key):
+        if len(self._shards) == 1:
+            return self._shards[0]
+        return self._shards[hash(key) % len(self._shards)]
 
     def get(self, key):
         """
         Retrieve cached data by key if available and not expired.
         """
-        if key in self.cache:
-            data, timestamp = self.cache.pop(key)
-            if time.time() - timestamp < self.ttl:
-                # Reinsert the item to mark it as recently used.
-                self.cache[key] = (data, timestamp)
-                return data
-            # If expired, item is not reinserted and will be dropped.
+        start = time.perf_counter()
+        shard = self._shard(key)
+        now = time.time()
+        with shard.lock:
+            data = self._lookup(shard, key, now)
+            hit = data is not None
+            if hit:
+                shard.hits += 1
+            else:
+                shard.misses += 1
+            shard.prefixes[self.prefix(key)][0 if hit else 1] += 1
+            shard.get_latency.record(time.perf_counter() - start)
+        if self._trace is not None:
+            self._trace.append((now, 'get', key, ''))
+        return data
+
+    def _lookup(self, shard, key, now):
+        shard.expire(now)
+        shard.policy.record(key)
+        item = shard.cache.get(key)
+        if item is None:
+            return self._promote(shard, key)
+        data, expires_at, _ = item
+        if now < expires_at:
+            # Mark the item as recently used.
+            shard.policy.access(key)
+            return data
+        # Expired within the current wheel tick: drop it.
+        shard.remove(key)
+        shard.expirations += 1
         return None
 
-    def set(self, key, data):
+    def _promote(self, shard, key):
+        """Look key up on disk and move a hit back into memory (shard locked)."""
+        if self.disk is None:
+            return None
+        hit = self.disk.get(key)
+        if hit is None:
+            return None
+        data, expires_at = hit
+        size = entry_size(data)
+        if shard.max_bytes is None or size <= shard.max_bytes:
+            shard.insert(key, data, expires_at, size)
+            shard.promotions += 1
+        return data
+
+    def set(self, key, data, ttl=None):
+        """
+        Store data in cache using the given key, for ttl seconds (default:
+        the cache's ttl). Evict items chosen by the policy until the entry
+        fits the shard.
+        """
+        self._store(key, data, ttl, record=True)
+
+    def _store(self, key, data, ttl, record):
         """
-        Store data in cache using the given key.
-        Evict least-recently-used items if the cache is full.
+        set() body. record=False when the write fills a miss whose lookup
+        was already counted by the policy (get_or_load()), so a loaded key
+        is not counted twice.
         """
-        if key in self.cache:
-            self.cache.pop(key)
-        elif len(self.cache) >= self.max_size:
-            self.cache.popitem(last=False)
-        self.cache[key] = (data, time.time())
+        start = time.perf_counter()
+        size = entry_size(data)
+        shard = self._shard(key)
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with shard.lock:
+            shard.expire(now)
+            if key in shard.cache:
+                shard.remove(key)
+            if self.disk is not None:
+                self.disk.discard(key)
+            if record:
+                # Count the write as an access, so a freshly written entry
+                # does not lose every admission tie on a zero frequency
+                shard.policy.record(key)
+            if shard.max_bytes is not None and size > shard.max_bytes:
+                shard.oversize += 1
+            else:
+                shard.insert(key, data, expires_at, size)
+            shard.set_latency.record(time.perf_counter() - start)
+        if self._trace is not None:
+            self._trace.append((now, 'set', key, size))
+
+    def get_or_load(self, key, loader, ttl=None):
+        """
+        Return the cached value for key, calling loader(key) on a miss and
+        caching its result (a None result is returned but not cached).
+
+        Only one loader call per key runs at a time; concurrent callers
+        missing on the same key wait for it and share its result or
+        exception. An exception from loader is re-raised and remembered
+        for negative_ttl seconds, during which calls for that key re-raise
+        it without calling loader again. If the loading thread is stopped
+        by a BaseException, the waiting callers get CancelledError.
+        """
+        data = self.get(key)
+        if data is not None:
+            return data
+
+        with self._load_lock:
+            now = time.time()
+            for expired in self._failure_wheel.advance(now):
+                del self._failures[expired]
+            failure = self._failures.get(key)
+            if failure is not None and now < failure[1]:
+                self.negative_hits += 1
+                raise failure[0]
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                # Another leader may have stored the value and left
+                # between our get() and taking the lock
+                data = self._peek(key)
+                if data is not None:
+                    return data
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+
+        start = time.perf_counter()
+        try:
+            data = loader(key)
+            if data is not None:
+                self._store(key, data, ttl, record=False)
+        except Exception as e:
+            with self._load_lock:
+                self.load_failures += 1
+                expires_at = time.time() + self.negative_ttl
+                self._failures[key] = (e, expires_at)
+                self._failure_wheel.schedule(key, expires_at)
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(data)
+            return data
+        finally:
+            with self._load_lock:
+                self._record_load(start)
+                del self._inflight[key]
+            if not future.done():
+                # KeyboardInterrupt, SystemExit, ...: release the waiting
+                # callers (CancelledError) instead of blocking them forever
+                future.cancel()
+
+    def _peek(self, key):
+        """Live value for key from memory or disk, without counting a lookup."""
+        shard = self._shard(key)
+        with shard.lock:
+            item = shard.cache.get(key)
+        if item is not None and time.time() < item[1]:
+            return item[0]
+        if self.disk is not None:
+            hit = self.disk.get(key)
+            if hit is not None:
+                return hit[0]
+        return None
+
+    def _record_load(self, start):
+        self.loads += 1
+        self._load_times.append(time.perf_counter() - start)
+
+    def invalidate(self, key):
+        """Drop key and any remembered load failure for it."""
+        shard = self._shard(key)
+        with shard.lock:
+            if key in shard.cache:
+                shard.remove(key)
+            if self.disk is not None:
+                self.disk.discard(key)
+        with self._load_lock:
+            if self._failures.pop(key, None) is not None:
+                self._failure_wheel.cancel(key)
+
+    def expire(self):
+        """Sweep expired entries from every shard; returns how many went."""
+        now = time.time()
+        removed = 0
+        for shard in self._shards:
+            with shard.lock:
+                before = shard.expirations
+                shard.expire(now)
+                removed += shard.expirations - before
+        return removed
+
+    def _sweep_loop(self, interval):
+        while not self._stop_sweeper.wait(interval):
+            self.expire()
+
+    def stop(self):
+        """Stop the background sweeper, if any, and close the disk tier."""
+        self._stop_sweeper.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+        if self.disk is not None:
+            self.disk.close()
 
     def clear(self):
         """
         Clear the entire cache.
         """
-        self.cache.clear()
+        for shard in self._shards:
+            with shard.lock:
+                for key in list(shard.cache):
+                    shard.remove(key)
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self):
+        """
+        Current entries and bytes; hits, misses and hit ratio (overall and
+        per key prefix); removals by cause; get/set latency histograms;
+        get_or_load() metrics (latencies over the last 1024 loads, in ms)
+        and tier movements. Plain Python types, so the result is
+        JSON-serialisable.
+        """
+        with self._load_lock:
+            times = sorted(self._load_times)
+        totals = defaultdict(int)
+        prefixes = defaultdict(lambda: [0, 0])
+        get_latency = LatencyHistogram()
+        set_latency = LatencyHistogram()
+        for shard in self._shards:
+            with shard.lock:
+                for name in ('bytes', 'hits', 'misses', 'evictions', 'rejected',
+                             'oversize', 'expirations', 'demotions', 'promotions'):
+                    totals[name] += getattr(shard, name)
+                for prefix, (hits, misses) in shard.prefixes.items():
+                    prefixes[prefix][0] += hits
+                    prefixes[prefix][1] += misses
+                get_latency.merge(shard.get_latency)
+                set_latency.merge(shard.set_latency)
+        lookups = totals['hits'] + totals['misses']
+        return {
+            'entries': len(self),
+            'bytes': totals['bytes'],
+            'max_bytes': self.max_bytes,
+            'hits': totals['hits'],
+            'misses': totals['misses'],
+            'hit_ratio': totals['hits'] / lookups if lookups else 0.0,
+            'evictions': totals['evictions'],
+            'rejected': totals['rejected'] + totals['oversize'],
+            'expirations': totals['expirations'],
+            'evictions_by_cause': {
+                'capacity': totals['evictions'],
+                'admission': totals['rejected'],
+                'oversize': totals['oversize'],
+                'expired': totals['expirations'],
+            },
+            'prefixes': {
+                prefix: {'hits': hits, 'misses': misses,
+                         'hit_ratio': hits / (hits + misses)}
+                for prefix, (hits, misses) in sorted(prefixes.items())
+            },
+            'get_latency': get_latency.snapshot(),
+            'set_latency': set_latency.snapshot(),
+            'loads': self.loads,
+            'load_failures': self.load_failures,
+            'coalesced': self.coalesced,
+            'negative_hits': self.negative_hits,
+            'load_ms_mean': 1000 * sum(times) / len(times) if times else 0.0,
+            'load_ms_p95': 1000 * times[math.ceil(0.95 * len(times)) - 1] if times else 0.0,
+            'load_ms_max': 1000 * times[-1] if times else 0.0,
+            'demotions': totals['demotions'],
+            'promotions': totals['promotions'],
+            'disk': self.disk.stats() if self.disk is not None else None,
+        }
+
+    def health_metrics(self):
+        """Flat numeric summary of stats() for HealthMonitor.add_source()."""
+        stats = self.stats()
+        return {
+            'hit_ratio': stats['hit_ratio'],
+            'entries': stats['entries'],
+            'bytes': stats['bytes'],
+            'evictions': stats['evictions'],
+            'rejected': stats['rejected'],
+            'expirations': stats['expirations'],
+            'get_p95_us': stats['get_latency']['p95_us'],
+            'set_p95_us': stats['set_latency']['p95_us'],
+        }
+
+    def dump_trace(self, path):
+        """
+        Write the recorded operations as CSV (time, op, key, size) for
+        benchmark/cache_trace_simulator.py; returns the number of rows.
+        """
+        if self._trace is None:
+            raise ValueError("SmartCache was created without trace_size")
+        rows = list(self._trace)
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['time', 'op', 'key', 'size'])
+            writer.writerows(rows)
+        return len(rows)
+
+    def __len__(self):
+        return sum(len(shard.cache) for shard in self._shards)
@@ -0,0 +1,306 @@
+import random
+import numpy as np
+
+from training_window import TrainingWindow
+
+
+class StreamingDetector:
+    """
+    Base class for incrementally learning anomaly detectors.
+
+    Subclasses implement _fit(X) (optional warm start), _learn(x) and
+    _decision(x), where _decision is higher for more normal points, like
+    IsolationForest.score_samples. The decision threshold (offset) is the
+    contamination percentile of recent decision values, recomputed once
+    per threshold_window points from a bounded TrainingWindow, so update
+    and predict cost O(1) amortised per point.
+    """
+
+    name = 'base'
+    # attributes saved by state(); subclasses extend
+    _state = ('offset', 'n_seen', '_since_threshold')
+
+    def __init__(self, contamination=0.1, threshold_window=250):
+        self.contamination = contamination
+        self.threshold_window = threshold_window
+        self.offset = None
+        self.n_seen = 0
+        self._recent = TrainingWindow(threshold_window)
+        self._since_threshold = 0
+
+    @property
+    def ready(self):
+        return self.offset is not None
+
+    def fit(self, X):
+        """Warm start from a batch of points."""
+        X = np.asarray(X, dtype=float)
+        self._fit(X)
+        self.n_seen += len(X)
+        decisions = self.decision_function(X)
+        for d in decisions[-self.threshold_window:]:
+            self._recent.append([d])
+        self.offset = float(np.percentile(decisions, 100.0 * self.contamination))
+
+    def learn_one(self, x):
+        """Score x against the current model, then learn from it."""
+        x = np.asarray(x, dtype=float).ravel()
+        if self._can_score():
+            self._recent.append([self._decision(x)])
+        self._learn(x)
+        self.n_seen += 1
+        self._since_threshold += 1
+        if self._since_threshold >= self.threshold_window and len(self._recent):
+            self._since_threshold = 0
+            self.offset = float(np.percentile(self._recent.array(),
+                                              100.0 * self.contamination))
+
+    def _can_score(self):
+        """Whether the model has enough state to produce decisions."""
+        return True
+
+    def decision_function(self, X):
+        """Raw decision values; points below self.offset are anomalies."""
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        return np.array([self._decision(x) for x in X])
+
+    def predict_one(self, x):
+        if not self.ready:
+            return 1
+        x = np.asarray(x, dtype=float).ravel()
+        return 1 if self._decision(x) - self.offset >= 0 else -1
+
+    def predict(self, X):
+        if not self.ready:
+            return np.ones(len(X), dtype=int)
+        return np.where(self.decision_function(X) - self.offset < 0, -1, 1)
+
+    def score_one(self, x):
+        """Anomaly score on the [0, 1] scale of AnomalyDetector.score()."""
+        if not self.ready:
+            return 0.0
+        x = np.asarray(x, dtype=float).ravel()
+        margin = (self._decision(x) - self.offset) / (abs(self.offset) or 1.0)
+        return float(np.clip(0.5 - 0.5 * margin, 0, 1))
+
+    def nbytes(self):
+        """Approximate model state size in bytes."""
+        return self._recent.nbytes()
+
+    def state(self):
+        """(arrays, scalars) for persistence; None attributes are skipped."""
+        arrays, scalars = {'recent': self._recent.array()}, {}
+        for name in self._state:
+            value = getattr(self, name)
+            if isinstance(value, np.ndarray):
+                arrays[name] = value
+            elif value is not None:
+                scalars[name] = value.item() if isinstance(value, np.generic) else value
+        return arrays, scalars
+
+    def set_state(self, arrays, scalars):
+        for name in self._state:
+            if name in arrays:
+                setattr(self, name, np.array(arrays[name]))
+            elif name in scalars:
+                setattr(self, name, scalars[name])
+        self._recent.clear()
+        for row in arrays['recent']:
+            self._recent.append(row)
+
+
+class HalfSpaceTrees(StreamingDetector):
+    """
+    Streaming Half-Space Trees (Tan, Ting & Liu, 2011).
+
+    Each tree is a complete binary tree of fixed height over a randomly
+    perturbed work space; an internal node halves the range of one random
+    feature. Nodes keep two mass counters: r (reference window) and l
+    (latest window). A point's decision value is the sum over trees of
+    r(node) * 2^depth at the deepest node on its path whose reference mass
+    is still above size_limit (as a fraction of the reference window), so
+    points in sparse regions score low.
+    Every window_size points the latest masses become the reference.
+    Update and score cost O(n_trees * height) per point.
+    """
+
+    name = 'hst'
+    _state = StreamingDetector._state + ('feature', 'split', 'r', 'l',
+                                         'ref_count', '_count')
+
+    def __init__(self, contamination=0.1, n_trees=25, height=8,
+                 window_size=250, size_limit=0.1, seed=None):
+        super().__init__(contamination, threshold_window=window_size)
+        self.n_trees = n_trees
+        self.height = height
+        self.window_size = window_size
+        self.size_limit = size_limit
+        self.rng = random.Random(seed)
+        self.feature = None        # (n_trees, 2^height - 1) split features
+        self.split = None          # (n_trees, 2^height - 1) split values
+        self.r = None              # (n_trees, 2^(height+1) - 1) masses
+        self.l = None
+        self.ref_count = 0
+        self._count = 0
+        self._pending = []         # points buffered before the work space exists
+
+    def _build(self, X):
+        mins, maxs = X.min(axis=0), X.max(axis=0)
+        n_features = X.shape[1]
+        n_internal = 2 ** self.height - 1
+        n_nodes = 2 ** (self.height + 1) - 1
+        self.feature = np.zeros((self.n_trees, n_internal), dtype=np.intp)
+        self.split = np.zeros((self.n_trees, n_internal))
+        for t in range(self.n_trees):
+            lo = np.empty(n_features)
+            hi = np.empty(n_features)
+            for q in range(n_features):
+                s = self.rng.uniform(mins[q], maxs[q])
+                sigma = 2.0 * max(s - mins[q], maxs[q] - s, 1e-9)
+                lo[q], hi[q] = s - sigma, s + sigma
+            ranges = {0: (lo, hi)}
+            for k in range(n_internal):
+                lo_k, hi_k = ranges.pop(k)
+                q = self.rng.randrange(n_features)
+                mid = (lo_k[q] + hi_k[q]) / 2.0
+                self.feature[t, k] = q
+                self.split[t, k] = mid
+                left_hi = hi_k.copy()
+                left_hi[q] = mid
+                right_lo = lo_k.copy()
+                right_lo[q] = mid
+                if 2 * k + 1 < n_internal:
+                    ranges[2 * k + 1] = (lo_k, left_hi)
+                    ranges[2 * k + 2] = (right_lo, hi_k)
+        self.r = np.zeros((self.n_trees, n_nodes))
+        self.l = np.zeros((self.n_trees, n_nodes))
+
+    def _paths(self, x):
+        """Node index per (depth, tree) for depths 0..height."""
+        trees = np.arange(self.n_trees)
+        nodes = np.zeros(self.n_trees, dtype=np.intp)
+        path = [nodes]
+        for _ in range(self.height):
+            go_right = x[self.feature[trees, nodes]] > self.split[trees, nodes]
+            nodes = 2 * nodes + 1 + go_right
+            path.append(nodes)
+        return np.array(path)
+
+    def _fit(self, X):
+        self._build(X)
+        trees = np.arange(self.n_trees)
+        for x in X:
+            self.r[trees, self._paths(x)] += 1
+        self.ref_count = len(X)
+
+    def _learn(self, x):
+        if self.feature is None:
+            self._pending.append(x)
+            if len(self._pending) >= self.window_size:
+                X = np.array(self._pending)
+                self._pending = []
+                self.fit(X)
+                self.n_seen -= len(X)   # already counted by learn_one
+            return
+        trees = np.arange(self.n_trees)
+        self.l[trees, self._paths(x)] += 1
+        self._count += 1
+        if self._count >= self.window_size:
+            self.r, self.l = self.l, self.r
+            self.l[:] = 0
+            self.ref_count = self._count
+            self._count = 0
+
+    def _can_score(self):
+        return self.feature is not None
+
+    def _decision(self, x):
+        if self.feature is None:
+            return 0.0
+        path = self._paths(x)                          # (height + 1, n_trees)
+        trees = np.arange(self.n_trees)
+        mass = self.r[trees, path]
+        limit = self.size_limit * self.ref_count
+        # deepest depth whose mass is above the limit (root always counts)
+        above = mass > limit
+        above[0] = True
+        depth = self.height - np.argmax(above[::-1], axis=0)
+        # masses as fractions of the reference window, so decisions stay
+        # comparable when the reference is swapped
+        return float((mass[depth, trees] * 2.0 ** depth).sum() / self.ref_count)
+
+    def nbytes(self):
+        arrays = (self.feature, self.split, self.r, self.l)
+        return super().nbytes() + sum(a.nbytes for a in arrays if a is not None)
+
+
+class EWMAMahalanobis(StreamingDetector):
+    """
+    Exponentially weighted mean and covariance with a Mahalanobis score.
+
+        mu_t    = mu_{t-1} + w * (x - mu_{t-1})
+        S_t     = (1 - w) * (S_{t-1} + w * (x - mu_{t-1})(x - mu_{t-1})^T)
+        d^2(x)  = (x - mu)^T S^-1 (x - mu)
+
+    The decision value is -d^2(x). Until 1/w points have been seen the
+    gain is 1/n, i.e. a plain running mean and covariance. O(d^2) per
+    point (d = 2 features here) with no stored history.
+    """
+
+    name = 'mahalanobis'
+    _state = StreamingDetector._state + ('mean', 'cov', 'inv', '_n')
+
+    def __init__(self, contamination=0.1, weight=0.01, threshold_window=250,
+                 ridge=1e-6):
+        super().__init__(contamination, threshold_window)
+        self.weight = weight
+        self.ridge = ridge
+        self.mean = None
+        self.cov = None
+        self.inv = None
+        self._n = 0
+
+    def _fit(self, X):
+        self.mean = X.mean(axis=0)
+        self.cov = np.atleast_2d(np.cov(X.T, bias=True))
+        self._n = len(X)
+        self._invert()
+
+    def _invert(self):
+        d = len(self.mean)
+        self.inv = np.linalg.inv(self.cov + self.ridge * np.eye(d))
+
+    def _learn(self, x):
+        if self.mean is None:
+            self.mean = x.copy()
+            self.cov = np.zeros((len(x), len(x)))
+            self._n = 1
+            self._invert()
+            return
+        self._n += 1
+        w = max(self.weight, 1.0 / self._n)
+        diff = x - self.mean
+        self.mean = self.mean + w * diff
+        self.cov = (1 - w) * (self.cov + w * np.outer(diff, diff))
+        self._invert()
+
+    def _can_score(self):
+        return self._n >= 2
+
+    def _decision(self, x):
+        if self.mean is None:
+            return 0.0
+        diff = x - self.mean
+        return -float(diff @ self.inv @ diff)
+
+    def nbytes(self):
+        arrays = (self.mean, self.cov, self.inv)
+        return super().nbytes() + sum(a.nbytes for a in arrays if a is not None)
+
+
+BACKENDS = {
+    HalfSpaceTrees.name: HalfSpaceTrees,
+    EWMAMahalanobis.name: EWMAMahalanobis,
+}
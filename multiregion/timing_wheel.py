@@ -0,0 +1,143 @@
+import math
+
+
+class TimingWheel:
+    """
+    Hierarchical timing wheel (Varghese & Lauck, 1987) for key expiry.
+
+    Time is counted in ticks of `tick` seconds. Level 0 has one slot per
+    tick; each slot of level i spans slots**i ticks. A key is placed in
+    the lowest level whose range covers its deadline, so schedule() and
+    cancel() are O(1). advance() walks the elapsed ticks: it empties the
+    level-0 slot of each tick and, whenever a level wraps round, cascades
+    the next slot of the level above down to finer levels. Every key
+    moves down at most `levels` times, so sweeping is amortised O(1) per
+    key. Ticks that cannot fire anything are skipped: with the finest
+    occupied level L, advance() jumps to the next multiple of slots**L
+    (straight to now if the wheel is empty), so an idle period costs
+    O(levels) rather than one step per elapsed tick. Deadlines beyond the
+    wheel's range (slots**levels ticks) are parked in the top level and
+    rescheduled as they come closer.
+
+    The wheel is not thread-safe; SmartCache drives it under a shard lock.
+    """
+
+    def __init__(self, tick=1.0, slots=64, levels=4, now=0.0):
+        """
+        Parameters
+        ----------
+        tick : float
+            Resolution in seconds; keys expire up to one tick late.
+        slots : int
+            Slots per level.
+        levels : int
+            Number of levels; the wheel spans slots**levels ticks.
+        now : float
+            Current time (same clock as the deadlines).
+        """
+        if tick <= 0:
+            raise ValueError("tick must be > 0")
+        if slots < 2 or levels < 1:
+            raise ValueError("need slots >= 2 and levels >= 1")
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.current = int(now // tick)
+        self.wheels = [[set() for _ in range(slots)] for _ in range(levels)]
+        self.counts = [0] * levels       # keys filed in each level
+        self.where = {}                  # key -> (level, slot, deadline tick)
+        self._due = set()                # deadlines already reached
+
+    def __len__(self):
+        return len(self.where)
+
+    def __contains__(self, key):
+        return key in self.where
+
+    def schedule(self, key, expires_at):
+        """(Re)schedule key to expire at time expires_at."""
+        self.cancel(key)
+        self._place(key, math.ceil(expires_at / self.tick))
+
+    def cancel(self, key):
+        """Forget key; no-op if it is not scheduled."""
+        entry = self.where.pop(key, None)
+        if entry is None:
+            return
+        level, slot, _ = entry
+        if level is None:
+            self._due.discard(key)
+        else:
+            self.wheels[level][slot].discard(key)
+            self.counts[level] -= 1
+
+    def advance(self, now):
+        """Move the wheel to time now; returns the keys whose deadline passed."""
+        expired = list(self._due)
+        for key in expired:
+            del self.where[key]
+        self._due.clear()
+
+        target = int(now // self.tick)
+        while self.current < target:
+            lowest = next((level for level, n in enumerate(self.counts) if n), None)
+            if lowest is None:
+                self.current = target    # nothing filed: no tick can fire
+                break
+            if lowest > 0:
+                # Levels below are empty, so nothing happens before level
+                # `lowest` next cascades, at a multiple of slots**lowest
+                span = self.slots ** lowest
+                boundary = (self.current // span + 1) * span
+                if boundary > target:
+                    self.current = target
+                    break
+                self.current = boundary - 1
+            self._step(expired)
+        # Keys cascaded straight to due on the final tick
+        for key in self._due:
+            del self.where[key]
+        expired.extend(self._due)
+        self._due.clear()
+        return expired
+
+    def _step(self, expired):
+        """Advance one tick, appending keys that came due to expired."""
+        self.current += 1
+        # Cascade every level that wrapped round on this tick
+        level = 1
+        while level < self.levels and self.current % self.slots ** level == 0:
+            slot = (self.current // self.slots ** level) % self.slots
+            keys = self.wheels[level][slot]
+            self.wheels[level][slot] = set()
+            self.counts[level] -= len(keys)
+            for key in keys:
+                self._place(key, self.where[key][2])
+            level += 1
+        keys = self.wheels[0][self.current % self.slots]
+        self.wheels[0][self.current % self.slots] = set()
+        self.counts[0] -= len(keys)
+        for key in keys:
+            deadline = self.where[key][2]
+            if deadline <= self.current:
+                del self.where[key]
+                expired.append(key)
+            else:
+                self._place(key, deadline)
+
+    def _place(self, key, deadline):
+        delta = deadline - self.current
+        if delta <= 0:
+            self.where[key] = (None, None, deadline)
+            self._due.add(key)
+            return
+        # Park deadlines beyond the top level's range at its far edge
+        at = min(deadline, self.current + self.slots ** self.levels - 1)
+        delta = at - self.current
+        level = 0
+        while delta >= self.slots ** (level + 1):
+            level += 1
+        slot = (at // self.slots ** level) % self.slots
+        self.wheels[level][slot].add(key)
+        self.counts[level] += 1
+        self.where[key] = (level, slot, deadline)
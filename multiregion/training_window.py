@@ -0,0 +1,84 @@
+import random
+import numpy as np
+
+
+class TrainingWindow:
+    """
+    Fixed-capacity buffer of feature vectors for AnomalyDetector retraining.
+
+    Samples live in one preallocated (capacity, n_features) float64 array,
+    so memory and the cost of array() are bounded by capacity no matter how
+    long the process runs. Two retention policies:
+
+        'sliding'   : ring buffer holding the most recent `capacity`
+                      samples; array() returns them oldest first.
+        'reservoir' : Vitter's Algorithm R, a uniform random sample of
+                      every point seen so far.
+
+    The sliding window follows drift; the reservoir keeps a long-term
+    baseline that a short burst of anomalies cannot displace.
+    """
+
+    POLICIES = ('sliding', 'reservoir')
+
+    def __init__(self, capacity=1000, policy='sliding', seed=None):
+        """
+        Parameters
+        ----------
+        capacity : int
+            Maximum number of samples retained.
+        policy : str
+            'sliding' or 'reservoir'.
+        seed : int, optional
+            Seed for reservoir replacement decisions.
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown retention policy: {policy}")
+        self.capacity = capacity
+        self.policy = policy
+        self.rng = random.Random(seed)
+        self._data = None          # allocated on first append
+        self._size = 0
+        self._next = 0             # ring write position
+        self.total_seen = 0
+
+    def append(self, point):
+        x = np.asarray(point, dtype=float).ravel()
+        if self._data is None:
+            self._data = np.empty((self.capacity, x.size))
+        self.total_seen += 1
+
+        if self._size < self.capacity:
+            slot = self._size
+            self._size += 1
+        elif self.policy == 'sliding':
+            slot = self._next
+        else:
+            # Algorithm R: keep the new point with probability capacity/n
+            slot = self.rng.randrange(self.total_seen)
+            if slot >= self.capacity:
+                return
+        self._data[slot] = x
+        self._next = (slot + 1) % self.capacity
+
+    def array(self):
+        """Copy of the retained samples, oldest first for 'sliding'."""
+        if self._data is None:
+            return np.empty((0, 0))
+        if self.policy == 'sliding' and self._size == self.capacity:
+            return np.concatenate((self._data[self._next:],
+                                   self._data[:self._next]))
+        return self._data[:self._size].copy()
+
+    def clear(self):
+        self._size = 0
+        self._next = 0
+        self.total_seen = 0
+
+    def nbytes(self):
+        return 0 if self._data is None else self._data.nbytes
+
+    def __len__(self):
+        return self._size
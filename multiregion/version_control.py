@@ -1,7 +1,11 @@
 import os
 import json
+import time
+import queue
 import hashlib
 import sqlite3
+import threading
+from concurrent.futures import Future
 from datetime import datetime
 import pandas as pd
 
@@ -11,26 +15,297 @@ class VersionControlEncoder(json.JSONEncoder):
             return obj.strftime('%Y-%m-%d %H:%M:%S')
         return super().default(obj)
 
+class ConnectionManager:
+    """
+    Per-thread persistent SQLite connections.
+
+    Each thread gets one connection on first use and keeps it, so callers
+    stop paying connect/close (and schema parsing) per operation. Every
+    connection is configured with WAL journaling (readers never block the
+    writer), synchronous=FULL (the WAL is synced on every commit, so a
+    committed row survives a power loss) and a larger page cache. SQL
+    strings are reused verbatim, so sqlite3's per-connection statement
+    cache serves them prepared. synchronous='NORMAL' syncs only at WAL
+    checkpoints instead: a power loss can drop the last commits but never
+    corrupts the database.
+    """
+
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA cache_size=-8192",      # KiB, i.e. 8 MB
+        "PRAGMA temp_store=MEMORY",
+    )
+
+    def __init__(self, db_path, cached_statements=64, synchronous='FULL'):
+        if synchronous not in ('OFF', 'NORMAL', 'FULL', 'EXTRA'):
+            raise ValueError(f"Unknown synchronous mode: {synchronous}")
+        self.db_path = db_path
+        self.cached_statements = cached_statements
+        self.synchronous = synchronous
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def get(self):
+        """This thread's connection, opened and configured on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path,
+                                   cached_statements=self.cached_statements,
+                                   check_same_thread=False)
+            for pragma in self.PRAGMAS:
+                conn.execute(pragma)
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close_all(self):
+        """Close every thread's connection (call once no thread uses them)"""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
 class DataVersionControl:
-    def __init__(self, base_dir):
+    """
+    Content-addressed version store: payloads as <checksum>.json blobs,
+    metadata rows in SQLite.
+
+    With group_commit (default), save_version() writes the blob and queues
+    the metadata row; a single writer thread takes the first queued row,
+    keeps collecting for at most max_delay seconds or until max_batch rows
+    are queued, and inserts the batch in one transaction. One commit (and
+    at most one sync) is then paid per batch instead of per packet, so
+    write throughput grows with load instead of being capped by commit
+    latency. save_version() returns a 'committed' Future that resolves
+    once its row's transaction has committed. The store defaults to
+    synchronous='FULL', so that commit is also synced to disk and the
+    Future means durable; group commit is what keeps that affordable.
+    With synchronous='NORMAL' it only means committed, not yet synced.
+    Reads first wait for rows already queued, so a read always sees
+    earlier saves.
+    """
+
+    # Every lookup is a range scan of idx_versions_path_time (which also
+    # holds the rowid, the tie-break), so its cost depends on the file's
+    # own history, not on the size of the table.
+    INSERT_VERSION = ("INSERT INTO versions (checksum, file_path, timestamp, metadata) "
+                      "VALUES (?, ?, ?, ?)")
+    SELECT_NTH_OLDEST = ("SELECT checksum FROM versions WHERE file_path=? "
+                         "ORDER BY timestamp ASC, id ASC LIMIT 1 OFFSET ?")
+    SELECT_NTH_NEWEST = ("SELECT checksum FROM versions WHERE file_path=? "
+                         "ORDER BY timestamp DESC, id DESC LIMIT 1 OFFSET ?")
+    SELECT_BETWEEN = ("SELECT id, checksum, timestamp, metadata FROM versions "
+                      "WHERE file_path=? AND timestamp BETWEEN ? AND ? "
+                      "ORDER BY timestamp ASC, id ASC")
+    COUNT_VERSIONS = "SELECT COUNT(*) FROM versions WHERE file_path=?"
+
+    def __init__(self, base_dir, group_commit=True, max_batch=256, max_delay=0.0,
+                 synchronous='FULL'):
+        """
+        Parameters
+        ----------
+        base_dir : str
+            Directory the versioned files live under; metadata and blobs go
+            to <base_dir>/.versions.
+        group_commit : bool
+            Batch metadata writes on a writer thread (False: commit inside
+            each save_version() call).
+        max_batch : int
+            Most rows committed per transaction.
+        max_delay : float
+            Seconds the writer waits for more rows after the first arrives
+            (0: commit whatever queued up during the previous commit).
+        synchronous : str
+            SQLite synchronous pragma: 'FULL' (sync every commit, so
+            'committed' means durable) or 'NORMAL' (sync at WAL
+            checkpoints; 'committed' rows can be lost on power failure).
+        """
         self.base_dir = base_dir
         self.version_dir = os.path.join(base_dir, '.versions')
         self.db_path = os.path.join(self.version_dir, 'version_history.db')
+        self.group_commit = group_commit
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.synchronous = synchronous
+        self.batches = 0
+        self.records = 0
+        self._stats_lock = threading.Lock()
         self._initialize()
+        self._queue = queue.Queue()
+        self._writer = None
+        if group_commit:
+            self._writer = threading.Thread(target=self._write_loop, daemon=True)
+            self._writer.start()
     
     def _initialize(self):
         """Initialize version control system with SQLite"""
         os.makedirs(self.version_dir, exist_ok=True)
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        # Create a table that mimics a production-grade metadata store
-        c.execute('''CREATE TABLE IF NOT EXISTS versions
-                     (checksum TEXT PRIMARY KEY,
-                      file_path TEXT,
-                      timestamp TEXT,
-                      metadata TEXT)''')
-        conn.commit()
-        conn.close()
+        self.connections = ConnectionManager(self.db_path, synchronous=self.synchronous)
+        conn = self.connections.get()
+        self._migrate_v1(conn)
+        with conn:
+            # One row per saved version; id is the rowid, i.e. the save order
+            conn.execute('''CREATE TABLE IF NOT EXISTS versions
+                            (id INTEGER PRIMARY KEY,
+                             checksum TEXT NOT NULL,
+                             file_path TEXT NOT NULL,
+                             timestamp TEXT NOT NULL,
+                             metadata TEXT)''')
+            conn.execute('''CREATE INDEX IF NOT EXISTS idx_versions_path_time
+                            ON versions (file_path, timestamp)''')
+
+    @staticmethod
+    def _needs_migration(conn):
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(versions)")]
+        leftover = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' "
+                                "AND name='versions_v1'").fetchone()
+        return (columns and 'id' not in columns) or leftover is not None
+
+    @classmethod
+    def _migrate_v1(cls, conn):
+        """
+        Move rows from the original checksum-keyed, unindexed table.
+
+        The whole move runs in one explicit BEGIN IMMEDIATE ... COMMIT
+        (the sqlite3 module's implicit transactions do not span the DDL),
+        so a crash part way leaves the v1 table untouched. A versions_v1
+        table left by an older, non-atomic migration is migrated again.
+        """
+        if not cls._needs_migration(conn):
+            return
+        isolation_level = conn.isolation_level
+        conn.isolation_level = None
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Re-check under the write lock: another process may have won
+                if cls._needs_migration(conn):
+                    columns = [row[1] for row in
+                               conn.execute("PRAGMA table_info(versions)")]
+                    if columns and 'id' not in columns:
+                        conn.execute("ALTER TABLE versions RENAME TO versions_v1")
+                    else:
+                        conn.execute("DROP TABLE IF EXISTS versions")
+                    conn.execute('''CREATE TABLE versions
+                                    (id INTEGER PRIMARY KEY,
+                                     checksum TEXT NOT NULL,
+                                     file_path TEXT NOT NULL,
+                                     timestamp TEXT NOT NULL,
+                                     metadata TEXT)''')
+                    conn.execute('''INSERT INTO versions (checksum, file_path, timestamp, metadata)
+                                    SELECT checksum, file_path, timestamp, metadata
+                                    FROM versions_v1 ORDER BY timestamp''')
+                    conn.execute("DROP TABLE versions_v1")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.isolation_level = isolation_level
+    
+    def close(self):
+        """Commit queued rows, stop the writer and close all connections"""
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+            # Rows queued after the stop marker are never committed
+            self._fail_pending(RuntimeError("DataVersionControl is closed"))
+        self.connections.close_all()
+
+    def _fail_pending(self, error):
+        """Fail the futures of every row still queued"""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None and not item[1].done():
+                item[1].set_exception(error)
+            self._queue.task_done()
+
+    def flush(self, timeout=None):
+        """Wait until every row queued so far has been committed"""
+        if self._writer is None or self._queue.unfinished_tasks == 0:
+            return
+        barrier = Future()
+        self._queue.put((None, barrier))
+        barrier.result(timeout)
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'records': self.records,
+            'mean_batch_size': self.records / self.batches if self.batches else 0.0,
+            'queued': self._queue.qsize(),
+        }
+
+    # ------------------------------------------------------------------
+    # Group-commit writer thread
+    # ------------------------------------------------------------------
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            batch = [item]
+            stopping = False
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = (self._queue.get(timeout=remaining) if remaining > 0
+                            else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                self._commit(batch)
+            except Exception as e:
+                # Keep the writer alive: fail this batch, not every later one
+                print(f"Version writer error: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stopping:
+                self._queue.task_done()
+                return
+
+    def _commit(self, batch):
+        rows = [row for row, _ in batch if row is not None]
+        error = None
+        if rows:
+            try:
+                conn = self.connections.get()
+                with conn:
+                    conn.executemany(self.INSERT_VERSION, rows)
+            except Exception as e:
+                print(f"Database error: {e}")
+                error = e
+        for _, future in batch:
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(True)
+            else:
+                future.set_exception(error)
+        if rows:
+            # Without group commit, saving threads commit concurrently
+            with self._stats_lock:
+                self.batches += 1
+                self.records += len(rows)
     
     def _calculate_checksum(self, data):
         """Calculate SHA-256 checksum"""
@@ -39,7 +314,12 @@ class DataVersionControl:
         return hashlib.sha256(data).hexdigest()
     
     def save_version(self, file_path, data, metadata=None):
-        """Save a new version using Transactional SQL"""
+        """
+        Save a new version: write the payload blob, then record its
+        metadata row. Returns {'checksum', 'timestamp', 'committed'}, where
+        'committed' is a Future resolving to True once the row is committed
+        (or raising the database error).
+        """
         relative_path = os.path.relpath(file_path, self.base_dir)
         checksum = self._calculate_checksum(data)
         timestamp = datetime.now().isoformat()
@@ -50,40 +330,72 @@ class DataVersionControl:
         with open(version_path, 'w') as f:
             json.dump({'data': data}, f, cls=VersionControlEncoder)
         
-        # 2. Write metadata to SQLite (Atomic Transaction)
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        try:
-            c.execute("INSERT OR REPLACE INTO versions VALUES (?, ?, ?, ?)",
-                      (checksum, relative_path, timestamp, meta_json))
-            conn.commit()
-        except sqlite3.Error as e:
-            print(f"Database error: {e}")
-        finally:
-            conn.close()
+        # 2. Write metadata to SQLite (Atomic Transaction, group-committed)
+        row = (checksum, relative_path, timestamp, meta_json)
+        committed = Future()
+        if self._writer is not None:
+            self._queue.put((row, committed))
+        else:
+            self._commit([(row, committed)])
         
-        return {'checksum': checksum, 'timestamp': timestamp}
+        return {'checksum': checksum, 'timestamp': timestamp, 'committed': committed}
     
     def get_version(self, file_path, version_index=-1):
-        """Retrieve version using SQL query"""
+        """
+        Retrieve a version's data. version_index counts from the oldest
+        version (0, 1, ...) or back from the latest (-1, -2, ...).
+        """
         relative_path = os.path.relpath(file_path, self.base_dir)
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        # Get all versions for this file, ordered by time
-        c.execute("SELECT checksum FROM versions WHERE file_path=? ORDER BY timestamp ASC", (relative_path,))
-        rows = c.fetchall()
-        conn.close()
+        self.flush()
+        conn = self.connections.get()
         
-        if not rows:
+        # Fetch only the requested row, walking the index from either end
+        if version_index >= 0:
+            row = conn.execute(self.SELECT_NTH_OLDEST,
+                               (relative_path, version_index)).fetchone()
+        else:
+            row = conn.execute(self.SELECT_NTH_NEWEST,
+                               (relative_path, -version_index - 1)).fetchone()
+        if row is None:
             return None
-            
+        return self._load_blob(row[0])
+
+    def get_latest(self, file_path):
+        """Data of the most recent version, or None"""
+        return self.get_version(file_path, -1)
+
+    def get_versions_between(self, file_path, start, end):
+        """
+        Versions of file_path saved between start and end (inclusive;
+        datetimes or ISO-8601 strings), oldest first, as dicts with id,
+        checksum, timestamp and metadata.
+        """
+        relative_path = os.path.relpath(file_path, self.base_dir)
+        if isinstance(start, datetime):
+            start = start.isoformat()
+        if isinstance(end, datetime):
+            end = end.isoformat()
+        self.flush()
+        conn = self.connections.get()
+        return [
+            {'id': vid, 'checksum': checksum, 'timestamp': timestamp,
+             'metadata': json.loads(metadata) if metadata else {}}
+            for vid, checksum, timestamp, metadata in
+            conn.execute(self.SELECT_BETWEEN, (relative_path, start, end))
+        ]
+
+    def count_versions(self, file_path):
+        relative_path = os.path.relpath(file_path, self.base_dir)
+        self.flush()
+        conn = self.connections.get()
+        return conn.execute(self.COUNT_VERSIONS, (relative_path,)).fetchone()[0]
+
+    def _load_blob(self, checksum):
+        version_path = os.path.join(self.version_dir, f"{checksum}.json")
         try:
-            target_checksum = rows[version_index][0]
-            version_path = os.path.join(self.version_dir, f"{target_checksum}.json")
             with open(version_path, 'r') as f:
                 return json.load(f)['data']
-        except (IndexError, FileNotFoundError):
+        except FileNotFoundError:
             return None
 
     def rollback(self, file_path, version_index=-1):
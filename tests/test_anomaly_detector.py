@@ -0,0 +1,72 @@
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.abspath(os.path.join(current_dir, '..'))
+multiregion_dir = os.path.join(parent_dir, 'multiregion')
+for p in (parent_dir, multiregion_dir):
+    if p not in sys.path:
+        sys.path.append(p)
+
+from anomaly_detector import AnomalyDetector
+
+
+def _normal_points(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.column_stack((rng.uniform(20, 30, n), rng.uniform(40, 60, n)))
+
+
+def test_background_retrain_swaps_model_under_concurrent_scoring():
+    detector = AnomalyDetector(background=True, retrain_every=10)
+    for point in _normal_points(25):
+        detector.update(point)
+    deadline = time.monotonic() + 10
+    while not detector.trained and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert detector.trained
+
+    stop = threading.Event()
+    errors = []
+    seen_models = set()
+    results = set()
+
+    def scorer():
+        point = [25.0, 50.0]
+        while not stop.is_set():
+            try:
+                seen_models.add(id(detector.compiled))
+                results.add(detector.predict(point))
+                assert 0.0 <= detector.score(point) <= 1.0
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=scorer) for _ in range(2)]
+    for t in threads:
+        t.start()
+    try:
+        first = detector.retrain_count
+        points = _normal_points(30, seed=1)
+        for chunk in (points[:10], points[10:20], points[20:]):
+            # retrain_every=10: each chunk requests one retrain, which the
+            # worker fits while the scorers keep running
+            before = detector.retrain_count
+            for point in chunk:
+                detector.update(point)
+            while detector.retrain_count == before and time.monotonic() < deadline:
+                time.sleep(0.01)
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+        detector.stop()
+
+    assert errors == []
+    assert detector.retrain_count == first + 3
+    assert len(seen_models) >= 2           # scorers saw the swap happen
+    assert results <= {1, -1}
+    assert detector.predict([25.0, 50.0]) == 1
+    assert detector.predict([90.0, 5.0]) == -1
@@ -0,0 +1,52 @@
+import os
+import sys
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.abspath(os.path.join(current_dir, '..'))
+multiregion_dir = os.path.join(parent_dir, 'multiregion')
+for p in (parent_dir, multiregion_dir):
+    if p not in sys.path:
+        sys.path.append(p)
+
+from anomaly_detector import AnomalyDetector
+from batch_scorer import BatchScorer
+
+
+def _trained_detector():
+    rng = np.random.default_rng(0)
+    detector = AnomalyDetector(retrain_every=10 ** 6)
+    for point in np.column_stack((rng.uniform(20, 30, 200), rng.uniform(40, 60, 200))):
+        detector.update(point)
+    return detector
+
+
+def _points():
+    rng = np.random.default_rng(1)
+    normal = np.column_stack((rng.uniform(20, 30, 60), rng.uniform(40, 60, 60)))
+    outliers = np.column_stack((rng.uniform(80, 100, 20), rng.uniform(0, 10, 20)))
+    return np.vstack((normal, outliers))
+
+
+def test_predict_batch_matches_single_point_predict():
+    detector = _trained_detector()
+    points = _points()
+    single = [detector.predict(point) for point in points]
+    assert detector.predict_batch(points).tolist() == single
+    assert set(single) == {1, -1}
+
+
+def test_batch_scorer_matches_single_point_predict():
+    detector = _trained_detector()
+    points = _points()
+    scorer = BatchScorer(detector, max_batch_size=16, max_wait=0.05)
+    try:
+        futures = [scorer.submit(point) for point in points]
+        results = [future.result(5) for future in futures]
+    finally:
+        scorer.stop()
+    assert results == [detector.predict(point) for point in points]
+    stats = scorer.stats()
+    assert stats['points'] == len(points)
+    assert stats['mean_batch_size'] > 1
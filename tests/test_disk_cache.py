@@ -0,0 +1,113 @@
+import os
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.abspath(os.path.join(current_dir, '..'))
+multiregion_dir = os.path.join(parent_dir, 'multiregion')
+for p in (parent_dir, multiregion_dir):
+    if p not in sys.path:
+        sys.path.append(p)
+
+from disk_cache import DiskCache, _HEADER
+from smart_cache import SmartCache
+
+LATER = time.time() + 3600
+
+
+def test_records_survive_close_and_reopen(tmp_path):
+    path = str(tmp_path / 'tier.bin')
+    disk = DiskCache(path, max_bytes=8192)
+    disk.put('a', {'temperature': 21.5}, LATER)
+    disk.put('b', [1, 2, 3], LATER)
+    disk.put('a', {'temperature': 22.0}, LATER)
+    disk.discard('b')
+    disk.close()
+
+    disk = DiskCache(path, max_bytes=8192)
+    try:
+        assert disk.get('a') == ({'temperature': 22.0}, LATER)
+        assert disk.get('b') is None
+        assert len(disk) == 1
+    finally:
+        disk.close()
+
+
+def test_crc_mismatch_drops_record(tmp_path):
+    path = str(tmp_path / 'tier.bin')
+    disk = DiskCache(path, max_bytes=8192)
+    disk.put('a', 'first', LATER)
+    disk.put('b', 'second', LATER)
+    offset = disk.index['b'][0]
+    disk.close()
+
+    with open(path, 'r+b') as f:
+        f.seek(offset + _HEADER.size + 3)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xff]))
+
+    disk = DiskCache(path, max_bytes=8192)
+    try:
+        assert disk.get('a') == ('first', LATER)
+        assert disk.get('b') is None
+        assert 'b' not in disk
+    finally:
+        disk.close()
+
+
+def test_compaction_keeps_only_live_keys(tmp_path):
+    path = str(tmp_path / 'tier.bin')
+    disk = DiskCache(path, max_bytes=4096)
+    value = 'x' * 100
+    for i in range(100):
+        disk.put(f"key_{i % 5}", f"{value}{i}", LATER)
+    disk.put('expired', value, time.time() - 1)
+    disk.discard('key_4')
+    for i in range(30):
+        disk.put('key_0', f"{value}{i}", LATER)
+    assert disk.compactions >= 1
+    expected = {f"key_{k}": (f"{value}{95 + k}", LATER) for k in (1, 2, 3)}
+    expected['key_0'] = (f"{value}29", LATER)
+    assert {k: disk.get(k) for k in disk.index} == expected
+    assert not os.path.exists(path + '.compact')
+    disk.close()
+
+    disk = DiskCache(path, max_bytes=4096)
+    try:
+        assert set(disk.index) == set(expected)
+        assert disk.get('key_0') == (f"{value}29", LATER)
+    finally:
+        disk.close()
+
+
+def test_closed_disk_cache_is_inert(tmp_path):
+    disk = DiskCache(str(tmp_path / 'tier.bin'), max_bytes=8192)
+    cache = SmartCache(max_size=1, disk_cache=disk)
+    cache.set('a', 1)
+    cache.set('b', 2)                    # demotes 'a'
+    cache.stop()
+    assert disk.closed
+    # Producers still running after shutdown must not raise
+    cache.set('c', 3)
+    assert cache.get('a') is None
+    cache.invalidate('b')
+    cache.clear()
+    disk.flush()
+    disk.close()
+
+
+def test_failed_put_keeps_previous_value(tmp_path):
+    path = str(tmp_path / 'tier.bin')
+    disk = DiskCache(path, max_bytes=4096)
+    disk.put('a', 'old', LATER)
+    assert not disk.put('a', 'x' * 5000, LATER)      # cannot fit
+    assert not disk.put('a', {'timestamp': object()}, LATER)   # cannot marshal
+    assert disk.get('a') == ('old', LATER)
+    disk.close()
+
+    disk = DiskCache(path, max_bytes=4096)
+    try:
+        assert disk.get('a') == ('old', LATER)
+    finally:
+        disk.close()
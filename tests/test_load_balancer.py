@@ -0,0 +1,204 @@
+import os
+import random
+import sys
+import threading
+import time
+
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.abspath(os.path.join(current_dir, '..'))
+multiregion_dir = os.path.join(parent_dir, 'multiregion')
+for p in (parent_dir, multiregion_dir):
+    if p not in sys.path:
+        sys.path.append(p)
+
+from link_estimator import LinkEstimator
+from load_balancer import LoadBalancer
+from routing_strategies import ConsistentHashStrategy, interleave
+
+REGIONS = ['region_1', 'region_2', 'region_3']
+
+
+def test_link_estimator_requires_service_rate():
+    with pytest.raises(ValueError):
+        LoadBalancer(REGIONS, link_estimator=LinkEstimator())
+
+
+def test_link_estimator_requires_service_rate_for_every_region():
+    with pytest.raises(ValueError):
+        LoadBalancer(REGIONS, service_rate={'region_1': 40, 'region_2': 40},
+                     link_estimator=LinkEstimator())
+
+
+def test_latency_aware_routing_redirects_overloaded_region():
+    clock = [0.0]
+    lb = LoadBalancer(REGIONS, alpha=0.7, load_threshold=1000,
+                      service_rate=40, clock=lambda: clock[0],
+                      link_estimator=LinkEstimator())
+    lb.update_load('region_1', 5000)
+    target = lb.get_target_region('region_1', 130)
+    assert target != 'region_1'
+    assert lb.redirect_events == 1
+
+
+def test_consistent_hash_bound_counts_incoming_packet():
+    lb = LoadBalancer(REGIONS, load_threshold=10000,
+                      strategy=ConsistentHashStrategy(REGIONS, c=1.25))
+    # Home is under the bound now (50 <= 1.25 * 150 / 3) but not after
+    # placing the packet (150 > 62.5)
+    lb.update_load('region_1', 50)
+    assert lb.get_target_region('region_1', 100) != 'region_1'
+    # With balanced loads a small packet stays at home
+    lb.update_load('region_2', 50)
+    lb.update_load('region_3', 50)
+    assert lb.get_target_region('region_1', 1) == 'region_1'
+
+
+def test_sharded_reset_keeps_mean_utilisation_consistent():
+    lb = LoadBalancer(REGIONS, load_threshold=10 ** 9, sharded=True)
+    stop = threading.Event()
+
+    def writer(region):
+        while not stop.is_set():
+            lb.update_load(region, 7)
+
+    threads = [threading.Thread(target=writer, args=(r,)) for r in REGIONS]
+    for t in threads:
+        t.start()
+    try:
+        for _ in range(200):
+            lb.reset_counters()
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+    assert lb.mean_utilisation() == sum(lb.region_loads.values()) / 3
+
+
+def test_consistent_hash_same_decisions_sharded_and_global():
+    targets = {}
+    for sharded in (False, True):
+        lb = LoadBalancer(REGIONS, load_threshold=10000, sharded=sharded,
+                          capacities={'region_1': 2.0},
+                          strategy=ConsistentHashStrategy(REGIONS, c=1.1))
+        picks = []
+        for i in range(300):
+            target = lb.get_target_region('region_1', 40 + i % 7, key=f"file_{i}")
+            lb.update_load(target, 40 + i % 7)
+            picks.append(target)
+        assert lb.mean_utilisation() == sum(lb.get_loads().values()) / 4.0
+        targets[sharded] = picks
+    assert targets[False] == targets[True]
+
+
+def test_sharded_reader_retries_while_writer_is_mid_update():
+    writer_inside = threading.Event()
+    release_writer = threading.Event()
+    reader_started = threading.Event()
+
+    def clock():
+        # update_load() reads the clock between its two sequence bumps,
+        # so the writer can be paused with the region's version odd
+        name = threading.current_thread().name
+        if name == 'writer':
+            writer_inside.set()
+            release_writer.wait(5)
+        elif name == 'reader':
+            reader_started.set()
+        return 0.0
+
+    lb = LoadBalancer(REGIONS, sharded=True, service_rate=1, clock=clock)
+    result = []
+    writer = threading.Thread(target=lb.update_load, args=('region_1', 500),
+                              name='writer')
+    reader = threading.Thread(target=lambda: result.append(lb.get_load('region_1')),
+                              name='reader')
+    writer.start()
+    assert writer_inside.wait(5)
+    reader.start()
+    assert reader_started.wait(5)
+    time.sleep(0.1)          # the reader exhausts its optimistic attempts
+    release_writer.set()
+    writer.join(5)
+    reader.join(5)
+    assert result == [500]
+    assert lb.optimistic_retries == LoadBalancer.OPTIMISTIC_RETRIES
+    assert lb.lock_stats()['optimistic_retries'] == LoadBalancer.OPTIMISTIC_RETRIES
+
+
+@pytest.mark.parametrize('sharded', [False, True])
+def test_time_based_load_drains_lazily(sharded):
+    clock = [100.0]
+    lb = LoadBalancer(REGIONS, service_rate={'region_1': 40, 'region_2': 10},
+                      clock=lambda: clock[0], sharded=sharded)
+    lb.update_load('region_1', 1000)
+    lb.update_load('region_2', 1000)
+    lb.update_load('region_3', 1000)
+
+    clock[0] += 2.5
+    assert lb.get_load('region_1') == pytest.approx(1000 - 40 * 2.5)
+    assert lb.get_load('region_2') == pytest.approx(1000 - 10 * 2.5)
+    assert lb.get_load('region_3') == 1000       # no service rate: cumulative
+
+    # New bytes are added on top of the drained load
+    lb.update_load('region_1', 50)
+    clock[0] += 1.0
+    assert lb.get_load('region_1') == pytest.approx(900 + 50 - 40)
+
+    # Never below zero, however long the region idles
+    clock[0] += 3600
+    assert lb.get_load('region_1') == 0
+    lb.update_load('region_1', 30)
+    assert lb.get_load('region_1') == 30
+    assert lb.get_loads()['region_2'] == 0
+
+
+@pytest.mark.parametrize('sharded', [False, True])
+def test_route_batch_matches_one_at_a_time(sharded):
+    rng = random.Random(3)
+    batches = [{region: [rng.randint(50, 400) for _ in range(rng.randint(0, 12))]
+                for region in REGIONS} for _ in range(20)]
+    batches[0]['region_1'] = [900] * 6          # drive region_1 over threshold
+
+    def make():
+        return LoadBalancer(REGIONS, alpha=0.7, load_threshold=1000,
+                            capacities={'region_3': 2.0}, sharded=sharded)
+
+    batched, single = make(), make()
+    for sizes in batches:
+        placed = batched.route_batch(sizes)
+        expected = {ingress: [None] * len(s) for ingress, s in sizes.items()}
+        for ingress, i, size in interleave(sizes):
+            target = single.get_target_region(ingress, size)
+            single.update_load(target, size)
+            expected[ingress][i] = target
+        assert placed == expected
+
+    assert batched.get_loads() == single.get_loads()
+    assert batched.threshold_violations == single.threshold_violations > 0
+    assert batched.redirect_events == single.redirect_events > 0
+    assert batched.predictive_redirects == single.predictive_redirects
+
+
+def test_capacity_weighted_utilisation_routing():
+    lb = LoadBalancer(REGIONS, alpha=0.7, load_threshold=1000,
+                      capacities={'region_2': 4.0},
+                      thresholds={'region_3': 900})
+    assert lb.threshold_for('region_1') == 1000
+    assert lb.threshold_for('region_2') == 4000
+    assert lb.threshold_for('region_3') == 900
+
+    lb.update_load('region_1', 1500)
+    lb.update_load('region_2', 2000)    # most bytes, but u = 500
+    lb.update_load('region_3', 800)     # fewer bytes, u = 800
+    assert lb.get_utilisations() == {'region_1': 1500, 'region_2': 500,
+                                     'region_3': 800}
+    assert lb.mean_utilisation() == pytest.approx(4300 / 6.0)
+    # r_opt is the least utilised region, not the one with fewest bytes
+    assert lb.get_target_region('region_1') == 'region_2'
+    # 3000 B is under region_2's own threshold: no violation
+    lb.update_load('region_2', 1000)
+    assert lb.get_target_region('region_2') == 'region_2'
+    assert lb.threshold_violations == 1
+    assert lb.redirect_events == 1
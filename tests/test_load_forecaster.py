@@ -0,0 +1,64 @@
+import os
+import sys
+
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.abspath(os.path.join(current_dir, '..'))
+multiregion_dir = os.path.join(parent_dir, 'multiregion')
+for p in (parent_dir, multiregion_dir):
+    if p not in sys.path:
+        sys.path.append(p)
+
+from load_balancer import LoadBalancer
+from load_forecaster import EWMAArrivalForecaster, HoltForecaster
+
+REGIONS = ['region_1', 'region_2', 'region_3']
+
+
+def test_ewma_one_step_error_on_constant_arrivals():
+    forecaster = EWMAArrivalForecaster(weight=0.3, z=1.0, drain_per_epoch=40)
+    load = 0
+    for _ in range(10):
+        load += 100 - 40
+        forecaster.observe('region_1', 100, load)
+    # Constant series: zero variance, so the forecast is exact
+    assert forecaster.predict('region_1', load) == pytest.approx(load + 60)
+    assert forecaster.predict('region_2', 500) == 500      # no history
+
+
+def test_ewma_adds_burst_headroom():
+    forecaster = EWMAArrivalForecaster(weight=0.3, z=2.0)
+    for i in range(200):
+        forecaster.observe('region_1', 80 if i % 2 else 120, 0)
+    assert forecaster.mean['region_1'] == pytest.approx(100, abs=4)
+    # Alternating +-20 around the mean: std close to 20
+    predicted = forecaster.predict('region_1', 1000)
+    assert 1000 + 100 + 2 * 15 < predicted < 1000 + 100 + 2 * 25
+
+
+def test_holt_one_step_error_on_linear_trend():
+    forecaster = HoltForecaster(alpha=0.5, beta=0.3)
+    errors = []
+    for epoch in range(40):
+        load = 500 + 100 * epoch
+        if epoch:
+            errors.append(abs(forecast - load))
+        forecaster.observe('region_1', 100, load)
+        forecast = forecaster.predict('region_1', load)
+    assert errors[0] == pytest.approx(100)            # no trend learned yet
+    assert errors[-1] < 1.0
+    assert errors[-1] < errors[10] < errors[0]
+
+
+def test_forecast_triggers_redirect_before_violation():
+    lb = LoadBalancer(REGIONS, load_threshold=1000,
+                      forecaster=EWMAArrivalForecaster(weight=0.5, z=0.0))
+    for _ in range(3):
+        lb.update_load('region_1', 300)
+        lb.end_epoch()
+    # 900 B now, ~300 B more expected next epoch: over 1000 B predicted
+    assert lb.get_load('region_1') == 900
+    assert lb.get_target_region('region_1', 100) != 'region_1'
+    assert lb.threshold_violations == 0
+    assert lb.predictive_redirects == 1
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.abspath(os.path.join(current_dir, '..'))
+multiregion_dir = os.path.join(parent_dir, 'multiregion')
+for p in (parent_dir, multiregion_dir):
+    if p not in sys.path:
+        sys.path.append(p)
+
+from detector_registry import DetectorRegistry
+
+
+def _train(registry, key, n=300):
+    rng = np.random.default_rng(0)
+    for _ in range(n):
+        registry.update(key, [float(rng.normal()), float(rng.normal())])
+
+
+def test_warm_start_falls_back_on_corrupt_checkpoint(tmp_path):
+    registry = DetectorRegistry(['region_1', 'region_2'], max_workers=1,
+                                checkpoint_dir=str(tmp_path),
+                                backend='mahalanobis')
+    try:
+        _train(registry, 'region_1')
+        registry.get('region_1').save(registry.checkpoint_path('region_1'))
+        raw = open(registry.checkpoint_path('region_1'), 'rb').read()
+        # region_1: bit-flipped compressed data; region_2: truncated archive
+        with open(registry.checkpoint_path('region_1'), 'wb') as f:
+            f.write(raw[:60] + bytes(b ^ 0xff for b in raw[60:200]) + raw[200:])
+        with open(registry.checkpoint_path('region_2'), 'wb') as f:
+            f.write(raw[:len(raw) // 2])
+
+        fresh = DetectorRegistry(['region_1', 'region_2'], max_workers=1,
+                                 checkpoint_dir=str(tmp_path),
+                                 backend='mahalanobis')
+        try:
+            assert fresh.warm_start() == []
+            assert not fresh.get('region_1').trained
+            _train(fresh, 'region_1')
+            assert fresh.get('region_1').trained
+        finally:
+            fresh.shutdown()
+    finally:
+        registry.shutdown()
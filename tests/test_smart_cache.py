@@ -0,0 +1,222 @@
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.abspath(os.path.join(current_dir, '..'))
+multiregion_dir = os.path.join(parent_dir, 'multiregion')
+for p in (parent_dir, multiregion_dir):
+    if p not in sys.path:
+        sys.path.append(p)
+
+from disk_cache import DiskCache
+from smart_cache import SmartCache
+
+
+def test_tinylfu_counts_admission_rejections_separately(tmp_path):
+    disk = DiskCache(str(tmp_path / 'tier.bin'), max_bytes=64 * 1024)
+    cache = SmartCache(max_size=10, policy='tinylfu', disk_cache=disk)
+    try:
+        # A scan of one-off keys: almost all are refused at admission
+        for i in range(100):
+            cache.set(f"key_{i}", i)
+        stats = cache.stats()
+        causes = stats['evictions_by_cause']
+        assert len(cache) == 10
+        assert causes['capacity'] + causes['admission'] == 90
+        assert causes['admission'] > causes['capacity']
+        assert stats['evictions'] == causes['capacity']
+        # Only capacity evictions are demoted to the disk tier
+        assert stats['demotions'] == causes['capacity']
+        assert len(disk) == causes['capacity']
+    finally:
+        cache.stop()
+
+
+def test_evictions_by_cause_lru():
+    cache = SmartCache(max_size=10, max_bytes=4096, ttl=60, policy='lru',
+                       expiry_tick=0.01)
+    for i in range(30):
+        cache.set(f"key_{i}", i)
+    cache.set('huge', b'x' * 8192)
+    cache.set('short', 1, ttl=0.02)
+    time.sleep(0.05)
+    assert cache.expire() == 1
+    stats = cache.stats()
+    assert stats['evictions_by_cause'] == {
+        'capacity': 21,
+        'admission': 0,
+        'oversize': 1,
+        'expired': 1,
+    }
+    assert stats['evictions'] == 21
+    assert stats['rejected'] == 1
+    health = cache.health_metrics()
+    assert health['evictions'] == 21
+    assert health['rejected'] == 1
+    assert health['expirations'] == 1
+
+
+def test_evictions_by_cause_tinylfu():
+    cache = SmartCache(max_size=10, policy='tinylfu')
+    for i in range(100):
+        cache.set(f"key_{i}", i)
+    stats = cache.stats()
+    causes = stats['evictions_by_cause']
+    assert causes['capacity'] + causes['admission'] == 90
+    assert causes['admission'] > 0
+    assert stats['rejected'] == causes['admission']
+    assert cache.health_metrics()['rejected'] == causes['admission']
+
+
+def test_get_or_load_single_flight():
+    cache = SmartCache(max_size=10)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def loader(key):
+        calls.append(key)
+        started.set()
+        release.wait(5)
+        return {'key': key}
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        leader = pool.submit(cache.get_or_load, 'a', loader)
+        assert started.wait(5)
+        followers = [pool.submit(cache.get_or_load, 'a', loader) for _ in range(7)]
+        while cache.coalesced < 7:
+            time.sleep(0.001)
+        release.set()
+        results = [leader.result(5)] + [f.result(5) for f in followers]
+
+    assert calls == ['a']
+    assert all(r == {'key': 'a'} for r in results)
+    assert cache.stats()['loads'] == 1
+    assert cache.stats()['coalesced'] == 7
+    assert cache.get_or_load('a', loader) == {'key': 'a'}
+    assert calls == ['a']
+
+
+def test_get_or_load_negative_caching():
+    cache = SmartCache(max_size=10, negative_ttl=0.05, expiry_tick=0.01)
+    calls = []
+
+    def loader(key):
+        calls.append(key)
+        if len(calls) == 1:
+            raise OSError("source unavailable")
+        return 'value'
+
+    for _ in range(3):
+        with pytest.raises(OSError):
+            cache.get_or_load('a', loader)
+    assert calls == ['a']
+    assert cache.stats()['negative_hits'] == 2
+    assert cache.stats()['load_failures'] == 1
+
+    time.sleep(0.1)
+    assert cache.get_or_load('a', loader) == 'value'
+    assert calls == ['a', 'a']
+
+
+def test_get_or_load_invalidate_forgets_failure():
+    cache = SmartCache(max_size=10, negative_ttl=60)
+    with pytest.raises(ValueError):
+        cache.get_or_load('a', lambda key: int('not a number'))
+    cache.invalidate('a')
+    assert cache.get_or_load('a', lambda key: 1) == 1
+
+
+def test_get_or_load_releases_waiters_when_loader_raises():
+    cache = SmartCache(max_size=10, negative_ttl=0)
+    started = threading.Event()
+    release = threading.Event()
+
+    def loader(key):
+        started.set()
+        release.wait(5)
+        raise RuntimeError("load failed")
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(cache.get_or_load, 'a', loader)
+        assert started.wait(5)
+        followers = [pool.submit(cache.get_or_load, 'a', loader) for _ in range(3)]
+        while cache.coalesced < 3:
+            time.sleep(0.001)
+        release.set()
+        for future in [leader] + followers:
+            with pytest.raises(RuntimeError):
+                future.result(5)
+    assert cache._inflight == {}
+
+
+def test_get_or_load_cancels_waiters_on_base_exception():
+    cache = SmartCache(max_size=10)
+    started = threading.Event()
+    release = threading.Event()
+
+    def loader(key):
+        started.set()
+        release.wait(5)
+        raise KeyboardInterrupt
+
+    def lead():
+        try:
+            cache.get_or_load('a', loader)
+        except KeyboardInterrupt:
+            return 'interrupted'
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(lead)
+        assert started.wait(5)
+        follower = pool.submit(cache.get_or_load, 'a', loader)
+        while cache.coalesced < 1:
+            time.sleep(0.001)
+        release.set()
+        assert leader.result(5) == 'interrupted'
+        with pytest.raises(CancelledError):
+            follower.result(5)
+    assert cache._inflight == {}
+
+
+def test_sharded_capacity_never_exceeds_max_size():
+    cache = SmartCache(max_size=10, shards=4)
+    for i in range(200):
+        cache.set(f"key_{i}", i)
+    assert len(cache) == 10
+    with pytest.raises(ValueError):
+        SmartCache(max_size=3, shards=4)
+
+
+def _hit_ratio(policy, seed=7):
+    rng = random.Random(seed)
+    cache = SmartCache(max_size=50, policy=policy)
+    hot = [f"hot/{i}" for i in range(40)]
+    weights = [1.0 / (i + 1) for i in range(len(hot))]
+    hits = lookups = 0
+    for step in range(2000):
+        for key in rng.choices(hot, weights=weights, k=4):
+            lookups += 1
+            if cache.get(key) is not None:
+                hits += 1
+            else:
+                cache.set(key, key)
+        if step % 50 == 0:
+            # Replication-style scan of one-off keys
+            for i in range(100):
+                key = f"scan/{step}/{i}"
+                if cache.get(key) is None:
+                    cache.set(key, key)
+    return hits / lookups
+
+
+def test_tinylfu_beats_lru_on_skewed_reads_with_scans():
+    lru = _hit_ratio('lru')
+    tinylfu = _hit_ratio('tinylfu')
+    assert tinylfu > lru + 0.05
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.abspath(os.path.join(current_dir, '..'))
+multiregion_dir = os.path.join(parent_dir, 'multiregion')
+for p in (parent_dir, multiregion_dir):
+    if p not in sys.path:
+        sys.path.append(p)
+
+from anomaly_detector import AnomalyDetector
+
+
+@pytest.mark.parametrize('backend', ['hst', 'mahalanobis'])
+def test_streaming_backend_flags_injected_outlier(backend):
+    rng = np.random.default_rng(0)
+    detector = AnomalyDetector(backend=backend, contamination=0.05)
+    stream = np.column_stack((rng.uniform(20, 30, 1200), rng.uniform(40, 60, 1200)))
+    for point in stream:
+        detector.update(point)
+    assert detector.trained
+
+    outlier = [95.0, 2.0]
+    assert detector.predict(outlier) == -1
+    assert detector.score(outlier) > detector.score([25.0, 50.0])
+    # The bulk of fresh normal points stays normal
+    normal = np.column_stack((rng.uniform(21, 29, 200), rng.uniform(42, 58, 200)))
+    assert (detector.predict_batch(normal) == 1).mean() > 0.85
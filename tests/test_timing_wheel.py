@@ -0,0 +1,104 @@
+import os
+import random
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.abspath(os.path.join(current_dir, '..'))
+multiregion_dir = os.path.join(parent_dir, 'multiregion')
+for p in (parent_dir, multiregion_dir):
+    if p not in sys.path:
+        sys.path.append(p)
+
+from timing_wheel import TimingWheel
+
+
+def _run(wheel, until, step=1):
+    """Advance tick by tick; returns key -> time it was reported expired."""
+    expired = {}
+    for t in range(step, until + 1, step):
+        for key in wheel.advance(float(t)):
+            assert key not in expired
+            expired[key] = t
+    return expired
+
+
+def test_expires_in_deadline_order_across_levels():
+    # 4 slots x 3 levels: level 0 spans 4 ticks, level 1 16, level 2 64
+    wheel = TimingWheel(tick=1.0, slots=4, levels=3, now=0.0)
+    deadlines = {'l0': 3, 'l1_low': 5, 'l1_high': 15, 'l2_low': 17,
+                 'l2_mid': 40, 'l2_high': 63}
+    for key, deadline in reversed(list(deadlines.items())):
+        wheel.schedule(key, deadline)
+    expired = _run(wheel, 70)
+    assert expired == deadlines
+    assert len(wheel) == 0
+
+
+def test_deadlines_beyond_range_are_parked_and_rescheduled():
+    wheel = TimingWheel(tick=1.0, slots=4, levels=3, now=0.0)
+    deadlines = {f"key_{d}": d for d in (1, 16, 64, 65, 100, 150, 257)}
+    for key, deadline in deadlines.items():
+        wheel.schedule(key, deadline)
+    assert _run(wheel, 300) == deadlines
+
+
+def test_large_advance_returns_every_due_key():
+    wheel = TimingWheel(tick=0.5, slots=4, levels=2, now=0.0)
+    for i in range(1, 41):
+        wheel.schedule(f"key_{i}", i * 0.75)
+    assert sorted(wheel.advance(15.0)) == sorted(f"key_{i}" for i in range(1, 21))
+    assert len(wheel) == 20
+    # Nothing is reported early, at most one tick late
+    for t in range(31, 62):
+        now = t * 0.5
+        for key in wheel.advance(now):
+            assert now - 0.5 < int(key.split('_')[1]) * 0.75 <= now
+
+
+def test_cancel_and_reschedule():
+    wheel = TimingWheel(tick=1.0, slots=4, levels=3, now=0.0)
+    wheel.schedule('a', 10)
+    wheel.schedule('b', 20)
+    wheel.schedule('a', 30)
+    wheel.cancel('b')
+    wheel.cancel('missing')
+    assert _run(wheel, 40) == {'a': 30}
+
+
+def test_idle_advance_skips_empty_ticks():
+    # 1 ms ticks: stepping through a billion idle ticks would take minutes
+    wheel = TimingWheel(tick=0.001, now=0.0)
+    start = time.perf_counter()
+    assert wheel.advance(1e6) == []
+    wheel.schedule('far', 2e6 + 0.5)          # parked beyond the wheel's range
+    wheel.schedule('near', 1e6 + 0.25)
+    assert wheel.advance(1e6 + 0.2) == []
+    assert wheel.advance(1e6 + 0.3) == ['near']
+    assert wheel.advance(2e6 + 0.4) == []
+    assert wheel.advance(2e6 + 0.6) == ['far']
+    assert len(wheel) == 0
+    assert time.perf_counter() - start < 1.0
+
+
+def test_skipping_matches_tick_by_tick_advance():
+    rng = random.Random(5)
+    stepped = TimingWheel(tick=1.0, slots=4, levels=3, now=0.0)
+    skipping = TimingWheel(tick=1.0, slots=4, levels=3, now=0.0)
+    deadlines = {f"key_{i}": rng.randint(1, 400) for i in range(200)}
+    for key, deadline in deadlines.items():
+        stepped.schedule(key, deadline)
+        skipping.schedule(key, deadline)
+    expected = _run(stepped, 420)
+    got = {}
+    times = []
+    t = 0
+    while t < 420:
+        t = min(420, t + rng.choice([1, 3, 17, 70]))
+        times.append(t)
+        for key in skipping.advance(float(t)):
+            got[key] = t
+    assert expected == deadlines
+    # Each key is reported by the first advance() at or past its deadline
+    for key, deadline in deadlines.items():
+        assert got[key] == next(t for t in times if t >= deadline)
@@ -0,0 +1,60 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.abspath(os.path.join(current_dir, '..'))
+multiregion_dir = os.path.join(parent_dir, 'multiregion')
+for p in (parent_dir, multiregion_dir):
+    if p not in sys.path:
+        sys.path.append(p)
+
+from training_window import TrainingWindow
+
+
+def test_sliding_window_keeps_most_recent_oldest_first():
+    window = TrainingWindow(capacity=5, policy='sliding')
+    for i in range(12):
+        window.append([i, -i])
+    assert len(window) == 5
+    assert window.total_seen == 12
+    assert window.array()[:, 0].tolist() == [7, 8, 9, 10, 11]
+
+
+def test_reservoir_size_is_bounded():
+    window = TrainingWindow(capacity=100, policy='reservoir', seed=1)
+    for i in range(50):
+        window.append([i])
+    assert len(window) == 50
+    for i in range(50, 10000):
+        window.append([i])
+    assert len(window) == 100
+    assert window.total_seen == 10000
+    assert window.nbytes() == 100 * 8
+    values = window.array()[:, 0]
+    assert len(set(values.tolist())) == 100
+
+
+def test_reservoir_sample_is_uniform():
+    # Over many runs each of the n stream positions is kept with
+    # probability capacity / n; check every decile of the stream
+    capacity, n, runs = 50, 1000, 400
+    counts = np.zeros(10)
+    for seed in range(runs):
+        window = TrainingWindow(capacity=capacity, policy='reservoir', seed=seed)
+        for i in range(n):
+            window.append([i])
+        kept = window.array()[:, 0].astype(int)
+        counts += np.bincount(kept // (n // 10), minlength=10)
+    expected = runs * capacity / 10           # 2000 per decile
+    # Binomial std per decile is ~43; allow 5 standard deviations
+    assert np.all(np.abs(counts - expected) < 5 * np.sqrt(expected))
+
+
+def test_rejects_bad_arguments():
+    with pytest.raises(ValueError):
+        TrainingWindow(capacity=0)
+    with pytest.raises(ValueError):
+        TrainingWindow(policy='fifo')
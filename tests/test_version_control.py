@@ -0,0 +1,183 @@
+import os
+import sqlite3
+import sys
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.abspath(os.path.join(current_dir, '..'))
+multiregion_dir = os.path.join(parent_dir, 'multiregion')
+for p in (parent_dir, multiregion_dir):
+    if p not in sys.path:
+        sys.path.append(p)
+
+from version_control import DataVersionControl
+
+
+@pytest.fixture
+def store(tmp_path):
+    vc = DataVersionControl(str(tmp_path), max_delay=0.01)
+    yield vc
+    vc.close()
+
+
+def test_flush_waits_for_queued_writes(store, tmp_path):
+    path = str(tmp_path / 'file.json')
+    release = threading.Event()
+    commit = store._commit
+
+    def slow_commit(batch):
+        release.wait(5)
+        commit(batch)
+
+    store._commit = slow_commit
+    results = [store.save_version(path, {'n': i}) for i in range(20)]
+    assert not results[-1]['committed'].done()
+    release.set()
+    store.flush(timeout=5)
+    assert all(r['committed'].done() for r in results)
+    assert store.count_versions(path) == 20
+    assert store.get_latest(path) == {'n': 19}
+
+
+def test_flush_barrier_is_not_counted_as_a_batch(store, tmp_path):
+    path = str(tmp_path / 'file.json')
+    store.save_version(path, {'n': 1})['committed'].result(5)
+    batches = store.stats()['batches']
+    # A flush() barrier that reaches the writer on its own
+    barrier = Future()
+    store._queue.put((None, barrier))
+    assert barrier.result(5) is True
+    assert store.stats()['batches'] == batches
+    assert store.stats()['records'] == 1
+
+
+def test_commit_error_resolves_futures_and_keeps_writer(store, tmp_path):
+    path = str(tmp_path / 'file.json')
+    commit = store._commit
+    calls = []
+
+    def failing_once(batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise RuntimeError("disk on fire")
+        commit(batch)
+
+    store._commit = failing_once
+    failed = store.save_version(path, {'n': 1})['committed']
+    with pytest.raises(RuntimeError):
+        failed.result(5)
+
+    # The database error path resolves futures too
+    store._commit = commit
+    store.INSERT_VERSION = "INSERT INTO missing_table VALUES (?, ?, ?, ?)"
+    with pytest.raises(sqlite3.OperationalError):
+        store.save_version(path, {'n': 2})['committed'].result(5)
+
+    del store.INSERT_VERSION
+    assert store.save_version(path, {'n': 3})['committed'].result(5) is True
+    assert store._writer.is_alive()
+    assert store.get_latest(path) == {'n': 3}
+
+
+def test_direct_commit_counts_batches(tmp_path):
+    vc = DataVersionControl(str(tmp_path), group_commit=False)
+    try:
+        path = str(tmp_path / 'file.json')
+        threads = [threading.Thread(target=vc.save_version, args=(path, {'n': i}))
+                   for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert vc.stats()['batches'] == 8
+        assert vc.stats()['records'] == 8
+        assert vc.count_versions(path) == 8
+    finally:
+        vc.close()
+
+
+def _v1_database(base_dir, rows):
+    version_dir = os.path.join(base_dir, '.versions')
+    os.makedirs(version_dir)
+    conn = sqlite3.connect(os.path.join(version_dir, 'version_history.db'))
+    with conn:
+        conn.execute('''CREATE TABLE versions
+                        (checksum TEXT PRIMARY KEY,
+                         file_path TEXT,
+                         timestamp TEXT,
+                         metadata TEXT)''')
+        conn.executemany("INSERT INTO versions VALUES (?, ?, ?, ?)", rows)
+    conn.close()
+    return os.path.join(version_dir, 'version_history.db')
+
+
+def _tables(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {name for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table'")}
+    finally:
+        conn.close()
+
+
+def test_migrates_v1_database(tmp_path):
+    _v1_database(str(tmp_path), [
+        ('b', 'file.json', '2024-01-02T00:00:00', '{}'),
+        ('a', 'file.json', '2024-01-01T00:00:00', '{"n": 1}'),
+        ('c', 'other.json', '2024-01-03T00:00:00', None),
+    ])
+    vc = DataVersionControl(str(tmp_path))
+    try:
+        path = str(tmp_path / 'file.json')
+        assert vc.count_versions(path) == 2
+        versions = vc.get_versions_between(path, '2024-01-01', '2024-12-31')
+        assert [v['checksum'] for v in versions] == ['a', 'b']
+        assert versions[0]['metadata'] == {'n': 1}
+        assert 'versions_v1' not in _tables(vc.db_path)
+    finally:
+        vc.close()
+
+
+def test_failed_migration_leaves_v1_table_intact(tmp_path):
+    # A NULL file_path violates the new NOT NULL column part way through
+    db_path = _v1_database(str(tmp_path), [
+        ('a', 'file.json', '2024-01-01T00:00:00', '{}'),
+        ('b', None, '2024-01-02T00:00:00', '{}'),
+    ])
+    with pytest.raises(sqlite3.IntegrityError):
+        DataVersionControl(str(tmp_path), group_commit=False)
+    assert _tables(db_path) == {'versions'}
+    conn = sqlite3.connect(db_path)
+    try:
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(versions)")]
+        assert 'id' not in columns
+        assert conn.execute("SELECT COUNT(*) FROM versions").fetchone()[0] == 2
+    finally:
+        conn.close()
+
+
+def test_resumes_interrupted_migration(tmp_path):
+    # State left by a crash of the old, non-atomic migration
+    db_path = _v1_database(str(tmp_path), [
+        ('a', 'file.json', '2024-01-01T00:00:00', '{}'),
+        ('b', 'file.json', '2024-01-02T00:00:00', '{}'),
+    ])
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("ALTER TABLE versions RENAME TO versions_v1")
+        conn.execute('''CREATE TABLE versions
+                        (id INTEGER PRIMARY KEY, checksum TEXT NOT NULL,
+                         file_path TEXT NOT NULL, timestamp TEXT NOT NULL,
+                         metadata TEXT)''')
+        conn.execute("INSERT INTO versions (checksum, file_path, timestamp) "
+                     "VALUES ('a', 'file.json', '2024-01-01T00:00:00')")
+    conn.close()
+    vc = DataVersionControl(str(tmp_path))
+    try:
+        assert vc.count_versions(str(tmp_path / 'file.json')) == 2
+        assert 'versions_v1' not in _tables(db_path)
+    finally:
+        vc.close()